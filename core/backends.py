@@ -0,0 +1,250 @@
+"""
+Selectable CPU inference backends for the local transformer models.
+
+Each model can run as full-precision PyTorch ("torch"), int8
+dynamic-quantized PyTorch ("int8") or an ONNX Runtime export ("onnx"),
+chosen with INFERENCE_BACKEND or a per-model <NAME>_BACKEND setting.
+
+    python -m core.backends export [embedding qa rewriter]
+    python -m core.backends parity --backend int8 [--tolerance 2.0]
+    python -m core.backends benchmark [--runs 20]
+
+ONNX needs `pip install optimum[onnxruntime]`. The parity check also runs
+as part of the test suite (tests/test_backend_parity.py), skipped where a
+runtime is not installed.
+"""
+import argparse
+import difflib
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+from core.config import settings
+from core.models import process_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "int8", "onnx")
+
+# Registry name -> (hub model id, pipeline task)
+MODELS = {
+    "embedding": (settings.EMBEDDING_MODEL, "feature-extraction"),
+    "qa": ("distilbert-base-uncased-distilled-squad", "question-answering"),
+    "rewriter": ("google/flan-t5-base", "text2text-generation"),
+}
+
+
+def backend_for(name: str) -> str:
+    backend = (getattr(settings, f"{name.upper()}_BACKEND", "") or settings.INFERENCE_BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' for '{name}'; expected one of {BACKENDS}")
+    return backend
+
+
+def onnx_dir(name: str) -> str:
+    return os.path.join(settings.ONNX_MODEL_DIR, name)
+
+
+def quantize_int8(module):
+    """Returns a copy of module with every Linear layer quantized to int8."""
+    import torch
+    return torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _ort_model_class(task: str):
+    try:
+        from optimum.onnxruntime import (
+            ORTModelForFeatureExtraction,
+            ORTModelForQuestionAnswering,
+            ORTModelForSeq2SeqLM,
+        )
+    except ImportError as e:
+        raise RuntimeError("The onnx backend needs optimum: pip install optimum[onnxruntime]") from e
+    return {
+        "feature-extraction": ORTModelForFeatureExtraction,
+        "question-answering": ORTModelForQuestionAnswering,
+        "text2text-generation": ORTModelForSeq2SeqLM,
+    }[task]
+
+
+def export_onnx(name: str) -> str:
+    """Exports a model to ONNX under ONNX_MODEL_DIR/<name>. Returns the directory."""
+    model_id, task = MODELS[name]
+    path = onnx_dir(name)
+    logger.info(f"⏳ Exporting '{name}' ({model_id}) to ONNX at {path}...")
+    if name == "embedding":
+        from sentence_transformers import SentenceTransformer
+        # sentence-transformers exports on load when backend="onnx"; keep the pooling config with it
+        SentenceTransformer(model_id, backend="onnx").save_pretrained(path)
+    else:
+        from transformers import AutoTokenizer
+        _ort_model_class(task).from_pretrained(model_id, export=True).save_pretrained(path)
+        AutoTokenizer.from_pretrained(model_id).save_pretrained(path)
+    return path
+
+
+def load_sentence_transformer(backend: str = None):
+    from sentence_transformers import SentenceTransformer
+    backend = backend or backend_for("embedding")
+    logger.info(f"Embedding model backend: {backend}")
+    if backend == "onnx":
+        path = onnx_dir("embedding")
+        if not os.path.isdir(path):
+            export_onnx("embedding")
+        return SentenceTransformer(path, backend="onnx")
+    model = SentenceTransformer(MODELS["embedding"][0])
+    return quantize_int8(model) if backend == "int8" else model
+
+
+def load_pipeline(name: str, backend: str = None):
+    """Builds the transformers pipeline registered under name on the chosen backend."""
+    from transformers import pipeline
+    model_id, task = MODELS[name]
+    backend = backend or backend_for(name)
+    logger.info(f"'{name}' model backend: {backend}")
+    if backend == "onnx":
+        from transformers import AutoTokenizer
+        path = onnx_dir(name)
+        if not os.path.isdir(path):
+            export_onnx(name)
+        return pipeline(task, model=_ort_model_class(task).from_pretrained(path),
+                        tokenizer=AutoTokenizer.from_pretrained(path))
+    pipe = pipeline(task, model=model_id)
+    if backend == "int8":
+        pipe.model = quantize_int8(pipe.model)
+    return pipe
+
+
+def load_model(name: str, backend: str = None):
+    return load_sentence_transformer(backend) if name == "embedding" else load_pipeline(name, backend)
+
+
+# ----- parity check and benchmark -----
+
+SAMPLE_RESUMES = [
+    "Senior Python developer with 6 years building FastAPI and Django services, PostgreSQL, Docker and AWS.",
+    "Data analyst skilled in SQL, Tableau and Excel; built weekly revenue dashboards for the sales team.",
+    "Frontend engineer: React, TypeScript, accessibility audits and design systems for a fintech product.",
+    "Registered nurse with ICU experience, patient triage, and electronic health record documentation.",
+]
+SAMPLE_JOBS = [
+    "Backend engineer to design REST APIs in Python, run services on Kubernetes and tune PostgreSQL.",
+    "Business intelligence analyst owning SQL pipelines and executive dashboards in Tableau.",
+]
+SAMPLE_QUESTIONS = [
+    "What frameworks does the candidate use?",
+    "How many years of experience does the candidate have?",
+    "Which database does the candidate know?",
+]
+
+
+def _run_samples(name: str, model):
+    """Runs the fixed sample inputs through a loaded model; returns comparable outputs."""
+    if name == "embedding":
+        embeds = model.encode(SAMPLE_RESUMES + SAMPLE_JOBS, convert_to_numpy=True, normalize_embeddings=True)
+        resumes, jobs = embeds[:len(SAMPLE_RESUMES)], embeds[len(SAMPLE_RESUMES):]
+        return (resumes @ jobs.T * 100).round(2).tolist()
+    if name == "qa":
+        context = SAMPLE_RESUMES[0]
+        return [model(question=q, context=context)["answer"] for q in SAMPLE_QUESTIONS]
+    prompts = [f"Rewrite this resume line to mention Kubernetes: {text}" for text in SAMPLE_RESUMES[:2]]
+    outputs = model(prompts, max_length=64, do_sample=False)
+    return [out[0]["generated_text"] if isinstance(out, list) else out["generated_text"] for out in outputs]
+
+
+def parity(name: str, backend: str, tolerance: float, min_similarity: float = 0.8) -> bool:
+    """Compares a backend against full-precision torch on the sample inputs."""
+    reference = _run_samples(name, load_model(name, "torch"))
+    candidate = _run_samples(name, load_model(name, backend))
+
+    if name == "embedding":
+        worst = max(abs(a - b) for ref_row, cand_row in zip(reference, candidate) for a, b in zip(ref_row, cand_row))
+        ok = worst <= tolerance
+        print(f"{name} [{backend}]: max match-score difference {worst:.2f} (tolerance {tolerance}) -> {'OK' if ok else 'FAIL'}")
+        return ok
+
+    agree = sum(a.strip().lower() == b.strip().lower() for a, b in zip(reference, candidate)) / len(reference)
+    if name == "qa":
+        # Extractive answers must agree exactly
+        ok = agree == 1.0
+        print(f"{name} [{backend}]: {agree:.0%} of outputs identical to torch -> {'OK' if ok else 'FAIL'}")
+        return ok
+
+    # Greedy rewrites may drift by a word or two, but must stay close to the torch output
+    similarity = min(
+        difflib.SequenceMatcher(None, a.strip().lower().split(), b.strip().lower().split()).ratio()
+        for a, b in zip(reference, candidate)
+    )
+    ok = similarity >= min_similarity
+    print(f"{name} [{backend}]: {agree:.0%} identical, min word-level similarity {similarity:.2f} "
+          f"(minimum {min_similarity}) -> {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+def _benchmark_one(name: str, backend: str, runs: int) -> dict:
+    # Runs in a fresh process so RSS reflects this backend alone
+    rss_before = process_rss_bytes()
+    start = time.perf_counter()
+    model = load_model(name, backend)
+    load_seconds = time.perf_counter() - start
+    _run_samples(name, model)  # warm-up
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _run_samples(name, model)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "load_s": round(load_seconds, 2),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 1),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 1),
+        "rss_mb": round((process_rss_bytes() - rss_before) / (1024 * 1024), 1),
+    }
+
+
+def benchmark(name: str, backends, runs: int):
+    context = multiprocessing.get_context("spawn")
+    print(f"{name}: {'backend':<6} {'load_s':>7} {'p50_ms':>8} {'p95_ms':>8} {'rss_mb':>8}")
+    for backend in backends:
+        with context.Pool(1) as pool:
+            try:
+                result = pool.apply(_benchmark_one, (name, backend, runs))
+            except Exception as e:
+                print(f"{name}: {backend:<6} failed: {e}")
+                continue
+        print(f"{name}: {backend:<6} {result['load_s']:>7} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['rss_mb']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, verify and benchmark inference backends")
+    parser.add_argument("command", choices=("export", "parity", "benchmark"))
+    parser.add_argument("models", nargs="*", default=list(MODELS), help=f"Any of {', '.join(MODELS)} (default: all)")
+    parser.add_argument("--backend", choices=BACKENDS[1:], help="Backend to check (parity) or limit to (benchmark)")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="Max match-score difference (0-100 scale)")
+    parser.add_argument("--min-similarity", type=float, default=0.8,
+                        help="Min word-level similarity of rewriter outputs to torch (0-1)")
+    parser.add_argument("--runs", type=int, default=20, help="Timed iterations per backend")
+    args = parser.parse_args()
+
+    unknown = [m for m in args.models if m not in MODELS]
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)}")
+
+    if args.command == "export":
+        for name in args.models:
+            print(f"Exported {name} to {export_onnx(name)}")
+    elif args.command == "parity":
+        backends = [args.backend] if args.backend else list(BACKENDS[1:])
+        results = [parity(name, backend, args.tolerance, args.min_similarity) for name in args.models for backend in backends]
+        sys.exit(0 if all(results) else 1)
+    else:
+        backends = ["torch", args.backend] if args.backend else list(BACKENDS)
+        for name in args.models:
+            benchmark(name, backends, args.runs)
+
+
+if __name__ == "__main__":
+    main()
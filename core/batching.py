@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch-size histogram buckets
+HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class MicroBatcher:
+    """
+    Dynamic batching scheduler for one model.
+
+    Callers submit single items from any thread; a worker thread collects
+    queued items until max_batch_size is reached or max_wait_ms has passed
+    since the first one arrived, runs batch_fn once on the whole list, and
+    hands each caller its own result.
+    """
+
+    def __init__(self, name: str, batch_fn, max_batch_size: int = None, max_wait_ms: float = None,
+                 timeout_s: float = None):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size or settings.BATCH_MAX_SIZE
+        self.max_wait_s = (max_wait_ms if max_wait_ms is not None else settings.BATCH_MAX_WAIT_MS) / 1000
+        self.timeout_s = timeout_s or settings.BATCH_TIMEOUT_S
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        self.batches = 0
+        self.items = 0
+        self.histogram = {bucket: 0 for bucket in HISTOGRAM_BUCKETS}
+        self.histogram["inf"] = 0
+        self.total_queue_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.cancelled = 0
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._loop, name=f"batcher-{self.name}", daemon=True)
+                self._worker.start()
+
+    def submit_future(self, item) -> Future:
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def submit(self, item):
+        """Blocks until the batch containing item has run; returns its result."""
+        return self._wait([self.submit_future(item)])[0]
+
+    def submit_many(self, items):
+        """Enqueues all items at once (so they can share batches) and waits for all."""
+        return self._wait([self.submit_future(item) for item in items])
+
+    def _wait(self, futures):
+        deadline = time.perf_counter() + self.timeout_s
+        try:
+            return [future.result(timeout=max(0.0, deadline - time.perf_counter())) for future in futures]
+        except FuturesTimeoutError:
+            # Items still queued are dropped by the worker instead of run for nobody
+            for future in futures:
+                future.cancel()
+            raise TimeoutError(f"{self.name} batch did not finish within {self.timeout_s}s")
+
+    async def submit_async(self, item):
+        return await asyncio.wrap_future(self.submit_future(item))
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Callers that gave up (cancelled futures) are skipped; the rest can no longer be cancelled
+            live = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            self.cancelled += len(batch) - len(live)
+            if not live:
+                continue
+            try:
+                self._run(live)
+            except Exception as e:
+                # Never let one bad batch kill the worker and strand every later caller
+                logger.error(f"Batcher '{self.name}' failed to deliver a batch: {e}")
+                for _, future, _ in live:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run(self, batch):
+        items = [item for item, _, _ in batch]
+        started = time.perf_counter()
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logger.error(f"Batch inference failed for '{self.name}': {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            results = None
+        finished = time.perf_counter()
+
+        if results is not None:
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+        self.batches += 1
+        self.items += len(batch)
+        self.total_queue_seconds += sum(started - enqueued for _, _, enqueued in batch)
+        self.total_run_seconds += finished - started
+        bucket = next((b for b in HISTOGRAM_BUCKETS if len(batch) <= b), "inf")
+        self.histogram[bucket] += 1
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait_s * 1000, 2),
+            "queued": self._queue.qsize(),
+            "cancelled": self.cancelled,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "avg_queue_ms": round(self.total_queue_seconds / self.items * 1000, 2) if self.items else 0.0,
+            "avg_batch_run_ms": round(self.total_run_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+            "batch_size_histogram": {f"<={k}" if k != "inf" else f">{HISTOGRAM_BUCKETS[-1]}": v
+                                     for k, v in self.histogram.items()},
+        }
+
+
+batchers = {}
+
+
+def get_batcher(name: str, batch_fn) -> MicroBatcher:
+    """Returns the shared batcher for name, creating it on first use."""
+    batcher = batchers.get(name)
+    if batcher is None:
+        batcher = batchers.setdefault(name, MicroBatcher(name, batch_fn))
+    return batcher
+
+
+def batcher_stats() -> dict:
+    return {name: batcher.stats() for name, batcher in batchers.items()}
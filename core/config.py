@@ -7,5 +7,103 @@ class Settings:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
     EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    # Local model inference: "torch" (fp32), "int8" (dynamic-quantized) or "onnx" (ONNX Runtime)
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "")  # per-model overrides; "" = INFERENCE_BACKEND
+    QA_BACKEND = os.getenv("QA_BACKEND", "")
+    REWRITER_BACKEND = os.getenv("REWRITER_BACKEND", "")
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", ".cache/onnx")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "")
+    ROLE_TAXONOMY_PATH = os.getenv("ROLE_TAXONOMY_PATH", "")
+    ROLE_INDEX_DIR = os.getenv("ROLE_INDEX_DIR", "")
+    ROLE_INDEX_NPROBE = int(os.getenv("ROLE_INDEX_NPROBE", "8"))
+    # /match scoring: "chunked" (section-aware max-sim over chunks) or "document" (one vector per document)
+    MATCH_SCORING = os.getenv("MATCH_SCORING", "chunked")
+    MATCH_CHUNK_WORDS = int(os.getenv("MATCH_CHUNK_WORDS", "150"))  # stays under the encoder's 256-token limit
+    MATCH_CHUNK_OVERLAP = int(os.getenv("MATCH_CHUNK_OVERLAP", "30"))
+    # Every parsed resume is embedded into this index for candidate search ("" = disabled)
+    RESUME_INDEX_DIR = os.getenv("RESUME_INDEX_DIR", "")
+    RESUME_INDEX_NPROBE = int(os.getenv("RESUME_INDEX_NPROBE", "8"))
+    PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+    IO_WORKERS = int(os.getenv("IO_WORKERS", "4"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    POOL_MAX_QUEUE = int(os.getenv("POOL_MAX_QUEUE", "100"))  # 0 = unbounded
+    DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "256"))
+    DOCUMENT_CACHE_DIR = os.getenv("DOCUMENT_CACHE_DIR", "")
+    # PDFs with at least this many pages are split across PDF_PAGE_WORKERS processes. Each
+    # parse worker starts its own page pool, so the default shares the CPUs between them.
+    PDF_PAGE_WORKERS = int(os.getenv("PDF_PAGE_WORKERS", str(max(1, min(4, (os.cpu_count() or 1) // PARSE_WORKERS)))))
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+    # OCR for scanned PDF pages and image resumes
+    OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() == "true"
+    OCR_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", "20"))
+    OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+    OCR_MAX_DIMENSION = int(os.getenv("OCR_MAX_DIMENSION", "2500"))  # px, 0 = no downscaling
+    OCR_BINARIZE_THRESHOLD = int(os.getenv("OCR_BINARIZE_THRESHOLD", "160"))  # 0 = no binarization
+    OCR_TIME_BUDGET_S = float(os.getenv("OCR_TIME_BUDGET_S", "30"))  # per document, 0 = unlimited
+    # Retrieval-first QA: only the top passages per question reach the reader model
+    QA_RETRIEVAL = os.getenv("QA_RETRIEVAL", "true").lower() == "true"
+    QA_CHUNK_WORDS = int(os.getenv("QA_CHUNK_WORDS", "120"))
+    QA_CHUNK_OVERLAP = int(os.getenv("QA_CHUNK_OVERLAP", "30"))
+    QA_TOP_PASSAGES = int(os.getenv("QA_TOP_PASSAGES", "3"))
+    # Chat sessions: "memory" (single worker) or "sqlite" (shared across workers)
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+    SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", ".cache/sessions.db")
+    SESSION_MAX = int(os.getenv("SESSION_MAX", "1000"))
+    SESSION_TTL_S = float(os.getenv("SESSION_TTL_S", "3600"))
+    # Chat context budget (estimated tokens)
+    CHAT_MAX_PROMPT_TOKENS = int(os.getenv("CHAT_MAX_PROMPT_TOKENS", "6000"))
+    CHAT_RESUME_MAX_TOKENS = int(os.getenv("CHAT_RESUME_MAX_TOKENS", "2000"))
+    CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "500"))
+    CHAT_KEEP_RECENT_TURNS = int(os.getenv("CHAT_KEEP_RECENT_TURNS", "4"))
+    # Cache of Gemini tool responses (set TOOL_CACHE_PATH to persist/share it)
+    TOOL_CACHE_TTL_S = float(os.getenv("TOOL_CACHE_TTL_S", "86400"))
+    TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "5000"))
+    TOOL_CACHE_PATH = os.getenv("TOOL_CACHE_PATH", "")
+    # Micro-batching of local model inference across concurrent requests
+    BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+    BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+    BATCH_TIMEOUT_S = float(os.getenv("BATCH_TIMEOUT_S", "120"))  # max time a caller waits for its batch
+    # Skill extraction: "gazetteer" (fast, local) or "ner" (spaCy transformer)
+    SKILL_EXTRACTOR = os.getenv("SKILL_EXTRACTOR", "gazetteer")
+    SKILLS_GAZETTEER_PATH = os.getenv("SKILLS_GAZETTEER_PATH", "")
+    # LLM backend: "gemini", or "local" for a deterministic offline stand-in (load tests, benchmarks)
+    LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+    LLM_MODEL = os.getenv("LLM_MODEL", "")  # chat model; "" = discover from the API
+    TOOLS_MODEL = os.getenv("TOOLS_MODEL", "gemini-pro")  # model for /tools/*; "" = same as chat
+    LLM_MODEL_CACHE_PATH = os.getenv("LLM_MODEL_CACHE_PATH", ".cache/llm_models.json")
+    LLM_MODEL_CACHE_TTL_S = float(os.getenv("LLM_MODEL_CACHE_TTL_S", "86400"))
+    LLM_RECORDINGS_PATH = os.getenv("LLM_RECORDINGS_PATH", "")  # gemini records answers here; local replays them
+    LLM_LOCAL_LATENCY_MS = float(os.getenv("LLM_LOCAL_LATENCY_MS", "300"))  # simulated time to first token
+    LLM_LOCAL_TOKENS_PER_S = float(os.getenv("LLM_LOCAL_TOKENS_PER_S", "50"))
+    LLM_LOCAL_RESPONSE_TOKENS = int(os.getenv("LLM_LOCAL_RESPONSE_TOKENS", "80"))
+    # Client-side protection of the LLM quota, shared by the chat agent and the tools
+    LLM_RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "60"))  # 0 = no rate limit
+    LLM_RATE_LIMIT_BURST = float(os.getenv("LLM_RATE_LIMIT_BURST", "5"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "1"))
+    LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "30"))
+    LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))  # retries per request, over 10s
+    LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+    LLM_LATENCY_TARGET_S = float(os.getenv("LLM_LATENCY_TARGET_S", "15"))  # slower calls shrink concurrency
+    # Multi-backend routing, cheapest first, e.g. "gemini-1.5-flash,gemini-1.5-pro,flan-t5" ("" = off)
+    LLM_ROUTES = os.getenv("LLM_ROUTES", "")
+    LLM_SLO_S = float(os.getenv("LLM_SLO_S", "8"))  # backends with a slower p95 are demoted
+    LLM_HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", "0"))  # 0 = hedge after the primary's p95
+    LLM_BACKEND_TIMEOUT_S = float(os.getenv("LLM_BACKEND_TIMEOUT_S", "30"))
+    LLM_MAX_ERROR_RATE = float(os.getenv("LLM_MAX_ERROR_RATE", "0.2"))
+    # Background job queue for slow work (OCR, rewrites, batches); "" (default) disables /jobs
+    JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # processes serving every lane, highest priority first
+    JOB_INTERACTIVE_WORKERS = int(os.getenv("JOB_INTERACTIVE_WORKERS", "1"))  # reserved for the interactive lane
+    JOB_POLL_INTERVAL_S = float(os.getenv("JOB_POLL_INTERVAL_S", "0.5"))
+    JOB_TIMEOUT_S = float(os.getenv("JOB_TIMEOUT_S", "600"))  # lease: jobs whose worker is silent this long are re-queued
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+    JOB_RESULT_TTL_S = float(os.getenv("JOB_RESULT_TTL_S", "86400"))  # finished jobs are purged after this
+    # Comma-separated model names to load at startup ("all" for every registered model)
+    PRELOAD_MODELS = [m.strip() for m in os.getenv("PRELOAD_MODELS", "").split(",") if m.strip()]
 
 settings = Settings()
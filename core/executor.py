@@ -0,0 +1,198 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """Raised when a pool's wait queue is full and the request should be shed."""
+
+
+class BoundedPool:
+    """
+    A named worker pool with a concurrency limit and queue-depth metrics.
+
+    Sync callables run on a thread or process executor; native coroutines
+    (e.g. async LLM clients) share the same concurrency limit without
+    occupying a worker thread.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, kind: str = "thread", max_queue: int = 0):
+        self.name = name
+        self.kind = kind
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._semaphore = None
+
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queued = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self):
+        # Created on first use so importing the app does not fork workers
+        with self._executor_lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # Spawned, not forked: the parent already runs threads (and may hold torch state)
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_concurrency, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_concurrency, thread_name_prefix=f"pool-{self.name}"
+                    )
+            return self._executor
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _enter(self) -> float:
+        """Waits for a slot (or sheds the request); returns when it started running."""
+        if self.max_queue and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise PoolSaturatedError(f"{self.name} pool is saturated ({self.queued} requests queued)")
+
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        enqueued_at = time.perf_counter()
+        try:
+            await self._get_semaphore().acquire()
+        finally:
+            self.queued -= 1
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - enqueued_at
+        self.active += 1
+        return started_at
+
+    def _exit(self, started_at: float):
+        self.active -= 1
+        self.total_run_seconds += time.perf_counter() - started_at
+        self._get_semaphore().release()
+
+    async def _limited(self, make_awaitable):
+        started_at = await self._enter()
+        try:
+            result = await make_awaitable()
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._exit(started_at)
+
+    async def stream(self, gen_fn, *args, **kwargs):
+        """Iterates a blocking generator on this pool's threads, holding one slot until it ends."""
+        started_at = await self._enter()
+        loop = asyncio.get_running_loop()
+        iterator = gen_fn(*args, **kwargs)
+        finished = object()
+        try:
+            while True:
+                item = await loop.run_in_executor(self._get_executor(), next, iterator, finished)
+                if item is finished:
+                    break
+                yield item
+            self.completed += 1
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            # Also runs when the client disconnects mid-stream
+            try:
+                iterator.close()
+            except ValueError:
+                pass  # still inside next() on a worker thread; it is collected once that returns
+            self._exit(started_at)
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs a blocking callable on this pool's executor."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        return await self._limited(lambda: loop.run_in_executor(self._get_executor(), call))
+
+    async def run_coroutine(self, coro_fn, *args, **kwargs):
+        """Awaits a coroutine function under this pool's concurrency limit."""
+        return await self._limited(lambda: coro_fn(*args, **kwargs))
+
+    def stats(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "kind": self.kind,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_seconds / finished * 1000, 2) if finished else 0.0,
+            "avg_run_ms": round(self.total_run_seconds / finished * 1000, 2) if finished else 0.0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# CPU-bound document parsing runs in separate processes (PyMuPDF/Tesseract hold
+# the GIL); model inference releases the GIL inside torch, so threads suffice.
+# Blocking file work (index and store files behind cross-process locks) gets
+# its own small thread pool so it never waits behind inference.
+pools = {
+    "parse": BoundedPool("parse", settings.PARSE_WORKERS, kind="process", max_queue=settings.POOL_MAX_QUEUE),
+    "inference": BoundedPool("inference", settings.INFERENCE_WORKERS, max_queue=settings.POOL_MAX_QUEUE),
+    "io": BoundedPool("io", settings.IO_WORKERS, max_queue=settings.POOL_MAX_QUEUE),
+    "llm": BoundedPool("llm", settings.LLM_MAX_CONCURRENCY, max_queue=settings.POOL_MAX_QUEUE),
+}
+
+
+async def run_parse(fn, *args, **kwargs):
+    return await pools["parse"].run(fn, *args, **kwargs)
+
+
+async def run_inference(fn, *args, **kwargs):
+    return await pools["inference"].run(fn, *args, **kwargs)
+
+
+async def run_io(fn, *args, **kwargs):
+    return await pools["io"].run(fn, *args, **kwargs)
+
+
+async def run_llm(fn, *args, **kwargs):
+    """Runs an LLM call; coroutine functions are awaited natively, others on threads."""
+    if asyncio.iscoroutinefunction(fn):
+        return await pools["llm"].run_coroutine(fn, *args, **kwargs)
+    return await pools["llm"].run(fn, *args, **kwargs)
+
+
+def stream_llm(gen_fn, *args, **kwargs):
+    """Async iterator over a blocking streaming LLM call, counted against the llm pool."""
+    return pools["llm"].stream(gen_fn, *args, **kwargs)
+
+
+def executor_stats() -> dict:
+    return {name: pool.stats() for name, pool in pools.items()}
+
+
+def shutdown_pools():
+    for pool in pools.values():
+        pool.shutdown()
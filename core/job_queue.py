@@ -0,0 +1,186 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "default": 1, "bulk": 2}
+
+
+class JobQueue:
+    """
+    Durable job queue in a SQLite (WAL mode) file shared by the API and its
+    worker processes.
+
+    Jobs are claimed atomically, highest priority lane first and oldest
+    first within a lane. A claim is a lease the worker renews with
+    heartbeat() while the job runs; a job whose worker stopped heartbeating
+    for timeout_seconds (the process died) is re-queued, up to
+    max_attempts, and only the current lease holder can finish it.
+    Finished jobs are purged after result_ttl_seconds.
+    """
+
+    def __init__(self, path: str, timeout_seconds: float = 600, max_attempts: int = 2,
+                 result_ttl_seconds: float = 86400):
+        self.path = path
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max_attempts
+        self.result_ttl_seconds = result_ttl_seconds
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, task TEXT NOT NULL, payload TEXT NOT NULL, priority INTEGER NOT NULL, "
+            "status TEXT NOT NULL, result TEXT, error TEXT, callback_url TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "worker TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL, heartbeat_at REAL)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "heartbeat_at" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority, created_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode so claim() can take the write lock explicitly
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, task: str, payload: dict, priority: str = "default", callback_url: str = None) -> str:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'; expected one of {list(PRIORITIES)}")
+        job_id = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO jobs (id, task, payload, priority, status, callback_url, created_at) "
+            "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, task, json.dumps(payload), PRIORITIES[priority], callback_url, time.time()),
+        )
+        return job_id
+
+    def claim(self, worker: str, lanes=None):
+        """Marks the next ready job as running and returns it, or None if the queue is empty."""
+        lanes = [PRIORITIES[lane] for lane in (lanes or PRIORITIES)]
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._recover_stale(conn, now)
+            row = conn.execute(
+                f"SELECT id, task, payload, callback_url, attempts FROM jobs WHERE status = 'queued' "
+                f"AND priority IN ({','.join('?' * len(lanes))}) ORDER BY priority, created_at LIMIT 1",
+                lanes,
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, heartbeat_at = ?, "
+                    "attempts = attempts + 1 WHERE id = ?",
+                    (worker, now, now, row[0]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return {"id": row[0], "task": row[1], "payload": json.loads(row[2]), "callback_url": row[3],
+                "attempt": row[4] + 1}
+
+    def _recover_stale(self, conn, now):
+        # Long jobs keep heartbeating; only jobs whose worker went silent are taken back
+        stale = now - self.timeout_seconds
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Worker lost', finished_at = ? "
+            "WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+            (now, stale, self.max_attempts),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND heartbeat_at < ?",
+            (stale,),
+        )
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """Renews the worker's lease on a running job. False if the lease was lost."""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time(), job_id, worker),
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: str, worker: str, result) -> bool:
+        return self._finish(job_id, worker, "done", result=json.dumps(result))
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        return self._finish(job_id, worker, "failed", error=error)
+
+    def _finish(self, job_id, worker, status, result=None, error=None) -> bool:
+        conn = self._conn()
+        now = time.time()
+        cursor = conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (status, result, error, now, job_id, worker),
+        )
+        conn.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+            (now - self.result_ttl_seconds,),
+        )
+        return cursor.rowcount > 0
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a job that has not started yet."""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        )
+        return cursor.rowcount > 0
+
+    def get(self, job_id: str):
+        row = self._conn().execute(
+            "SELECT id, task, priority, status, result, error, attempts, created_at, started_at, finished_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        lane = next(name for name, value in PRIORITIES.items() if value == row[2])
+        job = {
+            "job_id": row[0], "task": row[1], "priority": lane, "status": row[3],
+            "attempts": row[6], "created_at": row[7], "started_at": row[8], "finished_at": row[9],
+        }
+        if row[3] == "queued":
+            job["position"] = self._conn().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND (priority < ? OR (priority = ? AND created_at < ?))",
+                (row[2], row[2], row[7]),
+            ).fetchone()[0]
+        if row[4] is not None:
+            job["result"] = json.loads(row[4])
+        if row[5] is not None:
+            job["error"] = row[5]
+        return job
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        lanes = {name: {} for name in PRIORITIES}
+        for priority, status, count in conn.execute(
+            "SELECT priority, status, COUNT(*) FROM jobs GROUP BY priority, status"
+        ):
+            lane = next(name for name, value in PRIORITIES.items() if value == priority)
+            lanes[lane][status] = count
+        waits = dict(conn.execute(
+            "SELECT priority, AVG(started_at - created_at) FROM jobs WHERE started_at IS NOT NULL GROUP BY priority"
+        ).fetchall())
+        runs = dict(conn.execute(
+            "SELECT priority, AVG(finished_at - started_at) FROM jobs "
+            "WHERE status IN ('done', 'failed') AND started_at IS NOT NULL GROUP BY priority"
+        ).fetchall())
+        for lane, value in PRIORITIES.items():
+            lanes[lane]["avg_wait_ms"] = round(waits[value] * 1000, 1) if waits.get(value) is not None else None
+            lanes[lane]["avg_run_ms"] = round(runs[value] * 1000, 1) if runs.get(value) is not None else None
+        return {"path": self.path, "lanes": lanes}
@@ -0,0 +1,94 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def process_rss_bytes() -> int:
+    """Current resident set size of this process, or 0 if unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, AttributeError):
+        return 0
+
+
+class ModelRegistry:
+    """
+    Loads models on first use instead of at import time.
+
+    Modules register a zero-argument loader under a name; get() builds the
+    model once (thread-safe) and records its load time and the process RSS
+    growth observed while loading.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._info = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name: str, loader):
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            self._info.setdefault(name, {"loaded": False})
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in self._loaders:
+            raise KeyError(f"No model registered under '{name}'")
+
+        with self._locks[name]:
+            if name not in self._models:
+                logger.info(f"⏳ Loading model '{name}'...")
+                rss_before = process_rss_bytes()
+                start = time.perf_counter()
+                self._models[name] = self._loaders[name]()
+                load_seconds = time.perf_counter() - start
+                rss_delta = max(0, process_rss_bytes() - rss_before)
+                self._info[name] = {
+                    "loaded": True,
+                    "load_seconds": round(load_seconds, 3),
+                    "rss_delta_mb": round(rss_delta / (1024 * 1024), 1),
+                }
+                logger.info(f"✅ Loaded model '{name}' in {load_seconds:.2f}s (+{rss_delta / (1024 * 1024):.0f} MB RSS)")
+        return self._models[name]
+
+    def warm_up(self, names=None):
+        """Loads the given models (all registered models if names is None)."""
+        for name in (names if names is not None else list(self._loaders)):
+            if name not in self._loaders:
+                logger.warning(f"⚠️ Cannot preload unknown model '{name}'")
+                continue
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"❌ Failed to preload model '{name}': {e}")
+
+    def stats(self) -> dict:
+        return {
+            "process_rss_mb": round(process_rss_bytes() / (1024 * 1024), 1),
+            "pid": os.getpid(),
+            "models": {name: dict(self._info[name]) for name in self._loaders},
+        }
+
+
+registry = ModelRegistry()
@@ -0,0 +1,325 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for quota/throttling errors (HTTP 429, google ResourceExhausted)."""
+    text = str(error).lower()
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in text or "quota" in text
+
+
+def is_retryable(error: Exception) -> bool:
+    if is_rate_limited(error):
+        return True
+    return type(error).__name__ in (
+        "ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "GatewayTimeout", "TimeoutError",
+        "ConnectionError",
+    )
+
+
+class TokenBucket:
+    """Classic token bucket: rate tokens per second, holding at most burst tokens."""
+
+    def __init__(self, rate_per_s: float, burst: float):
+        self.rate = rate_per_s
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes one token, going into debt if needed; returns how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def drain(self):
+        """Empties the bucket, e.g. after the upstream reported we are over quota."""
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = time.monotonic()
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            return min(self.burst, self._tokens + (time.monotonic() - self._updated) * self.rate)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit.
+
+    Each success under the latency target grows the limit by 1/limit (about
+    +1 per round of requests); a rate-limit error or a response slower than
+    the target halves it. Callers beyond the current limit wait.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_target_s: float, decrease: float = 0.5):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.latency_target_s = latency_target_s
+        self.decrease = decrease
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self._cond = threading.Condition()
+
+    def _try_enter(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        delay = 0.005
+        while not self._try_enter():
+            await asyncio.sleep(delay)
+            delay = min(0.1, delay * 2)
+
+    def release(self, latency_s: float = None, overloaded: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded or (latency_s is not None and latency_s > self.latency_target_s):
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self.decreases += 1
+            elif latency_s is not None:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self.increases += 1
+            self._cond.notify_all()
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent requests.
+
+    Within a sliding window, retries are allowed while they stay under
+    min_retries + ratio * requests, so a struggling upstream sees a bounded
+    amount of extra load instead of a retry storm.
+    """
+
+    def __init__(self, ratio: float, min_retries: int = 3, window_s: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window_s = window_s
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+        self.exhausted = 0
+
+    def _trim(self, now):
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window_s:
+                events.popleft()
+
+    def record_request(self):
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            if len(self._retries) < self.min_retries + self.ratio * len(self._requests):
+                self._retries.append(now)
+                return True
+            self.exhausted += 1
+            return False
+
+
+class UpstreamLimiter:
+    """
+    Client-side protection for a rate-limited upstream API.
+
+    Every attempt waits for a token-bucket slot (the quota) and an AIMD
+    concurrency slot; retryable failures are retried with exponential
+    backoff and full jitter while the retry budget allows. Rate-limit
+    errors also drain the bucket and halve the concurrency limit, so the
+    sustained rate settles just under what the upstream accepts.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, burst: float, max_retries: int,
+                 backoff_base_s: float, backoff_max_s: float, retry_budget_ratio: float,
+                 min_concurrency: int, max_concurrency: int, latency_target_s: float):
+        self.name = name
+        self.bucket = TokenBucket(requests_per_minute / 60, burst) if requests_per_minute > 0 else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency, min_concurrency, max_concurrency, latency_target_s)
+        self.budget = RetryBudget(retry_budget_ratio)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.total_throttle_seconds = 0.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+
+    def _should_retry(self, error, attempt) -> bool:
+        if is_rate_limited(error):
+            self.rate_limited += 1
+            if self.bucket is not None:
+                self.bucket.drain()
+        if attempt >= self.max_retries or not is_retryable(error) or not self.budget.try_spend():
+            self.failures += 1
+            return False
+        self.retries += 1
+        return True
+
+    def call(self, fn, *args, **kwargs):
+        self.requests += 1
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.total_throttle_seconds += self.bucket.acquire()
+            self.concurrency.acquire()
+            self.attempts += 1
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.concurrency.release(overloaded=is_rate_limited(e))
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"{self.name}: attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled (a lost hedge, a timeout) or interrupted -- free the slot without judging latency
+                self.concurrency.release()
+                raise
+            self.concurrency.release(latency_s=time.perf_counter() - start)
+            return result
+
+    async def call_async(self, coro_fn, *args, **kwargs):
+        self.requests += 1
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.total_throttle_seconds += await self.bucket.acquire_async()
+            await self.concurrency.acquire_async()
+            self.attempts += 1
+            start = time.perf_counter()
+            try:
+                result = await coro_fn(*args, **kwargs)
+            except Exception as e:
+                self.concurrency.release(overloaded=is_rate_limited(e))
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"{self.name}: attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled (a lost hedge, a timeout) or interrupted -- free the slot without judging latency
+                self.concurrency.release()
+                raise
+            self.concurrency.release(latency_s=time.perf_counter() - start)
+            return result
+
+    def stream(self, stream_fn, *args, **kwargs):
+        """Like call() for a generator; retries only if nothing has been yielded yet."""
+        self.requests += 1
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.total_throttle_seconds += self.bucket.acquire()
+            self.concurrency.acquire()
+            self.attempts += 1
+            start = time.perf_counter()
+            started = False
+            try:
+                for item in stream_fn(*args, **kwargs):
+                    if not started:
+                        # Time to first chunk is the latency signal for streams
+                        started = True
+                        first_chunk_s = time.perf_counter() - start
+                    yield item
+            except Exception as e:
+                self.concurrency.release(overloaded=is_rate_limited(e))
+                if started or not self._should_retry(e, attempt):
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"{self.name}: stream attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Consumer stopped early (GeneratorExit) -- free the slot without judging latency
+                self.concurrency.release()
+                raise
+            self.concurrency.release(latency_s=first_chunk_s if started else time.perf_counter() - start)
+            return
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "retry_budget_exhausted": self.budget.exhausted,
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "concurrency_increases": self.concurrency.increases,
+            "concurrency_decreases": self.concurrency.decreases,
+            "tokens_available": round(self.bucket.tokens, 2) if self.bucket is not None else None,
+            "throttle_seconds": round(self.total_throttle_seconds, 3),
+        }
+
+
+# One limiter per upstream quota, shared by every caller in this process
+llm_limiter = UpstreamLimiter(
+    "llm",
+    requests_per_minute=settings.LLM_RATE_LIMIT_RPM,
+    burst=settings.LLM_RATE_LIMIT_BURST,
+    max_retries=settings.LLM_MAX_RETRIES,
+    backoff_base_s=settings.LLM_BACKOFF_BASE_S,
+    backoff_max_s=settings.LLM_BACKOFF_MAX_S,
+    retry_budget_ratio=settings.LLM_RETRY_BUDGET_RATIO,
+    min_concurrency=settings.LLM_MIN_CONCURRENCY,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    latency_target_s=settings.LLM_LATENCY_TARGET_S,
+)
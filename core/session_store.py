@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """
+    Interface for chat session persistence.
+
+    Sessions are plain JSON-serializable dicts (resume text, history,
+    timestamps) -- never live client objects -- so any backend can hold
+    them and any worker process can resume them.
+    """
+
+    def get(self, session_id: str):
+        raise NotImplementedError
+
+    def put(self, session_id: str, session: dict):
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store with TTL expiry and LRU eviction. Not shared across workers."""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()  # session_id -> (last_access, serialized)
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def _expire(self, now):
+        while self._sessions:
+            session_id, (last_access, _) = next(iter(self._sessions.items()))
+            if now - last_access <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+            self.expired += 1
+
+    def get(self, session_id: str):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return json.loads(entry[1])
+
+    def put(self, session_id: str, session: dict):
+        serialized = json.dumps(session, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (now, serialized)
+            self._sessions.move_to_end(session_id)
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire(time.time())
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "bytes": sum(len(serialized) for _, serialized in self._sessions.values()),
+                "evicted": self.evicted,
+                "expired": self.expired,
+            }
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    SQLite (WAL mode) store shared by every worker process on the host,
+    with TTL expiry and LRU eviction by last access time.
+    """
+
+    def __init__(self, path: str, namespace: str = "agent", max_sessions: int = 1000, ttl_seconds: float = 3600):
+        self.path = path
+        self.table = "sessions_" + re.sub(r"\W", "_", namespace)
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(id TEXT PRIMARY KEY, data TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_access ON {self.table} (last_access)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str):
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            f"SELECT data, last_access FROM {self.table} WHERE id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > self.ttl_seconds:
+            self.delete(session_id)
+            return None
+        conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE id = ?", (now, session_id))
+        conn.commit()
+        return json.loads(row[0])
+
+    def put(self, session_id: str, session: dict):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (id, data, last_access) VALUES (?, ?, ?)",
+            (session_id, json.dumps(session, separators=(",", ":")), now),
+        )
+        conn.execute(f"DELETE FROM {self.table} WHERE last_access < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE id IN (SELECT id FROM {self.table} "
+            "ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+        conn.commit()
+
+    def delete(self, session_id: str) -> bool:
+        conn = self._conn()
+        cursor = conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (session_id,))
+        conn.commit()
+        return cursor.rowcount > 0
+
+    def stats(self) -> dict:
+        count, size = self._conn().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM {self.table}"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "sessions": count,
+            "bytes": size,
+        }
+
+
+def create_session_store(namespace: str = "agent") -> SessionStore:
+    """Builds the store selected by SESSION_BACKEND ("memory" or "sqlite")."""
+    if settings.SESSION_BACKEND == "sqlite":
+        return SqliteSessionStore(
+            settings.SESSION_DB_PATH, namespace,
+            max_sessions=settings.SESSION_MAX, ttl_seconds=settings.SESSION_TTL_S,
+        )
+    if settings.SESSION_BACKEND != "memory":
+        logger.warning(f"⚠️ Unknown SESSION_BACKEND '{settings.SESSION_BACKEND}', using memory")
+    return MemorySessionStore(max_sessions=settings.SESSION_MAX, ttl_seconds=settings.SESSION_TTL_S)
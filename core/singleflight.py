@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls.
+
+    While a call for a key is in flight, other callers with the same key
+    wait for it and share its result (or exception) instead of repeating
+    the work. Nothing is cached once the call completes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) once per key among concurrent threads."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key, coro_fn, *args, **kwargs):
+        """Awaits coro_fn(*args, **kwargs) once per key among concurrent tasks."""
+        future = self._async_calls.get(key)
+        if future is not None:
+            self.shared += 1
+            # shield: a cancelled waiter must not cancel the shared call
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(coro_fn(*args, **kwargs))
+        self._async_calls[key] = future
+        future.add_done_callback(lambda _: self._async_calls.pop(key, None))
+        self.executed += 1
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        total = self.executed + self.shared
+        return {
+            "in_flight": len(self._calls) + len(self._async_calls),
+            "executed": self.executed,
+            "shared": self.shared,
+            "dedup_rate": round(self.shared / total, 4) if total else 0.0,
+        }
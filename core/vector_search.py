@@ -0,0 +1,84 @@
+import numpy as np
+
+
+def top_k(scores, k):
+    """Returns indices of the k highest scores, best first.
+
+    Uses argpartition so only the selected k are fully sorted.
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+class IVFIndex:
+    """
+    Inverted-file index over L2-normalized vectors for approximate search.
+
+    Vectors are clustered with spherical k-means; a query is scored only
+    against the rows of its n_probe closest clusters.
+    """
+
+    def __init__(self, centroids, assignments):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.assignments = np.asarray(assignments, dtype=np.int32)
+        self._rebuild_lists()
+
+    @classmethod
+    def train(cls, vectors, n_lists, iterations=10, seed=0):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n_lists = max(1, min(n_lists, vectors.shape[0]))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(vectors.shape[0], n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = vectors[assignments == c]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    if norm > 0:
+                        centroids[c] = centroid / norm
+
+        return cls(centroids, np.argmax(vectors @ centroids.T, axis=1))
+
+    def _rebuild_lists(self):
+        order = np.argsort(self.assignments, kind="stable")
+        bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+
+    def add(self, vectors):
+        """Assigns newly appended rows to their nearest existing cluster."""
+        if len(vectors) == 0:
+            return
+        new_assignments = np.argmax(np.asarray(vectors, dtype=np.float32) @ self.centroids.T, axis=1)
+        self.assignments = np.concatenate([self.assignments, new_assignments.astype(np.int32)])
+        self._rebuild_lists()
+
+    def search(self, matrix, query, k, n_probe=8, mask=None):
+        """Returns (indices, scores) of the approximate top-k rows of matrix.
+
+        mask, if given, is a boolean array marking rows eligible for results.
+        """
+        probe = top_k(self.centroids @ query, n_probe)
+        candidates = np.concatenate([self.lists[c] for c in probe]) if len(probe) else np.zeros(0, dtype=np.int64)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        if len(candidates) == 0:
+            return candidates, np.zeros(0, dtype=np.float32)
+        scores = matrix[candidates] @ query
+        best = top_k(scores, k)
+        return candidates[best], scores[best]
+
+    def save(self, path):
+        np.savez(path, centroids=self.centroids, assignments=self.assignments)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["centroids"], data["assignments"])
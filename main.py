@@ -1,15 +1,37 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from services.parser import extract_text
-from services.matcher import match_resume_job
-from services.qa import answer_question
+from typing import List, Optional
+from services.parser import extract_document
+from services.matcher import match_resume_job, match_resume_job_chunked, score_batch, embedding_cache
+from services.document_store import DocumentStore
+from services.resume_index import get_resume_index
+from services.qa import answer_questions
+from services.analysis import analyze_resume
 from services.gemini_agent import get_agent, ResumeAnalystAgent # Use the new superior agent
+import services.gemini_agent as agent_module
 from core.config import settings
+from core.executor import run_parse, run_inference, run_io, run_llm, stream_llm, executor_stats, shutdown_pools, PoolSaturatedError
+from core.models import registry
+from core.batching import batcher_stats
+from core.singleflight import SingleFlight
+from core.rate_limit import llm_limiter
+from services.llm_router import router_stats
+from services.tools import get_resume_tools, response_cache, tool_flight
+from services.jobs import TASKS, get_job_queue, start_workers, stop_workers, validate_callback_url
+from utils.role_suggester import suggest_roles_from_resume
+from utils.gap_analyzer import analyze_skill_gap
+import asyncio
+import base64
+import logging
+import time
 import uvicorn
 import os
+import json
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Smart Resume Intelligence API")
 
@@ -22,6 +44,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.on_event("startup")
+async def preload_models():
+    """Load the models listed in PRELOAD_MODELS before serving traffic"""
+    names = settings.PRELOAD_MODELS
+    if names:
+        await asyncio.get_running_loop().run_in_executor(
+            None, registry.warm_up, None if names == ["all"] else names
+        )
+
+@app.on_event("startup")
+def start_job_workers():
+    start_workers()
+
+@app.on_event("shutdown")
+def stop_worker_pools():
+    stop_workers()
+    shutdown_pools()
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -35,44 +79,302 @@ class SessionResponse(BaseModel):
     welcome_message: str
     conversation_history: list
 
+document_store = DocumentStore(
+    max_entries=settings.DOCUMENT_CACHE_SIZE,
+    disk_dir=settings.DOCUMENT_CACHE_DIR or None
+)
+
+parse_flight = SingleFlight("parse")
+
+async def load_document(file_bytes: bytes, filename: str) -> dict:
+    """Returns the cached extraction for these bytes, parsing them on a miss"""
+    document_id = document_store.document_id(file_bytes)
+    record = document_store.get(document_id)
+    if record is None:
+        # Concurrent uploads of the same file share a single parse
+        record = await parse_flight.do_async(document_id, _parse_and_store, document_id, file_bytes, filename)
+    return record
+
+async def _parse_and_store(document_id: str, file_bytes: bytes, filename: str) -> dict:
+    extracted = await run_parse(extract_document, file_bytes, filename)
+    record = document_store.put(document_id, filename, extracted["text"], extracted["metadata"])
+    resume_index = get_resume_index()
+    if resume_index is not None:
+        # The embedding lands in the embedding cache too, so matching this resume next is free
+        try:
+            await run_inference(resume_index.add, document_id, filename, record["text"])
+        except PoolSaturatedError:
+            raise
+        except Exception as e:
+            logger.error(f"Indexing {filename} for candidate search failed: {e}")
+    return record
+
+async def resolve_resume_text(resume_file: Optional[UploadFile], document_id: Optional[str]) -> str:
+    """Resume text from either an uploaded file or a previously uploaded document ID"""
+    if document_id:
+        record = document_store.get(document_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Document not found; upload it again via /documents")
+        return record["text"]
+    if resume_file is None:
+        raise HTTPException(status_code=400, detail="Provide either resume_file or document_id")
+    record = await load_document(await resume_file.read(), resume_file.filename)
+    return record["text"]
+
+async def load_resume_tools():
+    """The LLM tools, built on the llm pool: the first call may discover models over the network"""
+    try:
+        return await run_llm(get_resume_tools)
+    except ValueError as e:
+        # Missing API key or unknown provider -- a configuration problem, not a request error
+        raise HTTPException(status_code=503, detail=f"LLM tools are unavailable: {e}")
+
 @app.get("/")
 async def read_root():
     return FileResponse("static/index.html")
 
+# ===== DOCUMENT ENDPOINTS =====
+
+@app.post("/documents")
+async def upload_document(file: UploadFile = File(...)):
+    """Parse a document once and return an ID usable as document_id elsewhere"""
+    file_bytes = await file.read()
+    record = await load_document(file_bytes, file.filename)
+    return {
+        "document_id": record["document_id"],
+        "filename": record["filename"],
+        "characters": len(record["text"]),
+        "metadata": record["metadata"]
+    }
+
+@app.get("/documents/{document_id}")
+async def get_document(document_id: str):
+    """Get the extracted text of an uploaded document"""
+    record = document_store.get(document_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return record
+
+def _delete_document(document_id: str) -> bool:
+    resume_index = get_resume_index()
+    unindexed = resume_index is not None and resume_index.delete(document_id)
+    return document_store.delete(document_id) or unindexed
+
+@app.delete("/documents/{document_id}")
+async def delete_document(document_id: str):
+    """Remove a document from the cache and the candidate index"""
+    # Index deletes take a cross-process file lock and write to disk: keep them off the event loop
+    if not await run_io(_delete_document, document_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"message": "Document deleted successfully"}
+
+# ===== MATCHING & QA ENDPOINTS =====
+
 @app.post("/match")
 async def match_resume(
-    resume_file: UploadFile = File(...),
-    job_description: str = Form(...)
+    resume_file: Optional[UploadFile] = File(None),
+    job_description: str = Form(...),
+    document_id: Optional[str] = Form(None),
+    scoring: Optional[str] = Form(None)
+):
+    """Match score; "chunked" scoring also returns per-section scores"""
+    scoring = scoring or settings.MATCH_SCORING
+    if scoring not in ("chunked", "document"):
+        raise HTTPException(status_code=400, detail="scoring must be 'chunked' or 'document'")
+    resume_text = await resolve_resume_text(resume_file, document_id)
+    if scoring == "chunked":
+        result = await run_inference(match_resume_job_chunked, resume_text, job_description)
+        return {"scoring": scoring, **result}
+    match_score = await run_inference(match_resume_job, resume_text, job_description)
+    return {"scoring": scoring, "match_score": match_score}
+
+@app.post("/match/batch")
+async def match_resume_batch(
+    resume_files: List[UploadFile] = File([]),
+    job_descriptions: List[str] = Form(...),
+    document_ids: List[str] = Form([]),
+    scoring: Optional[str] = Form(None)
+):
+    """Score N resumes against M job descriptions in a single pass (same scoring as /match)"""
+    scoring = scoring or settings.MATCH_SCORING
+    if scoring not in ("chunked", "document"):
+        raise HTTPException(status_code=400, detail="scoring must be 'chunked' or 'document'")
+    contents = [await resume_file.read() for resume_file in resume_files]
+    uploaded = await asyncio.gather(*[
+        load_document(text, resume_file.filename)
+        for text, resume_file in zip(contents, resume_files)
+    ])
+    referenced = [document_store.get(document_id) for document_id in document_ids]
+    if any(record is None for record in referenced):
+        raise HTTPException(status_code=404, detail="Document not found; upload it again via /documents")
+    records = list(uploaded) + referenced
+    if not records:
+        raise HTTPException(status_code=400, detail="Provide resume_files and/or document_ids")
+
+    scores = await run_inference(score_batch, [r["text"] for r in records], job_descriptions, scoring)
+    return {
+        "scoring": scoring,
+        "resumes": [r["filename"] for r in records],
+        "document_ids": [r["document_id"] for r in records],
+        "match_scores": scores
+    }
+
+@app.post("/analyze")
+async def analyze(
+    resume_file: Optional[UploadFile] = File(None),
+    job_description: str = Form(...),
+    document_id: Optional[str] = Form(None),
+    questions: List[str] = Form([]),
+    top_k: int = Form(5),
+    use_llm: bool = Form(True),
+    use_cache: bool = Form(True)
 ):
-    text = await resume_file.read()
-    resume_text = extract_text(text, resume_file.filename)
-    match_score = match_resume_job(resume_text, job_description)
-    return {"match_score": match_score}
+    """Match, skill gap, roles, Q&A and one combined LLM review from a single parse"""
+    start = time.perf_counter()
+    resume_text = await resolve_resume_text(resume_file, document_id)
+    parse_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    report = await analyze_resume(
+        resume_text, job_description, [q for q in questions if q.strip()],
+        top_k_roles=top_k, use_llm=use_llm, use_cache=use_cache
+    )
+    report["timings_ms"] = {
+        "parse": parse_ms,
+        **report["timings_ms"],
+        "total": round((time.perf_counter() - start) * 1000, 1)
+    }
+    return report
+
+@app.post("/candidates/search")
+async def search_candidates(
+    job_description: str = Form(...),
+    top_k: int = Form(10),
+    approximate: bool = Form(False)
+):
+    """Find the indexed resumes that best match a job description"""
+    resume_index = get_resume_index()
+    if resume_index is None:
+        raise HTTPException(status_code=503, detail="Resume index is disabled (set RESUME_INDEX_DIR)")
+    candidates = await run_inference(resume_index.search_text, job_description, top_k, approximate)
+    return {"candidates": candidates, "indexed_resumes": len(resume_index)}
 
 @app.post("/qa")
 async def qa_from_resume(
-    resume_file: UploadFile = File(...),
-    question: str = Form(...)
+    resume_file: Optional[UploadFile] = File(None),
+    question: Optional[str] = Form(None),
+    questions: List[str] = Form([]),
+    document_id: Optional[str] = Form(None)
+):
+    """Answer one question, or a batch of questions, about a resume"""
+    all_questions = ([question] if question else []) + [q for q in questions if q.strip()]
+    if not all_questions:
+        raise HTTPException(status_code=400, detail="Provide question or questions")
+    resume_text = await resolve_resume_text(resume_file, document_id)
+    answers = await run_inference(answer_questions, resume_text, all_questions)
+    return {"answer": answers[0]["answer"], "answers": answers}
+
+# ===== JOB QUEUE ENDPOINTS =====
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    task: str = Form(...),
+    payload: str = Form("{}"),
+    files: List[UploadFile] = File([]),
+    callback_url: Optional[str] = Form(None)
 ):
-    text = await resume_file.read()
-    resume_text = extract_text(text, resume_file.filename)
-    answer = answer_question(resume_text, question)
-    return {"answer": answer}
+    """Queue a slow task and return its job ID immediately; poll GET /jobs/{job_id} or pass a callback_url"""
+    job_queue = get_job_queue()
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Job queue is disabled (set JOB_QUEUE_PATH)")
+    if task not in TASKS:
+        raise HTTPException(status_code=400, detail=f"task must be one of {list(TASKS)}")
+    if task == "chat" and settings.SESSION_BACKEND != "sqlite":
+        raise HTTPException(status_code=400, detail="Queued chat needs SESSION_BACKEND=sqlite so workers can see sessions")
+    # The lane comes from the task, never from the client
+    priority = TASKS[task][1]
+    try:
+        job_payload = json.loads(payload)
+        if callback_url:
+            validate_callback_url(callback_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not isinstance(job_payload, dict):
+        raise HTTPException(status_code=400, detail="payload must be a JSON object")
+    if files:
+        job_payload["files"] = [
+            {"filename": f.filename, "content": base64.b64encode(await f.read()).decode("ascii")} for f in files
+        ]
+
+    job_id = job_queue.submit(task, job_payload, priority, callback_url)
+    return {"job_id": job_id, "status": "queued", "priority": priority, "status_url": f"/jobs/{job_id}"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, queue position while queued, and the result or error once finished"""
+    job_queue = get_job_queue()
+    job = job_queue.get(job_id) if job_queue else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a job that has not started yet"""
+    job_queue = get_job_queue()
+    job = job_queue.get(job_id) if job_queue else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+    return {"message": "Job cancelled successfully"}
+
+@app.get("/health")
+async def health():
+    """Liveness plus per-model load state, load time and memory"""
+    return {"status": "ok", **registry.stats()}
+
+@app.post("/health/warmup")
+async def warm_up_models(models: str = Form("")):
+    """Load models now (comma-separated names, or all registered models if empty)"""
+    names = [m.strip() for m in models.split(",") if m.strip()] or None
+    await run_inference(registry.warm_up, names)
+    return registry.stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Runtime counters for caches and other performance internals"""
+    resume_index = get_resume_index()
+    job_queue = get_job_queue()
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "document_cache": document_store.stats(),
+        "resume_index": resume_index.stats() if resume_index else None,
+        "tool_cache": response_cache.stats(),
+        "single_flight": {"tools": tool_flight.stats(), "parse": parse_flight.stats()},
+        "pools": executor_stats(),
+        "llm_limiter": llm_limiter.stats(),
+        "llm_router": router_stats(),
+        "batching": batcher_stats(),
+        "jobs": job_queue.stats() if job_queue else None,
+        "sessions": agent_module.agent.session_stats() if agent_module.agent else None
+    }
 
 # ===== CHATBOT ENDPOINTS =====
 
 @app.post("/chatbot/session")
-async def create_chat_session(resume_file: UploadFile = File(...)):
+async def create_chat_session(
+    resume_file: Optional[UploadFile] = File(None),
+    document_id: Optional[str] = Form(None)
+):
     """Create a new chatbot session with resume context"""
     try:
-        text = await resume_file.read()
-        resume_text = extract_text(text, resume_file.filename)
+        resume_text = await resolve_resume_text(resume_file, document_id)
         
         # Get the initialized agent
-        agent = get_agent()
+        agent = await run_llm(get_agent)
         
         # Create dedicated session
-        session_id, welcome_msg, initial_suggestions = agent.create_session(resume_text)
+        session_id, welcome_msg, initial_suggestions = await run_llm(agent.create_session, resume_text)
         conversation_history = agent.get_history(session_id)
         
         return {
@@ -81,6 +383,8 @@ async def create_chat_session(resume_file: UploadFile = File(...)):
             "suggestions": initial_suggestions,
             "message": "Session created successfully"
         }
+    except HTTPException:
+        raise
     except ValueError as ve:
         raise HTTPException(status_code=500, detail=str(ve)) # API Key missing
     except Exception as e:
@@ -90,8 +394,8 @@ async def create_chat_session(resume_file: UploadFile = File(...)):
 async def send_chat_message(chat_message: ChatMessage):
     """Send a message to the chatbot and get AI response"""
     try:
-        agent = get_agent()
-        response = agent.chat(chat_message.session_id, chat_message.message)
+        agent = await run_llm(get_agent)
+        response = await run_llm(agent.chat_async, chat_message.session_id, chat_message.message)
         
         if not response.get("valid", False):
              # Try to provide a more specific error if available
@@ -100,6 +404,7 @@ async def send_chat_message(chat_message: ChatMessage):
         return {
             "answer": response["answer"],
             "suggestions": response.get("suggestions", []),
+            "prompt_tokens": response.get("prompt_tokens"),
             "session_valid": True,
             "conversation_history": agent.get_history(chat_message.session_id)
         }
@@ -108,13 +413,34 @@ async def send_chat_message(chat_message: ChatMessage):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
+@app.post("/chatbot/message/stream")
+async def stream_chat_message(chat_message: ChatMessage):
+    """Send a message and stream the AI response back as Server-Sent Events"""
+    agent = await run_llm(get_agent)
+    if not agent.get_history(chat_message.session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    async def event_stream():
+        # Streams hold an llm pool slot like any other LLM call, for as long as they run
+        try:
+            async for event in stream_llm(agent.chat_stream, chat_message.session_id, chat_message.message):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except PoolSaturatedError as e:
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'error': str(e), 'valid': True})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/chatbot/session/general")
 async def create_general_session():
     """Start a general career advice session without a resume"""
     try:
-        agent = get_agent()
+        agent = await run_llm(get_agent)
         # Pass None as resume_text to trigger General Advisor mode
-        session_id, welcome_msg, initial_suggestions = agent.create_session(resume_text=None)
+        session_id, welcome_msg, initial_suggestions = await run_llm(agent.create_session, resume_text=None)
         
         # Initialize empty history
         conversation_history = agent.get_history(session_id)
@@ -157,33 +483,57 @@ async def get_session_info(session_id: str):
         "session_id": session_id,
         "message_count": len(history),
         "has_resume": True,
-        "agent_type": "Google Gemini High-Quality Agent"
+        "agent_type": {
+            "gemini": "Google Gemini High-Quality Agent",
+            "router": "Multi-model routed agent",
+        }.get(agent.provider.name, "Local simulated agent"),
+        "model": agent.model_name
     }
 
 # ===== TOOL ENDPOINTS =====
-from services.tools import resume_tools
-
 @app.post("/tools/rewrite")
-async def rewrite_section(text: str = Form(...), keywords: str = Form(...)):
+async def rewrite_section(text: str = Form(...), keywords: str = Form(...), use_cache: bool = Form(True)):
     """Rewrite a resume section to include keywords"""
     keyword_list = [k.strip() for k in keywords.split(',')]
-    rewritten = resume_tools.rewrite_section(text, keyword_list)
+    tools = await load_resume_tools()
+    rewritten = await run_llm(tools.rewrite_section_async, text, keyword_list, use_cache=use_cache)
     return {"rewritten_text": rewritten}
 
 @app.post("/tools/suggest_roles")
-async def suggest_roles(resume_file: UploadFile = File(...)):
-    """Suggest roles based on resume"""
-    text = await resume_file.read()
-    resume_text = extract_text(text, resume_file.filename)
-    roles = resume_tools.suggest_roles(resume_text)
+async def suggest_roles(
+    resume_file: Optional[UploadFile] = File(None),
+    document_id: Optional[str] = Form(None),
+    mode: str = Form("llm"),
+    top_k: int = Form(5),
+    approximate: bool = Form(False),
+    use_cache: bool = Form(True)
+):
+    """Suggest roles based on resume (mode=local searches the role index without an LLM)"""
+    resume_text = await resolve_resume_text(resume_file, document_id)
+    if mode == "local":
+        matches = await run_inference(suggest_roles_from_resume, resume_text, top_k=top_k, approximate=approximate)
+        return {
+            "suggested_roles": [role for role, _ in matches],
+            "scores": [score for _, score in matches]
+        }
+    tools = await load_resume_tools()
+    roles = await run_llm(tools.suggest_roles_async, resume_text, use_cache=use_cache)
     return {"suggested_roles": roles}
 
 @app.post("/tools/analyze_gap")
-async def analyze_gap(resume_file: UploadFile = File(...), job_description: str = Form(...)):
-    """Analyze gaps between resume and job description"""
-    text = await resume_file.read()
-    resume_text = extract_text(text, resume_file.filename)
-    gap_analysis = resume_tools.analyze_gap(resume_text, job_description)
+async def analyze_gap(
+    resume_file: Optional[UploadFile] = File(None),
+    job_description: str = Form(...),
+    document_id: Optional[str] = Form(None),
+    mode: str = Form("llm"),
+    use_cache: bool = Form(True)
+):
+    """Analyze gaps between resume and job description (mode=local uses the skills gazetteer, no LLM)"""
+    resume_text = await resolve_resume_text(resume_file, document_id)
+    if mode == "local":
+        return await run_inference(analyze_skill_gap, resume_text, job_description)
+    tools = await load_resume_tools()
+    gap_analysis = await run_llm(tools.analyze_gap_async, resume_text, job_description, use_cache=use_cache)
     return gap_analysis
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+"""
+Bulk candidate ranking.
+
+Scores a folder (or .zip) of PDF/DOCX/image resumes against one or more job
+descriptions and streams results to a JSONL file; re-running with the same
+output file resumes where an interrupted run stopped.
+
+    python rank_resumes.py resumes/ --job backend.txt --job data.txt \\
+        --output scores.jsonl --csv ranked.csv
+"""
+import argparse
+import os
+
+from services.ranking import rank_resumes, write_ranked_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank resumes against job descriptions")
+    parser.add_argument("resumes", help="Directory or .zip archive of resumes")
+    parser.add_argument("--job", action="append", required=True,
+                        help="Job description text file (repeat for several jobs)")
+    parser.add_argument("--output", default="scores.jsonl", help="JSONL results file (appended, resumable)")
+    parser.add_argument("--csv", help="Also write a ranked CSV here when done")
+    parser.add_argument("--rank-by", help="Job name to rank the CSV by (default: each resume's best score)")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Resumes embedded per batch")
+    parser.add_argument("--scoring", choices=("chunked", "document"),
+                        help="Match scoring (default: MATCH_SCORING, same as /match)")
+    args = parser.parse_args()
+
+    jobs = {}
+    for path in args.job:
+        with open(path, encoding="utf-8") as f:
+            jobs[os.path.splitext(os.path.basename(path))[0]] = f.read()
+
+    summary = rank_resumes(args.resumes, jobs, args.output, workers=args.workers, batch_size=args.batch_size,
+                           scoring=args.scoring)
+    print(f"✅ Scored {summary['scored']} resumes ({summary['failed']} failed, {summary['skipped']} skipped) "
+          f"in {summary['seconds']}s — {summary['docs_per_sec']} docs/sec")
+
+    if args.csv:
+        count = write_ranked_csv(args.output, args.csv, args.rank_by)
+        print(f"📄 Wrote {count} ranked rows to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
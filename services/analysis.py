@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import time
+
+from core.executor import run_inference, run_llm, PoolSaturatedError
+from services.matcher import match_resume_job_chunked
+from services.qa import answer_questions
+from services.tools import get_resume_tools
+from utils.gap_analyzer import analyze_skill_gap
+from utils.role_suggester import suggest_roles_from_resume
+from utils.skill_extractor import extract_skills
+
+logger = logging.getLogger(__name__)
+
+
+def _skills_stage(resume_text, job_description):
+    resume_skills = extract_skills(resume_text)
+    gap = analyze_skill_gap(resume_text, job_description, resume_skills)
+    return {"resume_skills": resume_skills, **gap}
+
+
+def _roles_stage(resume_text, top_k):
+    return [{"role": role, "score": score} for role, score in suggest_roles_from_resume(resume_text, top_k=top_k)]
+
+
+async def analyze_resume(resume_text: str, job_description: str, questions=(), top_k_roles: int = 5,
+                         use_llm: bool = True, use_cache: bool = True) -> dict:
+    """
+    Runs every analysis stage for one resume/JD pair concurrently.
+
+    Matching, skill gap, role suggestion and QA all run locally on the
+    inference pool; the only LLM call is one combined review prompt, issued
+    alongside them. A failing stage reports {"error": ...} in place of its
+    result so the rest of the report is still returned.
+    """
+    timings = {}
+
+    async def stage(name, make_awaitable):
+        start = time.perf_counter()
+        try:
+            return await make_awaitable()
+        except PoolSaturatedError:
+            raise
+        except Exception as e:
+            logger.error(f"Analysis stage '{name}' failed: {e}")
+            return {"error": str(e)}
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    stages = {
+        "match": lambda: run_inference(match_resume_job_chunked, resume_text, job_description),
+        "skills": lambda: run_inference(_skills_stage, resume_text, job_description),
+        "roles": lambda: run_inference(_roles_stage, resume_text, top_k_roles),
+    }
+    if questions:
+        stages["qa"] = lambda: run_inference(answer_questions, resume_text, list(questions))
+    if use_llm:
+        async def llm_review():
+            # Built on the llm pool: the first call may discover models over the network
+            tools = await run_llm(get_resume_tools)
+            return await run_llm(tools.review_async, resume_text, job_description, use_cache=use_cache)
+
+        stages["llm_review"] = llm_review
+
+    results = await asyncio.gather(*[stage(name, fn) for name, fn in stages.items()])
+    report = dict(zip(stages, results))
+    return {
+        "match": report["match"],
+        "skills": report["skills"],
+        "suggested_roles": report["roles"],
+        "answers": report.get("qa", []),
+        "llm_review": report.get("llm_review"),
+        "timings_ms": timings,
+    }
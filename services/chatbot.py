@@ -1,6 +1,8 @@
-from transformers import pipeline
 import google.generativeai as genai
 from core.config import settings
+from core.models import registry
+from core.session_store import create_session_store
+import services.qa  # registers the shared "qa" model
 from typing import List, Dict, Optional
 import uuid
 import logging
@@ -31,54 +33,57 @@ class ConversationalChatbot:
         if not self.use_gemini:
             logger.info("🔄 Falling back to local transformers model")
             try:
-                self.qa_pipeline = pipeline(
-                    "question-answering", 
-                    model="distilbert-base-uncased-distilled-squad"
-                )
+                self.qa_pipeline = registry.get("qa")
             except Exception as e:
                 logger.error(f"❌ Failed to load local model: {e}")
                 self.qa_pipeline = None
 
-        # Session storage: {session_id: {resume_text, conversation_history, gemini_chat, metadata}}
-        self.sessions = {}
+        # Session storage: {session_id: {resume_text, conversation_history, metadata}}
+        self.sessions = create_session_store("chatbot")
+
+    def _start_gemini_chat(self, resume_text: str, conversation_history: List[Dict]):
+        """Rebuild a Gemini chat from the resume and the stored conversation"""
+        history = [
+            {
+                "role": "user",
+                "parts": [f"You are a helpful HR assistant. Here is the resume context you need to answer questions about:\n\n{resume_text}\n\nPlease answer questions based ONLY on this resume. If information is missing, say so politely."]
+            },
+            {
+                "role": "model",
+                "parts": ["Understood. I have analyzed the resume and I am ready to answer questions about it."]
+            }
+        ]
+        # Skip the welcome message; it was generated outside the Q&A flow
+        for message in conversation_history[1:]:
+            role = "model" if message["role"] == "assistant" else "user"
+            history.append({"role": role, "parts": [message["content"]]})
+        try:
+            return self.gemini_model.start_chat(history=history)
+        except Exception as e:
+            logger.error(f"Error starting Gemini chat: {e}")
+            return None
         
     def create_session(self, resume_text: str) -> str:
         """Create a new chat session with resume context"""
         session_id = str(uuid.uuid4())
         
-        gemini_chat = None
-        if self.use_gemini:
-            try:
-                # Start a new chat session with system instruction
-                gemini_chat = self.gemini_model.start_chat(history=[
-                    {
-                        "role": "user",
-                        "parts": [f"You are a helpful HR assistant. Here is the resume context you need to answer questions about:\n\n{resume_text}\n\nPlease answer questions based ONLY on this resume. If information is missing, say so politely."]
-                    },
-                    {
-                        "role": "model",
-                        "parts": ["Understood. I have analyzed the resume and I am ready to answer questions about it."]
-                    }
-                ])
-            except Exception as e:
-                logger.error(f"Error starting Gemini chat: {e}")
-                gemini_chat = None
+        gemini_chat = self._start_gemini_chat(resume_text, []) if self.use_gemini else None
 
-        self.sessions[session_id] = {
+        session = {
             "resume_text": resume_text,
             "conversation_history": [],
-            "gemini_chat": gemini_chat,
             "created_at": datetime.now().isoformat(),
             "last_activity": datetime.now().isoformat()
         }
         
         # Add welcome message
         welcome_msg = self._generate_welcome_message(resume_text, gemini_chat)
-        self.sessions[session_id]["conversation_history"].append({
+        session["conversation_history"].append({
             "role": "assistant",
             "content": welcome_msg,
             "timestamp": datetime.now().isoformat()
         })
+        self.sessions.put(session_id, session)
         
         return session_id
     
@@ -108,10 +113,14 @@ class ConversationalChatbot:
     
     def chat(self, session_id: str, user_message: str) -> Dict:
         """Process user message and generate AI response"""
-        if session_id not in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             return {"error": "Session not found", "session_valid": False}
         
-        session = self.sessions[session_id]
+        # Rebuild the Gemini chat before this turn is added to the history
+        gemini_chat = None
+        if self.use_gemini:
+            gemini_chat = self._start_gemini_chat(session["resume_text"], session["conversation_history"])
         
         # Update history
         session["conversation_history"].append({
@@ -121,8 +130,8 @@ class ConversationalChatbot:
         })
         
         # Generate response
-        if self.use_gemini and session.get("gemini_chat"):
-            response_data = self._chat_with_gemini(session["gemini_chat"], user_message)
+        if self.use_gemini and gemini_chat:
+            response_data = self._chat_with_gemini(gemini_chat, user_message)
         else:
             response_data = self._chat_local(user_message, session["resume_text"], session["conversation_history"])
         
@@ -134,6 +143,7 @@ class ConversationalChatbot:
             "confidence": response_data.get("confidence", 1.0)
         })
         session["last_activity"] = datetime.now().isoformat()
+        self.sessions.put(session_id, session)
         
         return {
             "answer": response_data["answer"],
@@ -205,24 +215,30 @@ class ConversationalChatbot:
         return ["Tell me about projects", "What are the strengths?", "Contact info?"]
 
     def get_conversation_history(self, session_id: str) -> List[Dict]:
-        return self.sessions.get(session_id, {}).get("conversation_history", [])
+        session = self.sessions.get(session_id)
+        return session["conversation_history"] if session else []
     
     def clear_session(self, session_id: str) -> bool:
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-            return True
-        return False
+        return self.sessions.delete(session_id)
     
     def get_session_info(self, session_id: str) -> Dict:
-        if session_id in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is not None:
             return {
                 "session_id": session_id,
-                "created_at": self.sessions[session_id]["created_at"],
-                "last_activity": self.sessions[session_id]["last_activity"],
-                "message_count": len(self.sessions[session_id]["conversation_history"]),
+                "created_at": session["created_at"],
+                "last_activity": session["last_activity"],
+                "message_count": len(session["conversation_history"]),
                 "has_resume": True,
                 "model": "Gemini 1.5 Flash" if self.use_gemini else "DistilBERT"
             }
         return None
 
-chatbot = ConversationalChatbot()
+# Built on first use so importing this module doesn't load any model
+chatbot = None
+
+def get_chatbot():
+    global chatbot
+    if chatbot is None:
+        chatbot = ConversationalChatbot()
+    return chatbot
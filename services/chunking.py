@@ -0,0 +1,70 @@
+import re
+
+
+def chunk_text(text: str, chunk_words: int = 120, overlap_words: int = 30):
+    """Splits text into overlapping word windows (the last window may be shorter)."""
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, chunk_words - overlap_words)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+# Heading keyword -> section name. A short line consisting of one of these,
+# optionally qualified ("Work Experience", "Skills & Tools"), starts a section.
+SECTION_HEADINGS = {
+    "summary": "summary", "profile": "summary", "objective": "summary", "about me": "summary",
+    "experience": "experience", "employment": "experience", "work history": "experience",
+    "education": "education", "academic": "education", "qualifications": "education",
+    "skills": "skills", "technical skills": "skills", "competencies": "skills", "technologies": "skills",
+    "projects": "projects",
+    "certifications": "certifications", "certificates": "certifications", "licenses": "certifications",
+    "awards": "achievements", "achievements": "achievements", "honors": "achievements",
+    "publications": "publications",
+    "languages": "languages",
+    "volunteer": "other", "interests": "other", "hobbies": "other",
+}
+
+_HEADING_RE = re.compile(
+    r"^(?:work|professional|relevant|key|core|technical|academic)?\s*("
+    + "|".join(sorted(map(re.escape, SECTION_HEADINGS), key=len, reverse=True))
+    + r")(?:\s*(?:&|and|/)\s*[a-z ]{1,20}|\s+(?:history|summary|details|section))?\s*:?$",
+    re.IGNORECASE,
+)
+
+
+def split_sections(text: str):
+    """
+    Splits a resume into [(section, text), ...] on common heading lines.
+
+    Text before the first recognized heading is returned as "header"; a
+    document with no headings comes back as a single "header" section.
+    """
+    sections = []
+    name, lines = "header", []
+    for line in text.splitlines():
+        stripped = line.strip().strip("#*•-–— ").strip()
+        match = _HEADING_RE.match(stripped) if 0 < len(stripped) <= 40 else None
+        if match:
+            if any(l.strip() for l in lines):
+                sections.append((name, "\n".join(lines)))
+            name, lines = SECTION_HEADINGS[match.group(1).lower()], []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((name, "\n".join(lines)))
+    return sections
+
+
+def chunk_sections(text: str, chunk_words: int = 120, overlap_words: int = 30):
+    """Returns [(section, chunk), ...]; chunks never straddle a section boundary."""
+    return [
+        (name, chunk)
+        for name, section_text in split_sections(text)
+        for chunk in chunk_text(section_text, chunk_words, overlap_words)
+    ]
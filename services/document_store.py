@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentStore:
+    """
+    Cache of extracted document text keyed by a hash of the file bytes.
+
+    The document ID doubles as a handle clients can pass to other endpoints
+    instead of re-uploading the file. A bounded in-memory LRU sits in front
+    of an optional directory of JSON records that survives restarts.
+    """
+
+    def __init__(self, max_entries: int = 256, disk_dir: str = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def document_id(file_bytes: bytes) -> str:
+        return hashlib.sha256(file_bytes).hexdigest()
+
+    def _disk_path(self, document_id: str) -> str:
+        return os.path.join(self.disk_dir, f"{document_id}.json")
+
+    def get(self, document_id: str):
+        """Returns the stored record ({"text", "filename", ...}) or None."""
+        with self._lock:
+            record = self._memory.get(document_id)
+            if record is not None:
+                self._memory.move_to_end(document_id)
+                self.memory_hits += 1
+                return record
+
+        if self.disk_dir and len(document_id) == 64 and document_id.isalnum():
+            try:
+                with open(self._disk_path(document_id), encoding="utf-8") as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                record = None
+            if record is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(document_id, record)
+                return record
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, document_id: str, filename: str, text: str, metadata: dict = None) -> dict:
+        record = {
+            "document_id": document_id,
+            "filename": filename,
+            "text": text,
+            "metadata": metadata or {},
+            "created_at": datetime.now().isoformat(),
+        }
+        with self._lock:
+            self._remember(document_id, record)
+        if self.disk_dir:
+            try:
+                tmp_path = self._disk_path(document_id) + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(record, f)
+                os.replace(tmp_path, self._disk_path(document_id))
+            except OSError as e:
+                logger.error(f"Document cache disk write failed: {e}")
+        return record
+
+    def delete(self, document_id: str) -> bool:
+        # Same check as get(): the ID becomes a file name, so reject anything else
+        if not (len(document_id) == 64 and document_id.isalnum()):
+            return False
+        with self._lock:
+            removed = self._memory.pop(document_id, None) is not None
+        if self.disk_dir and os.path.exists(self._disk_path(document_id)):
+            os.remove(self._disk_path(document_id))
+            removed = True
+        return removed
+
+    def _remember(self, document_id, record):
+        self._memory[document_id] = record
+        self._memory.move_to_end(document_id)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
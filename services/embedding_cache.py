@@ -0,0 +1,236 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from core.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of text embeddings.
+
+    Entries are keyed by a hash of (model name, normalized text). A bounded
+    in-memory LRU sits in front of an optional on-disk tier: a memory-mapped
+    float32 matrix plus an append-only index, so vectors survive restarts.
+    Concurrent misses for the same text are encoded once and shared.
+    Processes sharing disk_dir append under a file lock and pick up each
+    other's vectors.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 10000, disk_dir: str = None):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> Event set once its vector is stored
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.encode_seconds = 0.0
+        self.encoded_texts = 0
+
+        self._disk_dir = None
+        self._disk_index = {}
+        self._disk_dim = None
+        self._disk_rows = 0
+        self._disk_view = None
+        if disk_dir:
+            self._open_disk(disk_dir)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def key(self, text: str) -> str:
+        payload = f"{self.model_name}\0{self.normalize(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def encode(self, texts, encode_fn):
+        """Returns one embedding row per text, calling encode_fn only for misses.
+
+        encode_fn takes a list of texts and returns a 2-D float array.
+        """
+        keys = [self.key(text) for text in texts]
+        found = {}
+        with self._lock:
+            if self._disk_dir:
+                self._sync_disk()
+            for key in keys:
+                if key not in found:
+                    vector = self._lookup(key)
+                    if vector is not None:
+                        found[key] = vector
+
+            # Texts another caller is already encoding are waited on, not re-encoded
+            missing = {}
+            waiting = {}
+            for text, key in zip(texts, keys):
+                if key in found or key in missing or key in waiting:
+                    continue
+                if key in self._in_flight:
+                    waiting[key] = (text, self._in_flight[key])
+                else:
+                    self._in_flight[key] = threading.Event()
+                    missing[key] = text
+
+        if missing:
+            try:
+                start = time.perf_counter()
+                vectors = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.misses += len(missing)
+                    self.encode_seconds += elapsed
+                    self.encoded_texts += len(missing)
+                    self._store(list(missing.keys()), vectors)
+                found.update(zip(missing.keys(), vectors))
+            finally:
+                with self._lock:
+                    for key in missing:
+                        self._in_flight.pop(key).set()
+
+        for key, (text, event) in waiting.items():
+            event.wait()
+            with self._lock:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self.coalesced += 1
+            if vector is None:
+                # The other caller failed (or the entry was already evicted)
+                vector = np.asarray(encode_fn([text]), dtype=np.float32)[0]
+                with self._lock:
+                    self._store([key], vector[None, :])
+            found[key] = vector
+
+        return np.stack([found[key] for key in keys])
+
+    def _lookup(self, key):
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector
+
+        row = self._disk_index.get(key)
+        if row is not None:
+            vector = np.array(self._disk_matrix()[row])
+            self._remember(key, vector)
+            self.disk_hits += 1
+            return vector
+        return None
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _store(self, keys, vectors):
+        for key, vector in zip(keys, vectors):
+            self._remember(key, vector)
+        if self._disk_dir:
+            self._append_to_disk(keys, vectors)
+
+    # ----- on-disk tier -----
+
+    def _open_disk(self, disk_dir):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.model_name)
+        self._disk_dir = os.path.join(disk_dir, slug)
+        os.makedirs(self._disk_dir, exist_ok=True)
+        self._vectors_path = os.path.join(self._disk_dir, "vectors.f32")
+        self._index_path = os.path.join(self._disk_dir, "index.jsonl")
+        self._meta_path = os.path.join(self._disk_dir, "meta.json")
+        self._lock_path = os.path.join(self._disk_dir, "write.lock")
+        self._index_offset = 0  # bytes of index.jsonl already read
+        self._sync_disk()
+        if self._disk_index:
+            logger.info(f"Embedding cache loaded {len(self._disk_index)} vectors from {self._disk_dir}")
+
+    def _sync_disk(self):
+        """Picks up vectors appended to the disk tier (by any process) since the last sync."""
+        if self._disk_dim is None:
+            if not os.path.exists(self._meta_path):
+                return
+            with open(self._meta_path) as f:
+                self._disk_dim = json.load(f)["dim"]
+
+        # The index is read before sizing the vectors file: vectors are
+        # written first, so every complete index line points at a stored row.
+        # Rows whose vector bytes never made it to disk (crash mid-append)
+        # are ignored rather than trusted.
+        entries = b""
+        if os.path.exists(self._index_path) and os.path.getsize(self._index_path) > self._index_offset:
+            with open(self._index_path, "rb") as f:
+                f.seek(self._index_offset)
+                data = f.read()
+            complete = data.rfind(b"\n") + 1  # a writer may be mid-line
+            self._index_offset += complete
+            entries = data[:complete]
+
+        row_bytes = self._disk_dim * 4
+        self._disk_rows = os.path.getsize(self._vectors_path) // row_bytes if os.path.exists(self._vectors_path) else 0
+        for line in entries.splitlines():
+            try:
+                key, row = json.loads(line)
+            except ValueError:
+                continue
+            if row < self._disk_rows:
+                self._disk_index[key] = row
+
+    def _disk_matrix(self):
+        if self._disk_view is None or self._disk_view.shape[0] < self._disk_rows:
+            self._disk_view = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r",
+                shape=(self._disk_rows, self._disk_dim),
+            )
+        return self._disk_view
+
+    def _append_to_disk(self, keys, vectors):
+        try:
+            with file_lock(self._lock_path):
+                # Rows are numbered from the file itself, never from this process's own count
+                self._sync_disk()
+                fresh = [i for i, key in enumerate(keys) if key not in self._disk_index]
+                if not fresh:
+                    return
+                if self._disk_dim is None:
+                    self._disk_dim = int(vectors.shape[1])
+                    with open(self._meta_path, "w") as f:
+                        json.dump({"model": self.model_name, "dim": self._disk_dim}, f)
+                with open(self._vectors_path, "ab") as f:
+                    f.write(np.ascontiguousarray(vectors[fresh], dtype=np.float32).tobytes())
+                with open(self._index_path, "a") as f:
+                    for offset, i in enumerate(fresh):
+                        f.write(json.dumps([keys[i], self._disk_rows + offset]) + "\n")
+                self._sync_disk()
+        except OSError as e:
+            logger.error(f"Embedding cache disk write failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            per_text = self.encode_seconds / self.encoded_texts if self.encoded_texts else 0.0
+            return {
+                "model": self.model_name,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk_index),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "encode_seconds": round(self.encode_seconds, 3),
+                "estimated_seconds_saved": round(hits * per_text, 3),
+            }
@@ -1,8 +1,12 @@
-import google.generativeai as genai
 from core.config import settings
+from core.session_store import create_session_store
+from services.history import HistoryManager, compact_resume
+from services.llm import create_llm_provider
 import logging
-from typing import List, Dict, Optional
+import threading
+from typing import List, Dict, Optional, Iterator
 import uuid
+import time
 from datetime import datetime
 
 # Configure logging
@@ -12,7 +16,7 @@ logger = logging.getLogger(__name__)
 class ResumeAnalystAgent:
     """
     A specialized AI agent for resume analysis and recruitment conversations.
-    Powered exclusively by Google Gemini.
+    Powered by Google Gemini, or the local stand-in provider for offline runs.
     """
     
     # Persona for Resume Analysis (The "Toolkit" Subset)
@@ -44,66 +48,67 @@ class ResumeAnalystAgent:
     """
 
     def __init__(self):
-        if not settings.GOOGLE_API_KEY:
-            logger.error("❌ Google API Key is missing! The ResumeAnalystAgent cannot function.")
-            raise ValueError("GOOGLE_API_KEY is required in .env file")
-
         try:
-            genai.configure(api_key=settings.GOOGLE_API_KEY)
-            
-            # Dynamically find a supported model to avoid 404 errors
-            available_models = []
-            for m in genai.list_models():
-                if 'generateContent' in m.supported_generation_methods:
-                    available_models.append(m.name)
-            
-            if not available_models:
-                raise ValueError("No models found that support 'generateContent'. Please check your API key permissions.")
-            
-            # Prioritize gemini-1.5-flash which has better free tier limits
-            # Order matters: check for 1.5-flash specifically first
-            target_model = None
-            for m in available_models:
-                if 'gemini-1.5-flash' in m and 'latest' not in m:
-                    target_model = m
-                    break
-            
-            if not target_model:
-                # Fallback to any flash model
-                for m in available_models:
-                    if 'flash' in m:
-                        target_model = m
-                        break
-            
-            # If still nothing, take the first available
-            if not target_model:
-                target_model = available_models[0]
-
-            self.model_name = target_model
-            logger.info(f"✅ ResumeAnalystAgent forcing model: {self.model_name}")
-            
-            logger.info(f"✅ ResumeAnalystAgent initialized with {self.model_name}")
-            
-            self.model = genai.GenerativeModel(self.model_name)
+            self.provider = create_llm_provider()
         except Exception as e:
-            logger.error(f"❌ Failed to initialize Google Gemini: {e}")
+            logger.error(f"❌ Failed to initialize the LLM provider: {e}")
             raise e
+        self.model_name = self.provider.model_name
+        logger.info(f"✅ ResumeAnalystAgent initialized with {self.model_name}")
+
+        # Serialized sessions, shareable across worker processes
+        self.store = create_session_store("agent")
+        self.history_manager = HistoryManager(
+            max_prompt_tokens=settings.CHAT_MAX_PROMPT_TOKENS,
+            summary_max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+            keep_recent_turns=settings.CHAT_KEEP_RECENT_TURNS
+        )
+
+    WELCOME_PROMPT_RESUME = "Briefly summarize the candidate's profile and list the 3 Toolkit features (Gap Analysis, Rewrite, Skills) as ready."
+    WELCOME_PROMPT_GENERAL = "Introduce yourself as ICA Career Strategist. Ask the user about their current field or interests to start suggesting roles."
+
+    def _initial_history(self, resume_text: Optional[str]) -> List[Dict]:
+        """The priming turns every Gemini chat for this session starts from."""
+        if resume_text:
+            return [
+                {"role": "user", "parts": [f"{self.SYSTEM_INSTRUCTION_RESUME}\n\nRESUME:\n{resume_text}"]},
+                {"role": "model", "parts": ["Resume analyzed. Ready for Gap Analysis, Rewriting, and Skill Extraction."]}
+            ]
+        return [
+            {"role": "user", "parts": [self.SYSTEM_INSTRUCTION_GENERAL]},
+            {"role": "model", "parts": ["Ready to advise on career paths and roles."]}
+        ]
 
-        # In-memory session storage
-        self.sessions = {}
+    def _chat_history(self, session_id: str, session: Dict, user_message: str) -> List[Dict]:
+        """
+        Rebuilds the chat history to replay from the stored session for the next turn.
+
+        Sessions only hold serializable history, so any worker process can
+        pick up any session. The history manager keeps the replayed turns
+        within the prompt token budget, summarizing the oldest ones.
+        """
+        priming = self._initial_history(session.get("resume_text"))
+        welcome_prompt = self.WELCOME_PROMPT_RESUME if session.get("resume_text") else self.WELCOME_PROMPT_GENERAL
+        messages = [{"role": "user", "content": welcome_prompt}] + session["history"]
+        history, prompt_tokens = self.history_manager.build(session, priming, messages, user_message)
+        session["last_prompt_tokens"] = prompt_tokens
+        logger.info(
+            f"🧮 Prompt ≈ {prompt_tokens} tokens (session {session_id}, "
+            f"{session['summarized_upto'] // 2} turns summarized, {len(messages)} messages total)"
+        )
+        return history
 
     def create_session(self, resume_text: str = None) -> tuple[str, str, list[str]]:
         """Starts a new session. If resume_text is None, starts a General Advisor session."""
         session_id = str(uuid.uuid4())
+        if resume_text:
+            # Compacted once here; every later turn reuses this block instead of the raw text
+            resume_text = compact_resume(resume_text, settings.CHAT_RESUME_MAX_TOKENS)
         
         try:
             if resume_text:
                 # --- RESUME MODE ---
-                initial_history = [
-                    {"role": "user", "parts": [f"{self.SYSTEM_INSTRUCTION_RESUME}\n\nRESUME:\n{resume_text}"]},
-                    {"role": "model", "parts": ["Resume analyzed. Ready for Gap Analysis, Rewriting, and Skill Extraction."]}
-                ]
-                welcome_prompt = "Briefly summarize the candidate's profile and list the 3 Toolkit features (Gap Analysis, Rewrite, Skills) as ready."
+                welcome_prompt = self.WELCOME_PROMPT_RESUME
                 
                 initial_suggestions = [
                     "Perform Gap Analysis",
@@ -113,11 +118,7 @@ class ResumeAnalystAgent:
                 ]
             else:
                 # --- GENERAL ADVISOR MODE ---
-                initial_history = [
-                    {"role": "user", "parts": [self.SYSTEM_INSTRUCTION_GENERAL]},
-                    {"role": "model", "parts": ["Ready to advise on career paths and roles."]}
-                ]
-                welcome_prompt = "Introduce yourself as ICA Career Strategist. Ask the user about their current field or interests to start suggesting roles."
+                welcome_prompt = self.WELCOME_PROMPT_GENERAL
                 
                 initial_suggestions = [
                     "Suggest high-growth roles",
@@ -126,28 +127,22 @@ class ResumeAnalystAgent:
                     "Help me plan my career"
                 ]
 
-            chat_session = self.model.start_chat(history=initial_history)
-            
             try:
                 # Attempt to generate a custom welcome message
-                welcome_response = chat_session.send_message(welcome_prompt)
-                welcome_msg = welcome_response.text
+                welcome_msg = self.provider.chat(self._initial_history(resume_text), welcome_prompt)
             except Exception as e:
                 logger.warning(f"⚠️ API Welcome Failed (likely Quota): {e}")
                 # Fallback to a static welcome message so the UI still loads!
                 welcome_msg = "Hello! I am the Intelligent Career Analyzer (ICA). My AI service makes me slightly delayed at the moment due to high traffic, but I am ready to help you with your career and resume needs. Please try asking a question!"
 
-            self.sessions[session_id] = {
-                "chat_session": chat_session,
+            self.store.put(session_id, {
                 "resume_text": resume_text,
-                "history": [],
+                "history": [{
+                    "role": "assistant",
+                    "content": welcome_msg,
+                    "timestamp": datetime.now().isoformat()
+                }],
                 "created_at": datetime.now().isoformat()
-            }
-            
-            self.sessions[session_id]["history"].append({
-                "role": "assistant",
-                "content": welcome_msg,
-                "timestamp": datetime.now().isoformat()
             })
 
             return session_id, welcome_msg, initial_suggestions
@@ -158,45 +153,110 @@ class ResumeAnalystAgent:
 
     def chat(self, session_id: str, user_message: str) -> Dict:
         """Sends a message to the agent and gets a response."""
-        if session_id not in self.sessions:
+        session = self.store.get(session_id)
+        if session is None:
             return {"error": "Session not found", "valid": False}
 
-        session = self.sessions[session_id]
-        chat_session = session["chat_session"]
+        try:
+            history = self._chat_history(session_id, session, user_message)
+            answer = self.provider.chat(history, user_message)
+            return self._complete_turn(session_id, session, user_message, answer)
+        except Exception as e:
+            return self._chat_error(e)
+
+    async def chat_async(self, session_id: str, user_message: str) -> Dict:
+        """Async variant of chat() using the provider's native async client."""
+        session = self.store.get(session_id)
+        if session is None:
+            return {"error": "Session not found", "valid": False}
 
         try:
-            # Send message to Gemini
-            response = chat_session.send_message(user_message)
-            answer = response.text
-
-            # Update our local mirror of history
-            session["history"].append({
-                "role": "user",
-                "content": user_message,
-                "timestamp": datetime.now().isoformat()
-            })
-            session["history"].append({
-                "role": "assistant",
-                "content": answer,
-                "timestamp": datetime.now().isoformat()
-            })
+            history = self._chat_history(session_id, session, user_message)
+            answer = await self.provider.chat_async(history, user_message)
+            return self._complete_turn(session_id, session, user_message, answer)
+        except Exception as e:
+            return self._chat_error(e)
 
-            # Generate smart follow-up suggestions
-            suggestions = self._generate_suggestions(session)
+    def _complete_turn(self, session_id: str, session: Dict, user_message: str, answer: str) -> Dict:
+        # Record the exchange and persist the session
+        session["history"].append({
+            "role": "user",
+            "content": user_message,
+            "timestamp": datetime.now().isoformat()
+        })
+        session["history"].append({
+            "role": "assistant",
+            "content": answer,
+            "timestamp": datetime.now().isoformat()
+        })
+        self.store.put(session_id, session)
 
-            return {
-                "answer": answer,
-                "suggestions": suggestions,
-                "valid": True
-            }
+        # Generate smart follow-up suggestions
+        suggestions = self._generate_suggestions(session)
+
+        return {
+            "answer": answer,
+            "suggestions": suggestions,
+            "prompt_tokens": session.get("last_prompt_tokens"),
+            "valid": True
+        }
+
+    def _chat_error(self, e: Exception) -> Dict:
+        logger.error(f"Chat error: {e}")
+        return {
+            "answer": "I encountered an error communicating with the AI service. Please check your connection or API key.",
+            "valid": True,
+            "error": str(e)
+        }
+
+    def chat_stream(self, session_id: str, user_message: str) -> Iterator[Dict]:
+        """
+        Streams the agent's answer as it is generated.
 
+        Yields {"type": "token", "text": ...} events as chunks arrive, then a
+        final {"type": "done", ...} event carrying the full answer, suggestions
+        and timings. History is only updated once the answer is complete.
+        """
+        session = self.store.get(session_id)
+        if session is None:
+            yield {"type": "error", "error": "Session not found", "valid": False}
+            return
+
+        start = time.perf_counter()
+        ttft_ms = None
+        parts = []
+
+        try:
+            history = self._chat_history(session_id, session, user_message)
+            for text in self.provider.chat_stream(history, user_message):
+                if not text:
+                    continue
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - start) * 1000, 1)
+                    logger.info(f"⏱️ Time to first token: {ttft_ms} ms (session {session_id})")
+                parts.append(text)
+                yield {"type": "token", "text": text}
         except Exception as e:
-            logger.error(f"Chat error: {e}")
-            return {
+            logger.error(f"Streaming chat error: {e}")
+            yield {
+                "type": "error",
+                "error": str(e),
                 "answer": "I encountered an error communicating with the AI service. Please check your connection or API key.",
-                "valid": True,
-                "error": str(e)
+                "valid": True
             }
+            return
+
+        answer = "".join(parts)
+        total_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"⏱️ Streamed answer complete in {total_ms} ms (session {session_id})")
+
+        result = self._complete_turn(session_id, session, user_message, answer)
+        yield {
+            "type": "done",
+            **result,
+            "ttft_ms": ttft_ms,
+            "total_ms": total_ms
+        }
 
     def _generate_suggestions(self, session) -> List[str]:
         """Generates context-aware follow-up suggestions."""
@@ -219,18 +279,25 @@ class ResumeAnalystAgent:
             ]
 
     def get_history(self, session_id: str) -> List[Dict]:
-        return self.sessions.get(session_id, {}).get("history", [])
+        session = self.store.get(session_id)
+        return session["history"] if session else []
 
     def clear_session(self, session_id: str):
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        self.store.delete(session_id)
+
+    def session_stats(self) -> Dict:
+        return self.store.stats()
 
 # Singleton instance
 # We strictly initialize this only when needed in main to handle config loading
 agent = None
+_agent_lock = threading.Lock()
 
 def get_agent():
     global agent
     if agent is None:
-        agent = ResumeAnalystAgent()
+        # Handlers build it on llm-pool threads; one agent means one session store
+        with _agent_lock:
+            if agent is None:
+                agent = ResumeAnalystAgent()
     return agent
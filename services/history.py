@@ -0,0 +1,119 @@
+import re
+from typing import Dict, List, Tuple
+
+from services.chunking import split_sections
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def compact_resume(resume_text: str, max_tokens: int) -> str:
+    """
+    Shrinks raw extracted resume text into a compact context block:
+    collapses whitespace and drops empty and repeated lines (headers/footers
+    repeated per page).
+
+    If that is still over the token budget, the budget is shared between
+    the resume's sections, so every section keeps at least its opening
+    lines. Each shortened section ends with a marker saying how much was
+    left out, and the block starts with a note that the resume was cut.
+    """
+    seen = set()
+    lines = []
+    for line in resume_text.splitlines():
+        line = re.sub(r"\s+", " ", line).strip()
+        if not line or line in seen:
+            continue
+        seen.add(line)
+        lines.append(line)
+    compact = "\n".join(lines)
+    if estimate_tokens(compact) <= max_tokens:
+        return compact
+
+    note = "[Resume shortened to fit the context budget; omitted text is marked per section]"
+    sections = split_sections(compact)
+    sizes = [estimate_tokens(text) for _, text in sections]
+    # Sections under a fair share keep everything; the rest split what is left
+    budget, budgets = max_tokens - estimate_tokens(note) - 4 * len(sections), {}
+    for i in sorted(range(len(sections)), key=sizes.__getitem__):
+        share = budget // (len(sections) - len(budgets))
+        budgets[i] = min(sizes[i], share)
+        budget -= budgets[i]
+
+    parts = [note]
+    for i, (name, text) in enumerate(sections):
+        if name != "header":
+            parts.append(f"{name.upper()}:")
+        if sizes[i] <= budgets[i]:
+            parts.append(text)
+            continue
+        kept = text[:max(0, budgets[i] * 4 - 60)].rsplit(" ", 1)[0]
+        omitted = len(text.split()) - len(kept.split())
+        parts.append(f"{kept} [... {omitted} more words of this section omitted]")
+    return "\n".join(parts)
+
+
+def _gist(text: str, max_words: int = 30) -> str:
+    words = text.split()
+    return " ".join(words[:max_words]) + (" ..." if len(words) > max_words else "")
+
+
+class HistoryManager:
+    """
+    Keeps the prompt sent to the chat model within a rolling token budget.
+
+    When priming + conversation + the new message exceed max_prompt_tokens,
+    the oldest user/assistant pairs are folded into a short running summary
+    (stored on the session) and no longer resent verbatim. The most recent
+    keep_recent_turns pairs are always sent in full.
+    """
+
+    def __init__(self, max_prompt_tokens: int, summary_max_tokens: int, keep_recent_turns: int):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.keep_recent_turns = keep_recent_turns
+
+    def build(self, session: Dict, priming: List[Dict], messages: List[Dict], new_message: str) -> Tuple[List[Dict], int]:
+        """
+        Returns (gemini_history, prompt_tokens) for the next turn.
+
+        messages alternate user/assistant starting with a user message. The
+        session's "summary" and "summarized_upto" fields are updated in place
+        when older turns are compacted.
+        """
+        fixed_tokens = sum(estimate_tokens(p) for turn in priming for p in turn["parts"]) + estimate_tokens(new_message)
+        start = session.get("summarized_upto", 0)
+        summary = session.get("summary", "")
+
+        def total(from_index, summary_text):
+            return fixed_tokens + estimate_tokens(summary_text) + sum(
+                estimate_tokens(m["content"]) for m in messages[from_index:]
+            )
+
+        min_start = max(0, len(messages) - 2 * self.keep_recent_turns)
+        while total(start, summary) > self.max_prompt_tokens and start + 2 <= min_start:
+            user_msg, assistant_msg = messages[start], messages[start + 1]
+            summary = self._fold(summary, user_msg["content"], assistant_msg["content"])
+            start += 2
+
+        session["summary"] = summary
+        session["summarized_upto"] = start
+
+        history = list(priming)
+        if summary:
+            history.append({"role": "user", "parts": [f"Summary of our earlier conversation:\n{summary}"]})
+            history.append({"role": "model", "parts": ["Noted, I'll keep that context in mind."]})
+        for message in messages[start:]:
+            role = "model" if message["role"] == "assistant" else "user"
+            history.append({"role": role, "parts": [message["content"]]})
+        return history, total(start, summary)
+
+    def _fold(self, summary: str, user_text: str, assistant_text: str) -> str:
+        entry = f"- User: {_gist(user_text, 20)} | Assistant: {_gist(assistant_text)}"
+        lines = (summary.splitlines() if summary else []) + [entry]
+        # Oldest summary lines go first once the summary itself is over budget
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
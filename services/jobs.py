@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import base64
+import ipaddress
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+from core.config import settings
+from core.job_queue import JobQueue, PRIORITIES
+from services.analysis import analyze_resume
+from services.document_store import DocumentStore
+from services.gemini_agent import get_agent
+from services.matcher import score_batch
+from services.parser import extract_document
+from services.resume_index import get_resume_index
+from utils.resume_rewriter import rewrite_resume_section
+
+logger = logging.getLogger(__name__)
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """The shared job queue, or None when JOB_QUEUE_PATH is empty."""
+    global _queue
+    if not settings.JOB_QUEUE_PATH:
+        return None
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(
+                settings.JOB_QUEUE_PATH,
+                timeout_seconds=settings.JOB_TIMEOUT_S,
+                max_attempts=settings.JOB_MAX_ATTEMPTS,
+                result_ttl_seconds=settings.JOB_RESULT_TTL_S,
+            )
+    return _queue
+
+
+def validate_callback_url(url: str):
+    """Callbacks only go to this machine, so a job can't be used to reach other hosts."""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("callback_url must be an http(s) URL")
+    host = parsed.hostname
+    if host != "localhost":
+        try:
+            local = ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            local = False
+        if not local:
+            raise ValueError("callback_url must point to localhost")
+
+
+# ----- tasks (run inside worker processes) -----
+
+_documents = None
+_loop = None
+
+
+def _document_store():
+    global _documents
+    if _documents is None:
+        # Shares parsed text with the API through DOCUMENT_CACHE_DIR when it is set
+        _documents = DocumentStore(settings.DOCUMENT_CACHE_SIZE, settings.DOCUMENT_CACHE_DIR or None)
+    return _documents
+
+
+def _index_resume(record):
+    resume_index = get_resume_index()
+    if resume_index is None:
+        return
+    try:
+        resume_index.add(record["document_id"], record["filename"], record["text"])
+    except Exception as e:
+        logger.error(f"Indexing {record['filename']} for candidate search failed: {e}")
+
+
+def _parse_files(payload):
+    store = _document_store()
+    records = []
+    for upload in payload.get("files", []):
+        file_bytes = base64.b64decode(upload["content"])
+        document_id = store.document_id(file_bytes)
+        record = store.get(document_id)
+        if record is None:
+            extracted = extract_document(file_bytes, upload["filename"])
+            record = store.put(document_id, upload["filename"], extracted["text"], extracted["metadata"])
+            _index_resume(record)
+        records.append(record)
+    return records
+
+
+def _resume_texts(payload):
+    """Resume texts from inline "resume_texts", parsed "files" and cached "document_ids"."""
+    texts = list(payload.get("resume_texts", []))
+    if payload.get("resume_text"):
+        texts.append(payload["resume_text"])
+    texts += [record["text"] for record in _parse_files(payload)]
+    for document_id in payload.get("document_ids", []):
+        record = _document_store().get(document_id)
+        if record is None:
+            raise ValueError(f"Document {document_id} not found")
+        texts.append(record["text"])
+    if not texts:
+        raise ValueError("Provide resume_text(s), files or document_ids")
+    return texts
+
+
+def _run_parse(payload):
+    return {"documents": [
+        {"document_id": r["document_id"], "filename": r["filename"], "characters": len(r["text"]),
+         "metadata": r["metadata"], "text": r["text"]}
+        for r in _parse_files(payload)
+    ]}
+
+
+def _run_rewrite(payload):
+    return {"rewritten_text": rewrite_resume_section(payload["text"], payload["keywords"])}
+
+
+def _run_match_batch(payload):
+    return {"match_scores": score_batch(_resume_texts(payload), payload["job_descriptions"], payload.get("scoring"))}
+
+
+def _run_analyze(payload):
+    global _loop
+    if _loop is None:
+        # One loop per worker: the executor pools' semaphores bind to the first loop that uses them
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(analyze_resume(
+        _resume_texts(payload)[0], payload["job_description"], payload.get("questions", []),
+        top_k_roles=payload.get("top_k", 5), use_llm=payload.get("use_llm", True),
+    ))
+
+
+def _run_chat(payload):
+    # Needs SESSION_BACKEND=sqlite so workers see the API's sessions
+    response = get_agent().chat(payload["session_id"], payload["message"])
+    if not response.get("valid", False):
+        raise ValueError(response.get("error", "Session not found"))
+    return response
+
+
+# task name -> (function, lane); the lane is fixed per task so clients can't jump the queue
+TASKS = {
+    "parse": (_run_parse, "default"),
+    "rewrite": (_run_rewrite, "default"),
+    "match_batch": (_run_match_batch, "bulk"),
+    "analyze": (_run_analyze, "default"),
+    "chat": (_run_chat, "interactive"),
+}
+
+
+def _notify(url: str, job: dict):
+    request = urllib.request.Request(
+        url, data=json.dumps(job).encode("utf-8"), headers={"Content-Type": "application/json"}, method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10):
+            pass
+    except Exception as e:
+        logger.warning(f"Callback for job {job['job_id']} to {url} failed: {e}")
+
+
+def _heartbeat(queue: JobQueue, job_id: str, worker: str, done: threading.Event):
+    # A separate thread, so even a job holding the GIL in long native calls keeps its lease
+    while not done.wait(settings.JOB_TIMEOUT_S / 4):
+        if not queue.heartbeat(job_id, worker):
+            logger.warning(f"Job {job_id}: lease lost by worker {worker}")
+            return
+
+
+def run_job(queue: JobQueue, job: dict, worker: str):
+    start = time.perf_counter()
+    done = threading.Event()
+    threading.Thread(target=_heartbeat, args=(queue, job["id"], worker, done), daemon=True).start()
+    try:
+        result = TASKS[job["task"]][0](job["payload"])
+    except Exception as e:
+        logger.error(f"Job {job['id']} ({job['task']}) failed: {e}")
+        finished = queue.fail(job["id"], worker, str(e))
+    else:
+        finished = queue.complete(job["id"], worker, result)
+        logger.info(f"Job {job['id']} ({job['task']}) done in {time.perf_counter() - start:.1f}s")
+    finally:
+        done.set()
+    if not finished:
+        logger.warning(f"Job {job['id']}: result discarded, the job was cancelled or re-queued")
+    elif job["callback_url"]:
+        _notify(job["callback_url"], queue.get(job["id"]))
+
+
+def worker_loop(name: str, lanes=None, stop_event=None):
+    """Claims and runs jobs from the given lanes (all, in priority order, by default) until stopped."""
+    logging.basicConfig(level=logging.INFO)
+    queue = get_job_queue()
+    logger.info(f"Job worker {name} (pid {os.getpid()}) serving lanes: {', '.join(lanes or PRIORITIES)}")
+    while stop_event is None or not stop_event.is_set():
+        job = queue.claim(name, lanes)
+        if job is None:
+            time.sleep(settings.JOB_POLL_INTERVAL_S)
+            continue
+        run_job(queue, job, name)
+
+
+_workers = []
+_stop_event = None
+
+
+def start_workers():
+    """
+    Spawns JOB_WORKERS general workers plus JOB_INTERACTIVE_WORKERS that
+    only take interactive jobs, so chat never waits behind a long bulk job.
+    """
+    global _stop_event
+    if get_job_queue() is None or _workers:
+        return
+    context = multiprocessing.get_context("spawn")
+    _stop_event = context.Event()
+    # Worker names are per process, so leases from different API processes never collide
+    plan = [(f"general-{i}-{os.getpid()}", None) for i in range(settings.JOB_WORKERS)]
+    plan += [(f"interactive-{i}-{os.getpid()}", ["interactive"]) for i in range(settings.JOB_INTERACTIVE_WORKERS)]
+    for name, lanes in plan:
+        process = context.Process(target=worker_loop, args=(name, lanes, _stop_event), name=f"job-{name}")
+        # Not daemonic: PDF/OCR extraction starts its own process pool
+        process.start()
+        _workers.append(process)
+
+
+def stop_workers(timeout: float = 10.0):
+    """Lets workers finish their current job; stragglers are killed and their jobs re-queued once their lease expires."""
+    if _stop_event is not None:
+        _stop_event.set()
+    for process in _workers:
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+    _workers.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a job queue worker outside the API process")
+    parser.add_argument("--name", default=f"cli-{os.getpid()}")
+    parser.add_argument("--lanes", nargs="*", choices=list(PRIORITIES), help="Lanes to serve (default: all)")
+    args = parser.parse_args()
+    if get_job_queue() is None:
+        parser.error("JOB_QUEUE_PATH is empty")
+    worker_loop(args.name, args.lanes or None)
+
+
+if __name__ == "__main__":
+    main()
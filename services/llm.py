@@ -0,0 +1,332 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterator, List
+
+from core.config import settings
+from core.rate_limit import llm_limiter
+
+logger = logging.getLogger(__name__)
+
+# Chat history is always in Gemini's shape: [{"role": "user"|"model", "parts": [text]}]
+History = List[Dict]
+
+
+class LLMProvider:
+    """
+    Interface between the chat/tool code and a text generation backend.
+
+    generate() answers a single prompt; chat() answers a new message given
+    the replayed history. Both return plain text, so callers never touch a
+    vendor SDK and any backend can stand in for another.
+    """
+
+    name = "base"
+    model_name = ""
+    # False for backends that only answer chat messages; the router never sends them generate()
+    generates = True
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def generate_async(self, prompt: str) -> str:
+        return await asyncio.to_thread(self.generate, prompt)
+
+    def chat(self, history: History, message: str) -> str:
+        raise NotImplementedError
+
+    async def chat_async(self, history: History, message: str) -> str:
+        return await asyncio.to_thread(self.chat, history, message)
+
+    def chat_stream(self, history: History, message: str) -> Iterator[str]:
+        yield self.chat(history, message)
+
+
+def request_key(history: History, message: str) -> str:
+    """Stable hash of a request, used to look up recorded responses."""
+    payload = json.dumps([history or [], message], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ----- Gemini -----
+
+def _select_gemini_model(names: List[str]) -> str:
+    # Prefer gemini-1.5-flash (better free tier limits), then any flash model, then anything
+    for name in names:
+        if "gemini-1.5-flash" in name and "latest" not in name:
+            return name
+    for name in names:
+        if "flash" in name:
+            return name
+    return names[0]
+
+
+def discover_gemini_model() -> str:
+    """
+    Picks a generateContent-capable Gemini model.
+
+    Listing models is a network round trip on every boot, so the result is
+    cached in LLM_MODEL_CACHE_PATH for LLM_MODEL_CACHE_TTL_S, keyed by a hash
+    of the API key (different keys can see different models).
+    """
+    import google.generativeai as genai
+
+    key_hash = hashlib.sha256(settings.GOOGLE_API_KEY.encode("utf-8")).hexdigest()[:16]
+    path = settings.LLM_MODEL_CACHE_PATH
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+            if cached["key_hash"] == key_hash and time.time() - cached["fetched_at"] < settings.LLM_MODEL_CACHE_TTL_S:
+                logger.info(f"Using cached Gemini model discovery: {cached['selected']}")
+                return cached["selected"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    names = [m.name for m in genai.list_models() if "generateContent" in m.supported_generation_methods]
+    if not names:
+        raise ValueError("No models found that support 'generateContent'. Please check your API key permissions.")
+    selected = _select_gemini_model(names)
+
+    if path:
+        try:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"key_hash": key_hash, "fetched_at": time.time(), "models": names, "selected": selected}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache Gemini model discovery: {e}")
+    return selected
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, model_name: str = None):
+        if not settings.GOOGLE_API_KEY:
+            raise ValueError("GOOGLE_API_KEY is required in .env file")
+        import google.generativeai as genai
+        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        self.model_name = model_name or discover_gemini_model()
+        self.model = genai.GenerativeModel(self.model_name)
+
+    def generate(self, prompt: str) -> str:
+        return self.model.generate_content(prompt).text
+
+    async def generate_async(self, prompt: str) -> str:
+        return (await self.model.generate_content_async(prompt)).text
+
+    def chat(self, history: History, message: str) -> str:
+        return self.model.start_chat(history=history).send_message(message).text
+
+    async def chat_async(self, history: History, message: str) -> str:
+        return (await self.model.start_chat(history=history).send_message_async(message)).text
+
+    def chat_stream(self, history: History, message: str) -> Iterator[str]:
+        for chunk in self.model.start_chat(history=history).send_message(message, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+class RecordingProvider(LLMProvider):
+    """Passes calls through to another provider and appends each answer to a JSONL file."""
+
+    def __init__(self, inner: LLMProvider, path: str):
+        self.inner = inner
+        self.name = inner.name
+        self.model_name = inner.model_name
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _record(self, history, message, response):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": request_key(history, message), "response": response}) + "\n")
+        return response
+
+    def generate(self, prompt):
+        return self._record(None, prompt, self.inner.generate(prompt))
+
+    async def generate_async(self, prompt):
+        return self._record(None, prompt, await self.inner.generate_async(prompt))
+
+    def chat(self, history, message):
+        return self._record(history, message, self.inner.chat(history, message))
+
+    async def chat_async(self, history, message):
+        return self._record(history, message, await self.inner.chat_async(history, message))
+
+    def chat_stream(self, history, message):
+        parts = []
+        for text in self.inner.chat_stream(history, message):
+            parts.append(text)
+            yield text
+        self._record(history, message, "".join(parts))
+
+
+class LimitedProvider(LLMProvider):
+    """Routes every call through an UpstreamLimiter (quota, adaptive concurrency, retries)."""
+
+    def __init__(self, inner: LLMProvider, limiter):
+        self.inner = inner
+        self.name = inner.name
+        self.model_name = inner.model_name
+        self.generates = inner.generates
+        self.limiter = limiter
+
+    def generate(self, prompt):
+        return self.limiter.call(self.inner.generate, prompt)
+
+    async def generate_async(self, prompt):
+        return await self.limiter.call_async(self.inner.generate_async, prompt)
+
+    def chat(self, history, message):
+        return self.limiter.call(self.inner.chat, history, message)
+
+    async def chat_async(self, history, message):
+        return await self.limiter.call_async(self.inner.chat_async, history, message)
+
+    def chat_stream(self, history, message):
+        return self.limiter.stream(self.inner.chat_stream, history, message)
+
+
+# ----- local stand-in -----
+
+_FILLER_WORDS = (
+    "experience skills role team project impact results python data design delivery ownership "
+    "stakeholders growth interview resume strengths profile requirements improve clear measurable"
+).split()
+_LOCAL_SKILLS = [
+    "Python", "SQL", "Docker", "Kubernetes", "AWS", "React", "Machine Learning", "Data Analysis",
+    "Communication", "Leadership", "Project Management", "Git",
+]
+_LOCAL_ROLES = [
+    "Software Engineer", "Data Analyst", "Data Scientist", "Backend Developer", "DevOps Engineer",
+    "Machine Learning Engineer", "Product Analyst",
+]
+
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic offline backend for load tests and benchmarks.
+
+    Answers come from a recordings file (written by a live run with
+    LLM_RECORDINGS_PATH set) when the exact request was recorded, and are
+    otherwise synthesized from a hash of the request: JSON in the shape each
+    ResumeTools prompt expects, filler text for anything else. Timing follows
+    a simple model -- latency_ms before the first token, then tokens_per_s --
+    so throughput and time-to-first-token behave like a remote model without
+    any network.
+    """
+
+    name = "local"
+
+    def __init__(self, recordings_path: str = None, latency_ms: float = None, tokens_per_s: float = None,
+                 response_tokens: int = None):
+        self.model_name = "local-simulator"
+        self.latency_s = (latency_ms if latency_ms is not None else settings.LLM_LOCAL_LATENCY_MS) / 1000
+        self.tokens_per_s = tokens_per_s or settings.LLM_LOCAL_TOKENS_PER_S
+        self.response_tokens = response_tokens or settings.LLM_LOCAL_RESPONSE_TOKENS
+        self.recordings = {}
+        if recordings_path and os.path.exists(recordings_path):
+            with open(recordings_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.recordings[entry["key"]] = entry["response"]
+            logger.info(f"Local LLM loaded {len(self.recordings)} recorded responses from {recordings_path}")
+
+    def _respond(self, history, message) -> str:
+        key = request_key(history, message)
+        recorded = self.recordings.get(key)
+        if recorded is not None:
+            return recorded
+
+        rng = random.Random(key)
+        # Keyed on the ResumeTools prompt, so each tool gets the shape it parses
+        if "Suggest 5 job titles" in message:
+            return json.dumps(rng.sample(_LOCAL_ROLES, 5))
+        if "Extract all technical skills" in message:
+            return json.dumps(rng.sample(_LOCAL_SKILLS, 6))
+        if "Identify matched skills and missing skills" in message:
+            skills = rng.sample(_LOCAL_SKILLS, 5)
+            return json.dumps({"matched_skills": skills[:3], "missing_skills": skills[3:],
+                               "score": rng.randint(40, 95)})
+        if "Review the below Resume" in message:
+            skills = rng.sample(_LOCAL_SKILLS, 4)
+            return json.dumps({
+                "fit_summary": f"Solid match on {skills[0]} and {skills[1]}. Limited evidence of {skills[2]}.",
+                "strengths": [f"Hands-on {skills[0]} experience", f"Delivered projects using {skills[1]}"],
+                "gaps": [f"No {skills[2]} experience shown", f"{skills[3]} only mentioned briefly"],
+                "recommendations": [f"Add a measurable {skills[2]} result", f"Expand the {skills[3]} project details"],
+                "suggested_roles": rng.sample(_LOCAL_ROLES, 2),
+            })
+        return " ".join(rng.choice(_FILLER_WORDS) for _ in range(self.response_tokens)).capitalize() + "."
+
+    def _duration(self, text: str) -> float:
+        return self.latency_s + len(text.split()) / self.tokens_per_s
+
+    def generate(self, prompt):
+        return self.chat(None, prompt)
+
+    async def generate_async(self, prompt):
+        return await self.chat_async(None, prompt)
+
+    def chat(self, history, message):
+        text = self._respond(history, message)
+        time.sleep(self._duration(text))
+        return text
+
+    async def chat_async(self, history, message):
+        text = self._respond(history, message)
+        await asyncio.sleep(self._duration(text))
+        return text
+
+    def chat_stream(self, history, message):
+        words = self._respond(history, message).split(" ")
+        time.sleep(self.latency_s)
+        # One chunk per ~8 words, paced at tokens_per_s
+        for start in range(0, len(words), 8):
+            chunk = words[start:start + 8]
+            time.sleep(len(chunk) / self.tokens_per_s)
+            yield " ".join(chunk) + (" " if start + 8 < len(words) else "")
+
+
+def create_llm_provider(model_name: str = None) -> LLMProvider:
+    """
+    Builds the provider selected by LLM_PROVIDER ("gemini" or "local"), or
+    returns the shared multi-backend router when LLM_ROUTES is set.
+
+    model_name pins a Gemini model; without it the model is discovered.
+    With LLM_RECORDINGS_PATH set, a Gemini provider records its answers
+    there and the local provider replays them. Every provider is wrapped in
+    the process-wide llm_limiter.
+    """
+    from services.llm_router import get_router
+    router = get_router()
+    if router is not None:
+        return router
+
+    provider_name = settings.LLM_PROVIDER.lower()
+    if provider_name == "local":
+        provider = LocalProvider(settings.LLM_RECORDINGS_PATH or None)
+    elif provider_name == "gemini":
+        provider = GeminiProvider(model_name or settings.LLM_MODEL or None)
+        if settings.LLM_RECORDINGS_PATH:
+            provider = RecordingProvider(provider, settings.LLM_RECORDINGS_PATH)
+    else:
+        raise ValueError(f"Unknown LLM_PROVIDER '{settings.LLM_PROVIDER}'; expected 'gemini' or 'local'")
+    # The agent and the tools share one limiter because they share one quota
+    provider = LimitedProvider(provider, llm_limiter)
+    logger.info(f"✅ LLM provider: {provider.name} ({provider.model_name})")
+    return provider
@@ -0,0 +1,370 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core.config import settings
+from core.models import registry
+from services.llm import LLMProvider, History
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Rolling window of call outcomes for one backend."""
+
+    def __init__(self, window: int = 200):
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def record(self, latency_s: float, ok: bool):
+        with self._lock:
+            self.calls += 1
+            self.errors += 0 if ok else 1
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(latency_s)
+
+    def percentile(self, q: float):
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    @property
+    def samples(self) -> int:
+        return len(self._outcomes)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return 1 - sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+
+class TransformersProvider(LLMProvider):
+    """
+    Local model as a last-resort backend.
+
+    "flan-t5" generates with the registered rewriter pipeline; "distilbert"
+    answers chat messages extractively from the conversation's context
+    (the resume in the priming turn) and cannot serve free-form prompts, so
+    the router leaves it out of generate() calls.
+    """
+
+    def __init__(self, kind: str):
+        self.name = kind
+        self.model_name = kind
+        self.generates = kind != "distilbert"
+
+    @staticmethod
+    def _context(history):
+        return "\n".join(part for turn in (history or []) if turn["role"] == "user" for part in turn["parts"])
+
+    def generate(self, prompt):
+        if not self.generates:
+            raise NotImplementedError("distilbert only answers questions about a conversation's context")
+        import utils.resume_rewriter  # registers the "rewriter" model
+        output = registry.get("rewriter")(prompt[-2000:], max_length=256, do_sample=False)
+        return output[0]["generated_text"]
+
+    def chat(self, history, message):
+        if self.name == "distilbert":
+            import services.qa  # registers the "qa" model
+            return registry.get("qa")(question=message, context=self._context(history))["answer"]
+        recent = [f"{turn['role']}: {' '.join(turn['parts'])}" for turn in (history or [])[-4:]]
+        return self.generate("\n".join(recent + [f"user: {message}", "model:"]))
+
+
+class Backend:
+    def __init__(self, name: str, provider: LLMProvider, cost: int):
+        self.name = name
+        self.provider = provider
+        self.cost = cost
+        self.tracker = LatencyTracker()
+        self.hedged = 0
+
+    def timed(self, method: str, *args):
+        start = time.perf_counter()
+        try:
+            result = getattr(self.provider, method)(*args)
+        except Exception:
+            self.tracker.record(time.perf_counter() - start, ok=False)
+            raise
+        self.tracker.record(time.perf_counter() - start, ok=True)
+        return result
+
+    async def timed_async(self, method: str, *args):
+        start = time.perf_counter()
+        try:
+            result = await getattr(self.provider, method)(*args)
+        except Exception:
+            self.tracker.record(time.perf_counter() - start, ok=False)
+            raise
+        self.tracker.record(time.perf_counter() - start, ok=True)
+        return result
+
+
+class RoutedProvider(LLMProvider):
+    """
+    Sends each request to the cheapest backend currently meeting the SLO.
+
+    Backends are listed cheapest first. One whose recent p95 latency exceeds
+    slo_s or whose error rate exceeds max_error_rate moves to the back of the
+    order until it recovers (backends with few samples get the benefit of the
+    doubt). A failed or timed-out call fails over to the next backend, and a
+    call still pending after hedge_after_s is hedged: the next backend starts
+    in parallel and the first answer wins.
+    """
+
+    name = "router"
+
+    def __init__(self, backends, slo_s: float, hedge_after_s: float, timeout_s: float, max_error_rate: float,
+                 min_samples: int = 20):
+        self.backends = backends
+        self.model_name = "router:" + ",".join(b.name for b in backends)
+        self.slo_s = slo_s
+        self.hedge_after_s = hedge_after_s
+        self.timeout_s = timeout_s
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.failovers = 0
+        self._executor = ThreadPoolExecutor(max_workers=4 * len(backends), thread_name_prefix="llm-router")
+
+    def _healthy(self, backend) -> bool:
+        if backend.tracker.samples < self.min_samples:
+            return True
+        p95 = backend.tracker.percentile(0.95)
+        return backend.tracker.error_rate <= self.max_error_rate and (p95 is None or p95 <= self.slo_s)
+
+    def order(self, method: str = None):
+        """Backends to try for method, best first; chat-only backends are skipped for generate."""
+        backends = self.backends
+        if method is not None and method.startswith("generate"):
+            backends = [b for b in backends if b.provider.generates]
+        healthy = [b for b in backends if self._healthy(b)]
+        degraded = sorted((b for b in backends if not self._healthy(b)),
+                          key=lambda b: b.tracker.percentile(0.95) or float("inf"))
+        return healthy + degraded
+
+    def _hedge_delay(self, backend) -> float:
+        if self.hedge_after_s:
+            return self.hedge_after_s
+        # Default: hedge once the primary is slower than its own usual p95
+        p95 = backend.tracker.percentile(0.95)
+        return min(self.slo_s, p95) if p95 is not None and backend.tracker.samples >= self.min_samples else self.slo_s
+
+    def _route(self, method: str, *args):
+        order = self.order(method)
+        if not order:
+            raise RuntimeError(f"No LLM backend supports {method}")
+        pending = {}  # future -> (backend, started_at)
+        next_index = 0
+        last_error = None
+
+        def launch():
+            nonlocal next_index
+            backend = order[next_index]
+            next_index += 1
+            pending[self._executor.submit(backend.timed, method, *args)] = (backend, time.monotonic())
+            return backend
+
+        primary = launch()
+        hedge_at = time.monotonic() + self._hedge_delay(primary)
+        while pending:
+            now = time.monotonic()
+            oldest_deadline = min(started + self.timeout_s for _, started in pending.values())
+            wake_at = min(oldest_deadline, hedge_at) if next_index < len(order) else oldest_deadline
+            done, _ = wait(list(pending), timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                backend, _ = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"LLM backend {backend.name} failed: {e}")
+
+            now = time.monotonic()
+            # Calls past the timeout are abandoned (their thread finishes in the background)
+            for future, (backend, started) in list(pending.items()):
+                if now - started >= self.timeout_s:
+                    pending.pop(future)
+                    last_error = TimeoutError(f"{backend.name} did not answer within {self.timeout_s}s")
+                    logger.warning(str(last_error))
+
+            if next_index < len(order) and (not pending or now >= hedge_at):
+                if pending:
+                    primary.hedged += 1
+                else:
+                    self.failovers += 1
+                primary = launch()
+                hedge_at = time.monotonic() + self._hedge_delay(primary)
+
+        raise last_error or RuntimeError("No LLM backend available")
+
+    async def _route_async(self, method: str, *args):
+        order = self.order(method)
+        if not order:
+            raise RuntimeError(f"No LLM backend supports {method}")
+        pending = {}  # task -> (backend, started_at)
+        next_index = 0
+        last_error = None
+
+        def launch():
+            nonlocal next_index
+            backend = order[next_index]
+            next_index += 1
+            pending[asyncio.ensure_future(backend.timed_async(method, *args))] = (backend, time.monotonic())
+            return backend
+
+        primary = launch()
+        hedge_at = time.monotonic() + self._hedge_delay(primary)
+        try:
+            while pending:
+                now = time.monotonic()
+                oldest_deadline = min(started + self.timeout_s for _, started in pending.values())
+                wake_at = min(oldest_deadline, hedge_at) if next_index < len(order) else oldest_deadline
+                done, _ = await asyncio.wait(list(pending), timeout=max(0.0, wake_at - now),
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    backend, _ = pending.pop(task)
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        last_error = e
+                        logger.warning(f"LLM backend {backend.name} failed: {e}")
+
+                now = time.monotonic()
+                for task, (backend, started) in list(pending.items()):
+                    if now - started >= self.timeout_s:
+                        pending.pop(task)
+                        task.cancel()
+                        last_error = TimeoutError(f"{backend.name} did not answer within {self.timeout_s}s")
+                        logger.warning(str(last_error))
+
+                if next_index < len(order) and (not pending or now >= hedge_at):
+                    if pending:
+                        primary.hedged += 1
+                    else:
+                        self.failovers += 1
+                    primary = launch()
+                    hedge_at = time.monotonic() + self._hedge_delay(primary)
+        finally:
+            # The losing hedges are no longer needed
+            for task in pending:
+                task.cancel()
+
+        raise last_error or RuntimeError("No LLM backend available")
+
+    def generate(self, prompt):
+        return self._route("generate", prompt)
+
+    async def generate_async(self, prompt):
+        return await self._route_async("generate_async", prompt)
+
+    def chat(self, history: History, message: str):
+        return self._route("chat", history, message)
+
+    async def chat_async(self, history: History, message: str):
+        return await self._route_async("chat_async", history, message)
+
+    def chat_stream(self, history: History, message: str):
+        # Streams fail over but are not hedged: once tokens flow the backend is committed
+        last_error = None
+        for index, backend in enumerate(self.order()):
+            if index:
+                self.failovers += 1
+            start = time.perf_counter()
+            started = False
+            try:
+                for text in backend.provider.chat_stream(history, message):
+                    if not started:
+                        started = True
+                        backend.tracker.record(time.perf_counter() - start, ok=True)
+                    yield text
+                return
+            except Exception as e:
+                if started:
+                    raise
+                backend.tracker.record(time.perf_counter() - start, ok=False)
+                last_error = e
+                logger.warning(f"LLM backend {backend.name} failed before streaming: {e}")
+        raise last_error or RuntimeError("No LLM backend available")
+
+    def stats(self) -> dict:
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "slo_ms": ms(self.slo_s),
+            "order": [b.name for b in self.order()],
+            "failovers": self.failovers,
+            "backends": {
+                b.name: {
+                    "cost_rank": b.cost,
+                    "calls": b.tracker.calls,
+                    "errors": b.tracker.errors,
+                    "error_rate": round(b.tracker.error_rate, 3),
+                    "p50_ms": ms(b.tracker.percentile(0.5)),
+                    "p95_ms": ms(b.tracker.percentile(0.95)),
+                    "hedged": b.hedged,
+                    "healthy": self._healthy(b),
+                }
+                for b in self.backends
+            },
+        }
+
+
+def build_backend(route: str) -> LLMProvider:
+    """One LLM_ROUTES entry: a Gemini model name, "flan-t5", "distilbert" or "local"."""
+    from services.llm import GeminiProvider, LimitedProvider, LocalProvider
+    from core.rate_limit import llm_limiter
+
+    if route in ("flan-t5", "distilbert"):
+        return TransformersProvider(route)
+    if route == "local":
+        return LocalProvider(settings.LLM_RECORDINGS_PATH or None)
+    model_name = route if route.startswith("models/") else f"models/{route}"
+    # Gemini backends share the process-wide quota limiter
+    return LimitedProvider(GeminiProvider(model_name), llm_limiter)
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """The shared router built from LLM_ROUTES, or None when routing is off."""
+    global _router
+    routes = [r.strip() for r in settings.LLM_ROUTES.split(",") if r.strip()]
+    if not routes:
+        return None
+    with _router_lock:
+        if _router is None:
+            backends = []
+            for cost, route in enumerate(routes):
+                try:
+                    backends.append(Backend(route, build_backend(route), cost))
+                except Exception as e:
+                    logger.error(f"❌ Skipping LLM route '{route}': {e}")
+            if not backends:
+                raise ValueError(f"None of LLM_ROUTES could be initialized: {settings.LLM_ROUTES}")
+            _router = RoutedProvider(
+                backends,
+                slo_s=settings.LLM_SLO_S,
+                hedge_after_s=settings.LLM_HEDGE_AFTER_S,
+                timeout_s=settings.LLM_BACKEND_TIMEOUT_S,
+                max_error_rate=settings.LLM_MAX_ERROR_RATE,
+            )
+    return _router
+
+
+def router_stats():
+    return _router.stats() if _router is not None else None
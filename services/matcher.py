@@ -1,9 +1,146 @@
-from sentence_transformers import SentenceTransformer, util
 from core.config import settings
+from core.backends import backend_for, load_sentence_transformer
+from core.batching import get_batcher
+from core.models import registry
+from services.chunking import chunk_sections, chunk_text
+from services.embedding_cache import EmbeddingCache
+import numpy as np
 
-model = SentenceTransformer(settings.EMBEDDING_MODEL)
+def _load_embedding_model():
+    return load_sentence_transformer()
+
+registry.register("embedding", _load_embedding_model)
+
+# int8/ONNX vectors differ slightly from fp32 ones, so persisted vectors are keyed by model and backend
+EMBEDDING_ID = f"{settings.EMBEDDING_MODEL}@{backend_for('embedding')}"
+
+embedding_cache = EmbeddingCache(
+    EMBEDDING_ID,
+    max_entries=settings.EMBEDDING_CACHE_SIZE,
+    disk_dir=settings.EMBEDDING_CACHE_DIR or None,
+)
 
 def match_resume_job(resume_text, job_text):
-    embeddings = model.encode([resume_text, job_text], convert_to_tensor=True)
-    score = util.cos_sim(embeddings[0], embeddings[1]).item()
+    embeddings = encode_texts([resume_text, job_text])
+    score = float(embeddings[0] @ embeddings[1])
     return round(score * 100, 2)
+
+def match_resume_job_chunked(resume_text, job_text):
+    """Section-aware max-sim match of a resume against a job description.
+
+    The encoder truncates long inputs, so both documents are split into
+    chunks (resume chunks stay inside their section) and all chunks are
+    encoded in one call. Each job chunk is credited with its best-matching
+    resume chunk; the overall score is the mean of those maxima weighted by
+    job chunk length. Section scores apply the same max-sim restricted to
+    one resume section's chunks.
+    """
+    resume_chunks = chunk_sections(resume_text, settings.MATCH_CHUNK_WORDS, settings.MATCH_CHUNK_OVERLAP)
+    job_chunks = chunk_text(job_text, settings.MATCH_CHUNK_WORDS, settings.MATCH_CHUNK_OVERLAP)
+    if not resume_chunks or not job_chunks:
+        return {"match_score": 0.0, "section_scores": {}, "chunks": {"resume": len(resume_chunks), "job": len(job_chunks)}}
+
+    embeddings = encode_texts([chunk for _, chunk in resume_chunks] + job_chunks)
+    resume_embeds = embeddings[:len(resume_chunks)]
+    job_embeds = embeddings[len(resume_chunks):]
+    similarities = job_embeds @ resume_embeds.T  # (job chunks, resume chunks)
+
+    weights = np.array([len(chunk.split()) for chunk in job_chunks], dtype=np.float32)
+    weights /= weights.sum()
+    sections = np.array([name for name, _ in resume_chunks])
+
+    section_scores = {}
+    for name in dict.fromkeys(sections):
+        section_best = similarities[:, sections == name].max(axis=1)
+        section_scores[name] = round(float(weights @ section_best) * 100, 2)
+
+    return {
+        "match_score": round(float(weights @ similarities.max(axis=1)) * 100, 2),
+        "section_scores": section_scores,
+        "chunks": {"resume": len(resume_chunks), "job": len(job_chunks)},
+    }
+
+def encode_texts(texts, batch_size=None):
+    """Encodes texts into L2-normalized float32 vectors, one row per input.
+
+    Texts already seen are served from the embedding cache; the rest are
+    deduped and encoded in one batched call. Small requests go through the
+    micro-batcher so concurrent callers share a forward pass.
+    """
+    model = registry.get("embedding")
+    if not texts:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+    def _encode(missing):
+        batcher = get_batcher("embedding", _encode_batch)
+        if len(missing) < batcher.max_batch_size:
+            return np.stack(batcher.submit_many(missing))
+        # Already a full batch on its own; queueing would only add latency
+        return _encode_batch(missing, batch_size)
+
+    return embedding_cache.encode(list(texts), _encode)
+
+def _encode_batch(texts, batch_size=None):
+    return registry.get("embedding").encode(
+        texts,
+        batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    )
+
+def match_batch(resume_texts, job_texts):
+    """Scores every resume against every job description.
+
+    Returns an N x M list of match scores (same 0-100 scale as
+    match_resume_job), where N = len(resume_texts) and M = len(job_texts).
+    """
+    # A single encode over resumes and jobs together shares the batch and
+    # dedupes any text that appears on both sides.
+    embeddings = encode_texts(list(resume_texts) + list(job_texts))
+    resume_embeds = embeddings[:len(resume_texts)]
+    job_embeds = embeddings[len(resume_texts):]
+
+    # Vectors are normalized, so one matmul yields the full cosine matrix
+    scores = resume_embeds @ job_embeds.T
+    return np.round(scores * 100, 2).tolist()
+
+def match_batch_chunked(resume_texts, job_texts):
+    """N x M matrix of the same section-aware max-sim scores as match_resume_job_chunked.
+
+    Every chunk of every document is encoded in one call (shared chunks
+    are encoded once), then each job is scored against all resumes with a
+    single matmul and a per-resume max.
+    """
+    resume_chunks = [[chunk for _, chunk in chunk_sections(text, settings.MATCH_CHUNK_WORDS, settings.MATCH_CHUNK_OVERLAP)]
+                     for text in resume_texts]
+    job_chunks = [chunk_text(text, settings.MATCH_CHUNK_WORDS, settings.MATCH_CHUNK_OVERLAP) for text in job_texts]
+    scores = np.zeros((len(resume_texts), len(job_texts)))
+    scored = [i for i, chunks in enumerate(resume_chunks) if chunks]
+    if not scored or not any(job_chunks):
+        return scores.tolist()
+
+    flat_resume = [chunk for i in scored for chunk in resume_chunks[i]]
+    flat_job = [chunk for chunks in job_chunks for chunk in chunks]
+    embeddings = encode_texts(flat_resume + flat_job)
+    resume_embeds = embeddings[:len(flat_resume)]
+    job_embeds = embeddings[len(flat_resume):]
+    # Start of each scored resume's chunks, for a per-resume max over columns
+    offsets = np.cumsum([0] + [len(resume_chunks[i]) for i in scored[:-1]])
+
+    start = 0
+    for j, chunks in enumerate(job_chunks):
+        if not chunks:
+            continue
+        similarities = job_embeds[start:start + len(chunks)] @ resume_embeds.T
+        start += len(chunks)
+        weights = np.array([len(chunk.split()) for chunk in chunks], dtype=np.float32)
+        weights /= weights.sum()
+        best = np.maximum.reduceat(similarities, offsets, axis=1)  # (job chunks, scored resumes)
+        scores[scored, j] = weights @ best
+    return np.round(scores * 100, 2).tolist()
+
+def score_batch(resume_texts, job_texts, scoring=None):
+    """N x M match scores with the configured scoring, so every endpoint agrees with /match."""
+    if (scoring or settings.MATCH_SCORING) == "chunked":
+        return match_batch_chunked(resume_texts, job_texts)
+    return match_batch(resume_texts, job_texts)
@@ -1,24 +1,120 @@
 import fitz  # PyMuPDF
 import docx
 import io
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
 from PIL import Image
 import pytesseract
+from core.config import settings
 
 def extract_text(file_bytes, filename):
+    return extract_document(file_bytes, filename)["text"]
+
+def extract_document(file_bytes, filename):
+    """Extracts text plus metadata (page count, per-page timings) from a document."""
+    start = time.perf_counter()
+    metadata = {}
     if filename.lower().endswith(".pdf"):
-        return _extract_from_pdf(file_bytes)
+        pages = list(iter_pdf_pages(file_bytes))
+        if settings.OCR_ENABLED:
+            # Scanned pages have no text layer; OCR just those pages
+            scanned = [p["page"] for p in pages if len(p["text"].strip()) < settings.OCR_MIN_PAGE_CHARS]
+            if scanned:
+                ocr_text, ocr_metadata = _ocr_pdf_pages(file_bytes, scanned)
+                for page in pages:
+                    if page["page"] in ocr_text:
+                        page["text"] = ocr_text[page["page"]]
+                metadata.update(ocr_metadata)
+        text = "".join(page["text"] for page in pages)
+        metadata["page_count"] = len(pages)
+        metadata["page_timings_ms"] = [round(page["seconds"] * 1000, 2) for page in pages]
     elif filename.lower().endswith(".docx"):
-        return _extract_from_docx(file_bytes)
+        text = _extract_from_docx(file_bytes)
     elif filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-        return _extract_from_image(file_bytes)
-    return ""
+        text = _extract_from_image(file_bytes)
+    else:
+        text = ""
+    metadata["extraction_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return {"text": text, "metadata": metadata}
 
-def _extract_from_pdf(file_bytes):
-    text = ""
+def iter_pdf_pages(file_bytes, parallel=None):
+    """
+    Yields {"page", "text", "seconds"} for each PDF page, in page order, as
+    soon as that page is extracted.
+
+    Long documents are split into page ranges extracted across a process
+    pool; parallel=None picks that mode automatically from the page count.
+    """
     doc = fitz.open(stream=file_bytes, filetype="pdf")
-    for page in doc:
-        text += page.get_text()
-    return text
+    page_count = doc.page_count
+    if parallel is None:
+        parallel = settings.PDF_PAGE_WORKERS > 1 and page_count >= settings.PDF_PARALLEL_MIN_PAGES
+
+    if not parallel:
+        try:
+            for number, page in enumerate(doc):
+                start = time.perf_counter()
+                text = page.get_text()
+                yield {"page": number, "text": text, "seconds": time.perf_counter() - start}
+        finally:
+            doc.close()
+        return
+    doc.close()
+
+    path = _write_temp_pdf(file_bytes)
+    chunk = max(1, math.ceil(page_count / (settings.PDF_PAGE_WORKERS * 2)))
+    pool = _get_page_pool()
+    futures = [
+        pool.submit(_extract_page_range, path, start, min(start + chunk, page_count))
+        for start in range(0, page_count, chunk)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        for future in futures:
+            if not future.cancelled():
+                try:
+                    future.exception()
+                except Exception:
+                    pass
+        os.remove(path)
+
+def _write_temp_pdf(file_bytes):
+    # Workers open the document from one shared temp file rather than each
+    # receiving a pickled copy of the bytes.
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(file_bytes)
+    return path
+
+def _extract_page_range(path, start, stop):
+    pages = []
+    with fitz.open(path) as doc:
+        for number in range(start, stop):
+            page_start = time.perf_counter()
+            text = doc[number].get_text()
+            pages.append({"page": number, "text": text, "seconds": time.perf_counter() - page_start})
+    return pages
+
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+def _get_page_pool():
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_PAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+    return _page_pool
 
 def _extract_from_docx(file_bytes):
     text = ""
@@ -28,5 +124,83 @@ def _extract_from_docx(file_bytes):
     return text
 
 def _extract_from_image(file_bytes):
-    image = Image.open(io.BytesIO(file_bytes))
-    return pytesseract.image_to_string(image)
+    image = _prepare_for_ocr(Image.open(io.BytesIO(file_bytes)))
+    try:
+        return pytesseract.image_to_string(image, timeout=settings.OCR_TIME_BUDGET_S or 0)
+    except RuntimeError:
+        # pytesseract raises RuntimeError when the timeout kills Tesseract
+        return ""
+
+def _prepare_for_ocr(image):
+    """Grayscale, downscale and binarize an image to cut Tesseract time."""
+    image = image.convert("L")
+    max_side = settings.OCR_MAX_DIMENSION
+    if max_side and max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    threshold = settings.OCR_BINARIZE_THRESHOLD
+    if threshold:
+        image = image.point(lambda p: 255 if p > threshold else 0, mode="1")
+    return image
+
+def _ocr_pdf_pages(file_bytes, page_numbers):
+    """
+    OCRs the given PDF pages across the worker pool within the per-document
+    time budget. Returns ({page: text}, metadata); pages that miss the
+    budget are left out and listed in the metadata.
+    """
+    start = time.perf_counter()
+    budget = settings.OCR_TIME_BUDGET_S
+    # Wall-clock deadline so worker processes can compute their remaining time
+    deadline = time.time() + budget if budget else None
+
+    path = _write_temp_pdf(file_bytes)
+    results = {}
+    try:
+        if settings.PDF_PAGE_WORKERS <= 1:
+            # In-process (e.g. inside a worker that is already one of many extraction processes)
+            for number in page_numbers:
+                try:
+                    text = _ocr_pdf_page(path, number, settings.OCR_DPI, deadline)
+                except Exception:
+                    continue
+                if text is not None:
+                    results[number] = text
+        else:
+            pool = _get_page_pool()
+            futures = {
+                pool.submit(_ocr_pdf_page, path, number, settings.OCR_DPI, deadline): number
+                for number in page_numbers
+            }
+            done, not_done = wait(futures, timeout=budget or None)
+            for future in not_done:
+                future.cancel()
+            # Started pages stop on their own: Tesseract is killed at the deadline
+            wait([f for f in not_done if not f.cancelled()])
+
+            for future in done:
+                try:
+                    text = future.result()
+                except Exception:
+                    continue
+                if text is not None:
+                    results[futures[future]] = text
+    finally:
+        os.remove(path)
+
+    return results, {
+        "ocr_pages": sorted(results),
+        "ocr_skipped_pages": sorted(set(page_numbers) - set(results)),
+        "ocr_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+def _ocr_pdf_page(path, number, dpi, deadline):
+    remaining = deadline - time.time() if deadline else 0
+    if deadline and remaining <= 0:
+        return None
+    with fitz.open(path) as doc:
+        pixmap = doc[number].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+    try:
+        return pytesseract.image_to_string(_prepare_for_ocr(image), timeout=max(remaining, 0))
+    except RuntimeError:
+        return None
@@ -1,8 +1,58 @@
-from transformers import pipeline
 from core.config import settings
+from core.backends import load_pipeline
+from core.batching import get_batcher
+from core.models import registry
+from core.vector_search import top_k
+from services.chunking import chunk_text
+from services.matcher import encode_texts
 
-qa_pipeline = pipeline("question-answering", model="distilbert-base-uncased-distilled-squad")
+def _load_qa_pipeline():
+    return load_pipeline("qa")
+
+registry.register("qa", _load_qa_pipeline)
 
 def answer_question(text, question):
-    result = qa_pipeline(question=question, context=text)
-    return result["answer"]
+    return answer_questions(text, [question])[0]["answer"]
+
+def answer_questions(text, questions):
+    """
+    Answers several questions about one document in a single batched pass.
+
+    With QA_RETRIEVAL enabled the document is chunked once, chunks and
+    questions are embedded together, and the extractive model only reads the
+    top QA_TOP_PASSAGES passages per question instead of the whole document.
+    """
+    if not questions:
+        return []
+    contexts = _retrieve_contexts(text, questions) if settings.QA_RETRIEVAL else [text] * len(questions)
+
+    # Questions from concurrent requests are batched into shared forward passes
+    results = get_batcher("qa", _run_qa_batch).submit_many(
+        [{"question": q, "context": c} for q, c in zip(questions, contexts)]
+    )
+    return [
+        {"question": q, "answer": r["answer"], "score": round(float(r["score"]), 4)}
+        for q, r in zip(questions, results)
+    ]
+
+def _run_qa_batch(inputs):
+    results = registry.get("qa")(inputs, batch_size=len(inputs))
+    return [results] if isinstance(results, dict) else results
+
+def _retrieve_contexts(text, questions):
+    chunks = chunk_text(text, settings.QA_CHUNK_WORDS, settings.QA_CHUNK_OVERLAP)
+    if len(chunks) <= settings.QA_TOP_PASSAGES:
+        return [text] * len(questions)
+
+    # Resume chunks hit the embedding cache on every question after the first
+    embeddings = encode_texts(chunks + list(questions))
+    chunk_embeds = embeddings[:len(chunks)]
+    question_embeds = embeddings[len(chunks):]
+    similarities = question_embeds @ chunk_embeds.T
+
+    contexts = []
+    for row in similarities:
+        # Keep passages in document order so the reader sees coherent text
+        best = sorted(top_k(row, settings.QA_TOP_PASSAGES))
+        contexts.append("\n".join(chunks[i] for i in best))
+    return contexts
@@ -0,0 +1,205 @@
+import csv
+import json
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core.config import settings
+from services.parser import extract_text
+from services.matcher import score_batch
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".png", ".jpg", ".jpeg")
+
+
+def discover_resumes(path: str):
+    """
+    Lists resume sources under a directory or inside a .zip archive.
+
+    Sources are small picklable tuples -- ("file", path) or ("zip", archive,
+    member) -- so worker processes read the bytes themselves.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            return [
+                ("zip", path, member)
+                for member in sorted(archive.namelist())
+                if member.lower().endswith(SUPPORTED_EXTENSIONS) and not member.endswith("/")
+            ]
+
+    sources = []
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                sources.append(("file", os.path.join(root, name)))
+    return sorted(sources)
+
+
+def source_name(source) -> str:
+    return source[2] if source[0] == "zip" else source[1]
+
+
+def _init_extract_worker():
+    # This pool already runs one extraction per core; page-parallel PDF/OCR
+    # pools inside each worker would only oversubscribe the CPUs.
+    settings.PDF_PAGE_WORKERS = 1
+
+
+def _extract_source(source):
+    """Worker: reads one resume and extracts its text. Returns (name, text, error)."""
+    name = source_name(source)
+    try:
+        if source[0] == "zip":
+            with zipfile.ZipFile(source[1]) as archive:
+                file_bytes = archive.read(source[2])
+        else:
+            with open(source[1], "rb") as f:
+                file_bytes = f.read()
+        return name, extract_text(file_bytes, name), None
+    except Exception as e:
+        return name, "", str(e)
+
+
+def _completed_names(output_path: str):
+    """Resumes already scored in a previous (possibly interrupted) run; failed ones are retried."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    _trim_partial_line(output_path)
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "error" not in record:
+                done.add(record["resume"])
+    return done
+
+
+def _trim_partial_line(output_path: str):
+    """Drops a last line cut off by an interruption, so new records start on a line of their own."""
+    with open(output_path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Scan back to the last complete line
+        position = size
+        while position > 0:
+            step = min(65536, position)
+            f.seek(position - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                f.truncate(position - step + newline + 1)
+                return
+            position -= step
+        f.truncate(0)
+
+
+def rank_resumes(resumes_path: str, jobs: dict, output_path: str, workers: int = None,
+                 batch_size: int = 64, scoring: str = None, progress=sys.stderr):
+    """
+    Scores every resume under resumes_path against each job description.
+
+    jobs maps a job name to its description. Text is extracted in a process
+    pool, scored in batches of batch_size (with MATCH_SCORING unless scoring
+    is given, as /match does), and one JSON line per resume is
+    appended to output_path as soon as its batch is scored. Resumes already
+    present in output_path are skipped (failed ones are retried), so an
+    interrupted run can be resumed. At most a few batches of extracted text
+    are held in memory at once. Returns a summary dict.
+    """
+    job_names = list(jobs)
+    job_texts = [jobs[name] for name in job_names]
+
+    done = _completed_names(output_path)
+    pending = [s for s in discover_resumes(resumes_path) if source_name(s) not in done]
+    print(f"📂 {len(pending)} resumes to score ({len(done)} already done)", file=progress)
+
+    start = time.perf_counter()
+    scored = failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_extract_worker) as pool, \
+            open(output_path, "a", encoding="utf-8") as out:
+        batch = []
+
+        def flush():
+            nonlocal scored, failed
+            texts = [text for _, text, error in batch if not error]
+            rows = iter(score_batch(texts, job_texts, scoring)) if texts else iter(())
+            for name, text, error in batch:
+                record = {"resume": name}
+                if error:
+                    record["error"] = error
+                    failed += 1
+                else:
+                    scores = dict(zip(job_names, next(rows)))
+                    best_job = max(scores, key=scores.get)
+                    record.update({"scores": scores, "best_job": best_job, "best_score": scores[best_job]})
+                    scored += 1
+                out.write(json.dumps(record) + "\n")
+            out.flush()
+            batch.clear()
+            elapsed = time.perf_counter() - start
+            print(f"   {scored + failed}/{len(pending)} done, {(scored + failed) / elapsed:.1f} docs/sec", file=progress)
+
+        # A bounded window keeps extraction running while a batch is being
+        # embedded without queueing (and holding the text of) every file
+        window = deque()
+        sources = iter(pending)
+        for source in sources:
+            window.append(pool.submit(_extract_source, source))
+            if len(window) >= 2 * batch_size:
+                break
+        while window:
+            batch.append(window.popleft().result())
+            source = next(sources, None)
+            if source is not None:
+                window.append(pool.submit(_extract_source, source))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "scored": scored,
+        "failed": failed,
+        "skipped": len(done),
+        "seconds": round(elapsed, 2),
+        "docs_per_sec": round((scored + failed) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def write_ranked_csv(output_path: str, csv_path: str, job_name: str = None):
+    """Writes all scored resumes from output_path to csv_path, best first."""
+    records = []
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "scores" in record:
+                records.append(record)
+
+    def score_of(record):
+        return record["scores"].get(job_name, 0) if job_name else record["best_score"]
+
+    records.sort(key=score_of, reverse=True)
+    job_names = list(records[0]["scores"]) if records else []
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "resume", "best_job", "best_score", *job_names])
+        for rank, record in enumerate(records, start=1):
+            writer.writerow([
+                rank, record["resume"], record["best_job"], record["best_score"],
+                *(record["scores"].get(name, "") for name in job_names),
+            ])
+    return len(records)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    TTL cache of parsed LLM tool responses keyed on (tool, model, prompt hash).
+
+    A bounded in-memory LRU fronts an optional SQLite file so cached answers
+    survive restarts and are shared between worker processes. Each entry
+    remembers how long the upstream call took, so hits can be reported as
+    upstream latency saved.
+    """
+
+    def __init__(self, ttl_seconds: float = 86400, max_entries: int = 5000, disk_path: str = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self._memory = OrderedDict()  # key -> (expires_at, value, latency_seconds)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+        if disk_path:
+            if os.path.dirname(disk_path):
+                os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            conn = self._conn()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, latency REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_expiry ON responses (expires_at)")
+            conn.commit()
+
+    @staticmethod
+    def key(tool: str, model_name: str, prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{tool}:{model_name}:{prompt_hash}"
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """Returns (found, value)."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry[2]
+                return True, entry[1]
+            if entry is not None:
+                del self._memory[key]
+
+        if self.disk_path:
+            row = self._conn().execute(
+                "SELECT value, latency, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                with self._lock:
+                    self._remember(key, (row[2], value, row[1]))
+                    self.hits += 1
+                    self.saved_seconds += row[1]
+                return True, value
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def put(self, key: str, value, latency_seconds: float):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, (expires_at, value, latency_seconds))
+        if self.disk_path:
+            try:
+                conn = self._conn()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, latency, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), latency_seconds, expires_at),
+                )
+                conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                    "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Response cache disk write failed: {e}")
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "upstream_seconds_saved": round(self.saved_seconds, 3),
+            }
@@ -0,0 +1,284 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+from core.config import settings
+from core.file_lock import file_lock
+from core.vector_search import IVFIndex, top_k
+from services.matcher import EMBEDDING_ID, encode_texts
+
+logger = logging.getLogger(__name__)
+
+
+class ResumeIndex:
+    """
+    Persistent vector index of resume embeddings for reverse search.
+
+    Vectors live in an append-only float32 file that is memory-mapped for
+    search; an append-only log records which document owns each row and
+    which documents were deleted. Deletes are tombstones until compact()
+    rewrites both files. Search is exact (one matmul over all live rows) or
+    approximate through an IVF index that new rows are assigned into.
+
+    Several processes may share index_dir: writers append under a file
+    lock, and every operation first catches up with rows and deletes other
+    processes have logged.
+    """
+
+    def __init__(self, index_dir: str, encode_fn=encode_texts, model_id: str = EMBEDDING_ID):
+        # One subdirectory per embedding model and backend: their vectors must never mix
+        self.index_dir = os.path.join(index_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_id))
+        self.encode_fn = encode_fn
+        self.model_id = model_id
+        self._lock = threading.Lock()
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._vectors_path = os.path.join(self.index_dir, "vectors.f32")
+        self._log_path = os.path.join(self.index_dir, "rows.jsonl")
+        self._meta_path = os.path.join(self.index_dir, "meta.json")
+        self._ivf_path = os.path.join(self.index_dir, "ivf.npz")
+        self._lock_path = os.path.join(self.index_dir, "write.lock")
+        self._load()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, document_id):
+        return document_id in self._rows
+
+    def add(self, document_id: str, filename: str, text: str) -> bool:
+        """Embeds and indexes a resume. Returns False if it is already indexed."""
+        if document_id in self._rows or not text.strip():
+            return False
+        vector = np.asarray(self.encode_fn([text]), dtype=np.float32)
+        with self._lock, file_lock(self._lock_path):
+            self._sync()
+            if document_id in self._rows:
+                return False
+            self._append([(document_id, filename)], vector)
+        return True
+
+    def delete(self, document_id: str) -> bool:
+        with self._lock, file_lock(self._lock_path):
+            self._sync()
+            if document_id not in self._rows:
+                return False
+            with open(self._log_path, "a") as f:
+                f.write(json.dumps({"delete": document_id}) + "\n")
+            self._sync()
+            return True
+
+    def search(self, query_vector, k: int = 10, approximate: bool = False):
+        """Returns [{"document_id", "filename", "score"}, ...] for the k closest resumes."""
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        with self._lock:
+            self._sync()
+            if not self._rows:
+                return []
+            matrix = self._matrix()
+            if approximate:
+                if self.ivf is None:
+                    self._build_ivf()
+                indices, scores = self.ivf.search(
+                    matrix, query_vector, k, n_probe=settings.RESUME_INDEX_NPROBE, mask=self._alive
+                )
+            else:
+                all_scores = matrix @ query_vector
+                all_scores[~self._alive] = -np.inf
+                indices = top_k(all_scores, min(k, len(self._rows)))
+                scores = all_scores[indices]
+
+            return [
+                {"document_id": self._owners[i][0], "filename": self._owners[i][1], "score": round(float(s) * 100, 2)}
+                for i, s in zip(indices, scores)
+            ]
+
+    def search_text(self, job_description: str, k: int = 10, approximate: bool = False):
+        return self.search(self.encode_fn([job_description])[0], k, approximate)
+
+    def build_ivf(self, n_lists: int = None):
+        """(Re)clusters the live rows for approximate search."""
+        with self._lock:
+            self._sync()
+            if self._rows:
+                self._build_ivf(n_lists)
+
+    def _build_ivf(self, n_lists=None):
+        matrix = self._matrix()
+        n_lists = n_lists or max(1, int(math.sqrt(len(self._rows))))
+        # Train on live rows only, then assign every row so indices line up
+        trained = IVFIndex.train(matrix[self._alive], n_lists)
+        self.ivf = IVFIndex(trained.centroids, np.argmax(matrix @ trained.centroids.T, axis=1))
+        self._save_ivf()
+
+    def _save_ivf(self):
+        tmp_path = os.path.join(self.index_dir, "ivf.tmp.npz")
+        self.ivf.save(tmp_path)
+        os.replace(tmp_path, self._ivf_path)
+
+    def compact(self) -> int:
+        """Drops deleted rows from disk. Returns the number of rows reclaimed."""
+        with self._lock, file_lock(self._lock_path):
+            self._sync()
+            dead = self._count - len(self._rows)
+            if dead == 0:
+                return 0
+            live_rows = np.flatnonzero(self._alive)
+            vectors = np.array(self._matrix()[live_rows])
+            owners = [self._owners[row] for row in live_rows]
+            ivf = IVFIndex(self.ivf.centroids, self.ivf.assignments[live_rows]) if self.ivf is not None else None
+
+            tmp_vectors, tmp_log = self._vectors_path + ".tmp", self._log_path + ".tmp"
+            with open(tmp_vectors, "wb") as f:
+                f.write(np.ascontiguousarray(vectors).tobytes())
+            with open(tmp_log, "w") as f:
+                for row, (document_id, filename) in enumerate(owners):
+                    f.write(json.dumps({"row": row, "id": document_id, "filename": filename}) + "\n")
+            self._view = None
+            os.replace(tmp_vectors, self._vectors_path)
+            if ivf is not None:
+                self.ivf = ivf
+                self._save_ivf()
+            # Replacing the log last gives it a new inode, which tells other processes to reload
+            os.replace(tmp_log, self._log_path)
+            self._load()
+            logger.info(f"Resume index compacted: reclaimed {dead} rows ({self._count} live)")
+            return dead
+
+    # ----- storage -----
+
+    def _matrix(self):
+        if self._view is None or self._view.shape[0] < self._count:
+            self._view = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._count, self._dim))
+        return self._view
+
+    def _append(self, owners, vectors):
+        # Caller holds the file lock and has just synced, so self._count is the file's row count
+        if self._dim is None:
+            self._dim = int(vectors.shape[1])
+            with open(self._meta_path, "w") as f:
+                json.dump({"model": self.model_id, "dim": self._dim}, f)
+        # Vectors first: a crash before the log line leaves an ownerless row
+        # that stays dead, never a log entry without its vector.
+        with open(self._vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self._log_path, "a") as f:
+            for offset, (document_id, filename) in enumerate(owners):
+                f.write(json.dumps({"row": self._count + offset, "id": document_id, "filename": filename}) + "\n")
+        self._sync()
+
+    def _load(self):
+        self._dim = None
+        self._count = 0          # rows physically present in the vectors file
+        self._owners = []        # row -> (document_id, filename), None if dead
+        self._rows = {}          # live document_id -> row
+        self._alive = np.zeros(0, dtype=bool)
+        self._view = None
+        self.ivf = None
+        self._log_offset = 0     # bytes of rows.jsonl already applied
+        self._log_inode = None
+
+        self._sync()
+        if self._count and os.path.exists(self._ivf_path):
+            ivf = IVFIndex.load(self._ivf_path)
+            if len(ivf.assignments) < self._count:
+                # Rows appended since the IVF was last saved join their nearest cluster
+                ivf.add(np.asarray(self._matrix()[len(ivf.assignments):]))
+            if len(ivf.assignments) == self._count:
+                self.ivf = ivf
+        if self._rows:
+            logger.info(f"Resume index loaded {len(self._rows)} resumes from {self.index_dir}")
+
+    def _sync(self):
+        """Applies rows and deletes logged (by any process) since the last sync."""
+        try:
+            log_stat = os.stat(self._log_path)
+        except FileNotFoundError:
+            log_stat = None
+        if log_stat is not None and self._log_inode is not None and log_stat.st_ino != self._log_inode:
+            # Another process compacted the index
+            self._load()
+            return
+
+        if self._dim is None:
+            if not os.path.exists(self._meta_path):
+                return
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model_id:
+                logger.warning(f"Resume index at {self.index_dir} was built with {meta.get('model')}; "
+                               f"rebuild it for {self.model_id}")
+            self._dim = meta["dim"]
+
+        # Read the log before sizing the vectors file: vectors are written
+        # first, so every complete log line refers to a row that exists.
+        entries = []
+        if log_stat is not None:
+            self._log_inode = log_stat.st_ino
+            if log_stat.st_size > self._log_offset:
+                with open(self._log_path, "rb") as f:
+                    f.seek(self._log_offset)
+                    data = f.read()
+                complete = data.rfind(b"\n") + 1  # a writer may be mid-line
+                self._log_offset += complete
+                for line in data[:complete].splitlines():
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+
+        count = os.path.getsize(self._vectors_path) // (self._dim * 4) if os.path.exists(self._vectors_path) else 0
+        if count > self._count:
+            previous = self._count
+            self._owners.extend([None] * (count - previous))
+            self._alive = np.concatenate([self._alive, np.zeros(count - previous, dtype=bool)])
+            self._count = count
+            if self.ivf is not None:
+                self.ivf.add(np.asarray(self._matrix()[previous:]))
+
+        for entry in entries:
+            if "delete" in entry:
+                row = self._rows.pop(entry["delete"], None)
+                if row is not None:
+                    self._owners[row] = None
+                    self._alive[row] = False
+            elif entry["row"] < self._count:
+                previous = self._rows.get(entry["id"])
+                if previous is not None and previous != entry["row"]:
+                    self._owners[previous] = None
+                    self._alive[previous] = False
+                self._owners[entry["row"]] = (entry["id"], entry["filename"])
+                self._alive[entry["row"]] = True
+                self._rows[entry["id"]] = entry["row"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._sync()
+            return {
+                "model": self.model_id,
+                "resumes": len(self._rows),
+                "rows": self._count,
+                "deleted_rows": self._count - len(self._rows),
+                "dim": self._dim,
+                "ivf_lists": len(self.ivf.centroids) if self.ivf is not None else 0,
+            }
+
+
+_resume_index = None
+_resume_index_lock = threading.Lock()
+
+
+def get_resume_index():
+    """Shared index under RESUME_INDEX_DIR, or None when indexing is disabled."""
+    global _resume_index
+    if not settings.RESUME_INDEX_DIR:
+        return None
+    with _resume_index_lock:
+        if _resume_index is None:
+            _resume_index = ResumeIndex(settings.RESUME_INDEX_DIR)
+    return _resume_index
@@ -1,42 +1,33 @@
-import google.generativeai as genai
 from core.config import settings
+from core.models import registry
+from core.singleflight import SingleFlight
+from services.llm import create_llm_provider
+from services.response_cache import ResponseCache
 import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 class ResumeTools:
     def __init__(self):
-        if not settings.GOOGLE_API_KEY:
-            raise ValueError("Google API Key required for Resume Tools")
-        genai.configure(api_key=settings.GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel('gemini-pro')
+        self.provider = create_llm_provider(settings.TOOLS_MODEL or None)
+        # Part of every cache key, so answers from different models never mix
+        self.model_name = self.provider.model_name
 
-    def extract_skills(self, text: str):
-        """Extracts technical and soft skills from text."""
-        prompt = f"""
+    # ----- prompts -----
+
+    def _skills_prompt(self, text: str) -> str:
+        return f"""
         Extract all technical skills, soft skills, and tools from the following text.
         Return ONLY a JSON list of strings, e.g. ["Python", "Leadership", "Excel"].
         Do not output markdown or explanations.
-        
+
         Text: {text[:4000]}
         """
-        try:
-            response = self.model.generate_content(prompt)
-            # robust cleanup
-            clean_text = response.text.strip()
-            if clean_text.startswith("```json"):
-                clean_text = clean_text[7:]
-            if clean_text.endswith("```"):
-                clean_text = clean_text[:-3]
-            return json.loads(clean_text)
-        except Exception as e:
-            logger.error(f"Skill extraction failed: {e}")
-            return []
 
-    def analyze_gap(self, resume_text: str, job_description: str):
-        """Analyzes gaps between resume and job description."""
-        prompt = f"""
+    def _gap_prompt(self, resume_text: str, job_description: str) -> str:
+        return f"""
         Compare the below Resume and Job Description.
         Identify matched skills and missing skills.
         Return ONLY valid JSON:
@@ -49,52 +40,153 @@ class ResumeTools:
         Resume: {resume_text[:2000]}
         Job Description: {job_description[:2000]}
         """
-        try:
-            response = self.model.generate_content(prompt)
-            clean_text = response.text.strip()
-            if clean_text.startswith("```json"):
-                clean_text = clean_text[7:]
-            if clean_text.endswith("```"):
-                clean_text = clean_text[:-3]
-            return json.loads(clean_text)
-        except Exception as e:
-            logger.error(f"Gap analysis failed: {e}")
-            return {"error": str(e)}
 
-    def rewrite_section(self, text: str, target_keywords: list):
-        """Rewrites text to include keywords naturally."""
-        prompt = f"""
+    def _rewrite_prompt(self, text: str, target_keywords: list) -> str:
+        return f"""
         Rewrite this resume section to include keywords: {', '.join(target_keywords)}.
         Keep it professional.
         original: {text}
         """
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            logger.error(f"Rewrite failed: {e}")
-            return text
 
-    def suggest_roles(self, resume_text: str):
-        """Suggests suitable job roles based on resume."""
-        prompt = f"""
+    def _roles_prompt(self, resume_text: str) -> str:
+        return f"""
         Suggest 5 job titles for this resume.
         Return ONLY a JSON list of strings, e.g. ["Software Engineer", "Data Analyst"].
         No markdown.
-        
+
         Resume: {resume_text[:3000]}
         """
+
+    def _review_prompt(self, resume_text: str, job_description: str) -> str:
+        return f"""
+        Review the below Resume against the Job Description.
+        Return ONLY valid JSON:
+        {{
+            "fit_summary": "Two sentences on overall fit.",
+            "strengths": ["strength1", "strength2"],
+            "gaps": ["missing or weak requirement"],
+            "recommendations": ["concrete change to the resume"],
+            "suggested_roles": ["Job Title"]
+        }}
+
+        Resume: {resume_text[:3000]}
+        Job Description: {job_description[:2000]}
+        """
+
+    @staticmethod
+    def _parse_json(raw_text: str):
+        # robust cleanup
+        clean_text = raw_text.strip()
+        if clean_text.startswith("```json"):
+            clean_text = clean_text[7:]
+        if clean_text.endswith("```"):
+            clean_text = clean_text[:-3]
+        return json.loads(clean_text)
+
+    # ----- sync / async call paths -----
+
+    # Concurrent identical prompts share one upstream call via tool_flight. use_cache=False
+    # opts out of both the cache and the sharing: the caller always gets its own fresh answer.
+
+    def _run(self, tool: str, label: str, prompt: str, parse, fallback, use_cache: bool = True):
+        key = ResponseCache.key(tool, self.model_name, prompt)
+        if use_cache:
+            found, cached = response_cache.get(key)
+            if found:
+                return cached
+
+        def call():
+            start = time.perf_counter()
+            result = parse(self.provider.generate(prompt))
+            if use_cache:
+                # Only successful, parsed results are cached; failures retry next time
+                response_cache.put(key, result, time.perf_counter() - start)
+            return result
+
+        try:
+            return tool_flight.do(key, call) if use_cache else call()
+        except Exception as e:
+            logger.error(f"{label} failed: {e}")
+            return fallback(e)
+
+    async def _arun(self, tool: str, label: str, prompt: str, parse, fallback, use_cache: bool = True):
+        key = ResponseCache.key(tool, self.model_name, prompt)
+        if use_cache:
+            found, cached = response_cache.get(key)
+            if found:
+                return cached
+
+        async def call():
+            start = time.perf_counter()
+            result = parse(await self.provider.generate_async(prompt))
+            if use_cache:
+                response_cache.put(key, result, time.perf_counter() - start)
+            return result
+
         try:
-            response = self.model.generate_content(prompt)
-            clean_text = response.text.strip()
-            if clean_text.startswith("```json"):
-                clean_text = clean_text[7:]
-            if clean_text.endswith("```"):
-                clean_text = clean_text[:-3]
-            return json.loads(clean_text)
+            return await (tool_flight.do_async(key, call) if use_cache else call())
         except Exception as e:
-            logger.error(f"Role suggestion failed: {e}")
-            return []
+            logger.error(f"{label} failed: {e}")
+            return fallback(e)
+
+    # ----- tools -----
+
+    def extract_skills(self, text: str, use_cache: bool = True):
+        """Extracts technical and soft skills from text."""
+        return self._run("extract_skills", "Skill extraction", self._skills_prompt(text),
+                         self._parse_json, lambda e: [], use_cache)
+
+    async def extract_skills_async(self, text: str, use_cache: bool = True):
+        return await self._arun("extract_skills", "Skill extraction", self._skills_prompt(text),
+                                self._parse_json, lambda e: [], use_cache)
+
+    def analyze_gap(self, resume_text: str, job_description: str, use_cache: bool = True):
+        """Analyzes gaps between resume and job description."""
+        return self._run("analyze_gap", "Gap analysis", self._gap_prompt(resume_text, job_description),
+                         self._parse_json, lambda e: {"error": str(e)}, use_cache)
+
+    async def analyze_gap_async(self, resume_text: str, job_description: str, use_cache: bool = True):
+        return await self._arun("analyze_gap", "Gap analysis", self._gap_prompt(resume_text, job_description),
+                                self._parse_json, lambda e: {"error": str(e)}, use_cache)
+
+    def rewrite_section(self, text: str, target_keywords: list, use_cache: bool = True):
+        """Rewrites text to include keywords naturally."""
+        return self._run("rewrite_section", "Rewrite", self._rewrite_prompt(text, target_keywords),
+                         lambda raw: raw, lambda e: text, use_cache)
+
+    async def rewrite_section_async(self, text: str, target_keywords: list, use_cache: bool = True):
+        return await self._arun("rewrite_section", "Rewrite", self._rewrite_prompt(text, target_keywords),
+                                lambda raw: raw, lambda e: text, use_cache)
+
+    def review(self, resume_text: str, job_description: str, use_cache: bool = True):
+        """Fit summary, gaps, recommendations and roles from one combined prompt."""
+        return self._run("review", "Combined review", self._review_prompt(resume_text, job_description),
+                         self._parse_json, lambda e: {"error": str(e)}, use_cache)
+
+    async def review_async(self, resume_text: str, job_description: str, use_cache: bool = True):
+        return await self._arun("review", "Combined review", self._review_prompt(resume_text, job_description),
+                                self._parse_json, lambda e: {"error": str(e)}, use_cache)
+
+    def suggest_roles(self, resume_text: str, use_cache: bool = True):
+        """Suggests suitable job roles based on resume."""
+        return self._run("suggest_roles", "Role suggestion", self._roles_prompt(resume_text),
+                         self._parse_json, lambda e: [], use_cache)
+
+    async def suggest_roles_async(self, resume_text: str, use_cache: bool = True):
+        return await self._arun("suggest_roles", "Role suggestion", self._roles_prompt(resume_text),
+                                self._parse_json, lambda e: [], use_cache)
+
+tool_flight = SingleFlight("tools")
+
+# Shared across ResumeTools instances (and, with a disk path, across workers)
+response_cache = ResponseCache(
+    ttl_seconds=settings.TOOL_CACHE_TTL_S,
+    max_entries=settings.TOOL_CACHE_SIZE,
+    disk_path=settings.TOOL_CACHE_PATH or None
+)
+
+# Singleton, built on first use so a missing API key doesn't break import
+registry.register("resume_tools", ResumeTools)
 
-# Singleton
-resume_tools = ResumeTools()
+def get_resume_tools() -> ResumeTools:
+    return registry.get("resume_tools")
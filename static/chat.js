@@ -130,7 +130,8 @@ async function sendMessage() {
     showTypingIndicator();
 
     try {
-        const response = await fetch('/chatbot/message', {
+        const startTime = performance.now();
+        const response = await fetch('/chatbot/message/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -141,25 +142,42 @@ async function sendMessage() {
             })
         });
 
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
             throw new Error('Failed to send message');
         }
 
-        const data = await response.json();
-
-        // Remove typing indicator
-        removeTypingIndicator();
-
-        // Add assistant response
-        addMessage('assistant', data.answer, data.confidence);
-
-        // Update suggestions
-        if (data.suggestions && data.suggestions.length > 0) {
-            renderSuggestions(data.suggestions);
-        }
-
-        // Update conversation history
-        conversationHistory = data.conversation_history;
+        // Render tokens into a single assistant bubble as they arrive
+        let streamedAnswer = '';
+        let contentDiv = null;
+        let firstTokenMs = null;
+
+        await readEventStream(response, (eventType, data) => {
+            if (eventType === 'token') {
+                if (!contentDiv) {
+                    firstTokenMs = Math.round(performance.now() - startTime);
+                    removeTypingIndicator();
+                    contentDiv = addMessage('assistant', '');
+                }
+                streamedAnswer += data.text;
+                updateMessageContent(contentDiv, streamedAnswer);
+            } else if (eventType === 'done') {
+                removeTypingIndicator();
+                if (!contentDiv) {
+                    contentDiv = addMessage('assistant', data.answer);
+                }
+                if (data.suggestions && data.suggestions.length > 0) {
+                    renderSuggestions(data.suggestions);
+                }
+                conversationHistory.push(
+                    { role: 'user', content: message },
+                    { role: 'assistant', content: data.answer }
+                );
+                console.log(`⏱️ TTFT: ${firstTokenMs ?? '-'} ms (client), ${data.ttft_ms} ms (server), total ${data.total_ms} ms`);
+            } else if (eventType === 'error') {
+                removeTypingIndicator();
+                addMessage('assistant', data.answer || 'Sorry, I encountered an error. Please try again.', 0);
+            }
+        });
 
     } catch (error) {
         console.error('Error sending message:', error);
@@ -171,6 +189,33 @@ async function sendMessage() {
     }
 }
 
+// Parses a text/event-stream body and calls onEvent(type, data) per event
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventType = 'message';
+            let dataLine = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) eventType = line.slice(7);
+                else if (line.startsWith('data: ')) dataLine += line.slice(6);
+            });
+            if (dataLine) onEvent(eventType, JSON.parse(dataLine));
+        }
+    }
+}
+
 // ===== MESSAGE RENDERING =====
 function addMessage(role, content, confidence = null) {
     const messageDiv = document.createElement('div');
@@ -208,6 +253,14 @@ function addMessage(role, content, confidence = null) {
 
     messagesContainer.appendChild(messageDiv);
     scrollToBottom();
+    return contentDiv;
+}
+
+function updateMessageContent(contentDiv, content) {
+    const time = contentDiv.querySelector('.message-time');
+    contentDiv.innerHTML = content.replace(/\n/g, '<br>');
+    if (time) contentDiv.appendChild(time);
+    scrollToBottom();
 }
 
 function renderMessages() {
@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    pytest.importorskip("fastapi.testclient")
+    # main mounts ./static relative to the working directory
+    monkeypatch.chdir(ROOT)
+    main = pytest.importorskip("main")
+    from fastapi.testclient import TestClient
+    return main, TestClient(main.app)
+
+
+def test_saturated_pool_returns_503(client, monkeypatch):
+    from core.executor import pools
+
+    _, http = client
+    # As if max_queue requests were already waiting for the io pool
+    monkeypatch.setattr(pools["io"], "queued", pools["io"].max_queue)
+
+    response = http.delete("/documents/" + "a" * 64)
+    assert response.status_code == 503
+    assert "saturated" in response.json()["detail"]
@@ -0,0 +1,19 @@
+import pytest
+
+from core.backends import parity
+
+# Each model needs these runtimes on top of torch/transformers; onnx also needs optimum
+RUNTIMES = {
+    "embedding": ["torch", "sentence_transformers"],
+    "qa": ["torch", "transformers"],
+    "rewriter": ["torch", "transformers"],
+}
+
+
+@pytest.mark.parametrize("backend", ["int8", "onnx"])
+@pytest.mark.parametrize("name", list(RUNTIMES))
+def test_backend_matches_torch(name, backend):
+    for module in RUNTIMES[name] + (["optimum.onnxruntime"] if backend == "onnx" else []):
+        pytest.importorskip(module)
+    # Same thresholds as `python -m core.backends parity`
+    assert parity(name, backend, tolerance=2.0, min_similarity=0.8)
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.batching import MicroBatcher
+
+
+def doubler(batches):
+    def batch_fn(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+    return batch_fn
+
+
+def test_items_submitted_together_share_a_batch():
+    batches = []
+    batcher = MicroBatcher("test", doubler(batches), max_batch_size=8, max_wait_ms=20, timeout_s=5)
+    assert batcher.submit_many(list(range(5))) == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert batcher.stats()["items"] == 5
+
+
+def test_batches_are_capped_at_max_batch_size():
+    batches = []
+    batcher = MicroBatcher("test", doubler(batches), max_batch_size=2, max_wait_ms=20, timeout_s=5)
+    assert batcher.submit_many([1, 2, 3]) == [2, 4, 6]
+    assert max(len(batch) for batch in batches) == 2
+
+
+def test_async_submit():
+    batcher = MicroBatcher("test", doubler([]), max_batch_size=8, max_wait_ms=10, timeout_s=5)
+
+    async def scenario():
+        return await asyncio.gather(*[batcher.submit_async(n) for n in range(3)])
+
+    assert asyncio.run(scenario()) == [0, 2, 4]
+
+
+def test_cancelled_items_are_skipped():
+    batches = []
+    batcher = MicroBatcher("test", doubler(batches), max_batch_size=8, max_wait_ms=50, timeout_s=5)
+    dropped = batcher.submit_future(1)
+    kept = batcher.submit_future(2)
+    assert dropped.cancel()
+    assert kept.result(timeout=5) == 4
+    assert batches == [[2]]
+    assert batcher.cancelled == 1
+
+
+def test_timeout_raises_and_drops_queued_items():
+    gate = threading.Event()
+    batches = []
+
+    def slow(items):
+        gate.wait(5)
+        batches.append(list(items))
+        return items
+
+    batcher = MicroBatcher("test", slow, max_batch_size=1, max_wait_ms=0, timeout_s=0.05)
+    with pytest.raises(TimeoutError):
+        batcher.submit_many([1, 2])
+    gate.set()
+    # The worker finishes the running item, skips the abandoned one and keeps serving
+    assert batcher.submit(3) == 3
+    assert [1] in batches and [2] not in batches
+
+
+def test_failed_batch_reaches_callers_and_worker_survives():
+    def flaky(items):
+        if "bad" in items:
+            raise ValueError("boom")
+        return items
+
+    batcher = MicroBatcher("test", flaky, max_batch_size=8, max_wait_ms=0, timeout_s=5)
+    with pytest.raises(ValueError):
+        batcher.submit("bad")
+    assert batcher.submit("good") == "good"
+
+
+def test_wrong_result_count_is_an_error():
+    batcher = MicroBatcher("test", lambda items: items[:-1], max_batch_size=8, max_wait_ms=20, timeout_s=5)
+    with pytest.raises(RuntimeError):
+        batcher.submit_many([1, 2])
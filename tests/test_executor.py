@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.executor import BoundedPool, PoolSaturatedError
+
+
+def test_run_returns_results_and_counts():
+    pool = BoundedPool("test", 2)
+
+    async def scenario():
+        return await asyncio.gather(*[pool.run(pow, 2, n) for n in range(4)])
+
+    assert asyncio.run(scenario()) == [1, 2, 4, 8]
+    stats = pool.stats()
+    assert stats["completed"] == 4 and stats["active"] == 0 and stats["queued"] == 0
+    pool.shutdown()
+
+
+def test_full_queue_sheds_requests():
+    pool = BoundedPool("test", 1, max_queue=1)
+    gate = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(gate.wait, 5))
+        await asyncio.sleep(0.05)
+        waiting = asyncio.ensure_future(pool.run(lambda: "queued"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(lambda: "shed")
+        gate.set()
+        return await running, await waiting
+
+    assert asyncio.run(scenario()) == (True, "queued")
+    assert pool.rejected == 1 and pool.queued == 0 and pool.active == 0
+    pool.shutdown()
+
+
+def test_cancelled_calls_free_their_slot():
+    pool = BoundedPool("test", 1)
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run_coroutine(asyncio.sleep, 10))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(pool.run_coroutine(asyncio.sleep, 10))
+        await asyncio.sleep(0.01)
+        assert pool.active == 1 and pool.queued == 1
+        queued.cancel()
+        running.cancel()
+        await asyncio.gather(running, queued, return_exceptions=True)
+        assert pool.active == 0 and pool.queued == 0
+        # The single slot is free again
+        return await asyncio.wait_for(pool.run_coroutine(asyncio.sleep, 0, "ok"), timeout=1)
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_stream_releases_slot_when_consumer_stops_early():
+    pool = BoundedPool("test", 1)
+    closed = threading.Event()
+
+    def numbers():
+        try:
+            yield from range(100)
+        finally:
+            closed.set()
+
+    async def scenario():
+        stream = pool.stream(numbers)
+        assert [await stream.__anext__() for _ in range(3)] == [0, 1, 2]
+        await stream.aclose()
+        assert pool.active == 0
+        return await asyncio.wait_for(pool.run(lambda: "next"), timeout=1)
+
+    assert asyncio.run(scenario()) == "next"
+    assert closed.is_set()
+    pool.shutdown()
+
+
+def test_failures_are_counted_and_raised():
+    pool = BoundedPool("test", 1)
+
+    def broken():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(pool.run(broken))
+    assert pool.failed == 1 and pool.active == 0
+    pool.shutdown()
@@ -0,0 +1,25 @@
+import threading
+import time
+
+import services.gemini_agent as gemini_agent
+
+
+def test_concurrent_first_calls_build_one_agent(monkeypatch):
+    built = []
+
+    class SlowAgent:
+        def __init__(self):
+            time.sleep(0.05)
+            built.append(self)
+
+    monkeypatch.setattr(gemini_agent, "ResumeAnalystAgent", SlowAgent)
+    monkeypatch.setattr(gemini_agent, "agent", None)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gemini_agent.get_agent())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert all(result is built[0] for result in results)
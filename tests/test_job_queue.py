@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from core.job_queue import JobQueue
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    def make(**options):
+        return JobQueue(str(tmp_path / "jobs.db"), **options)
+    return make
+
+
+def test_claims_follow_lane_priority_then_age(make_queue):
+    queue = make_queue()
+    bulk = queue.submit("match_batch", {}, priority="bulk")
+    first = queue.submit("parse", {"n": 1})
+    second = queue.submit("parse", {"n": 2})
+    chat = queue.submit("chat", {}, priority="interactive")
+
+    assert queue.get(bulk)["position"] == 3
+    assert [queue.claim("w")["id"] for _ in range(4)] == [chat, first, second, bulk]
+    assert queue.claim("w") is None
+
+
+def test_claim_only_serves_requested_lanes(make_queue):
+    queue = make_queue()
+    queue.submit("match_batch", {}, priority="bulk")
+    assert queue.claim("w", lanes=["interactive"]) is None
+    assert queue.claim("w", lanes=["bulk"])["task"] == "match_batch"
+
+
+def test_unknown_lane_is_rejected(make_queue):
+    with pytest.raises(ValueError):
+        make_queue().submit("parse", {}, priority="urgent")
+
+
+def test_complete_and_fail_need_the_lease_holder(make_queue):
+    queue = make_queue()
+    job_id = queue.submit("parse", {})
+    queue.claim("w1")
+    assert not queue.complete(job_id, "w2", {"ok": True})
+    assert queue.complete(job_id, "w1", {"ok": True})
+    assert queue.get(job_id)["status"] == "done" and queue.get(job_id)["result"] == {"ok": True}
+    assert not queue.fail(job_id, "w1", "too late")
+
+
+def test_expired_lease_is_requeued_and_old_worker_loses_it(make_queue):
+    queue = make_queue(timeout_seconds=0.05, max_attempts=2)
+    job_id = queue.submit("parse", {})
+    assert queue.claim("w1")["attempt"] == 1
+    time.sleep(0.1)
+
+    job = queue.claim("w2")
+    assert job["id"] == job_id and job["attempt"] == 2
+    assert not queue.heartbeat(job_id, "w1")
+    assert not queue.complete(job_id, "w1", {})
+    assert queue.heartbeat(job_id, "w2")
+    assert queue.complete(job_id, "w2", {"by": "w2"})
+
+
+def test_heartbeats_keep_a_long_job_leased(make_queue):
+    queue = make_queue(timeout_seconds=0.1)
+    job_id = queue.submit("parse", {})
+    queue.claim("w1")
+    for _ in range(4):
+        time.sleep(0.05)
+        assert queue.heartbeat(job_id, "w1")
+        assert queue.claim("w2") is None
+    assert queue.complete(job_id, "w1", {})
+
+
+def test_job_fails_after_max_attempts(make_queue):
+    queue = make_queue(timeout_seconds=0.05, max_attempts=1)
+    job_id = queue.submit("parse", {})
+    queue.claim("w1")
+    time.sleep(0.1)
+
+    assert queue.claim("w2") is None
+    job = queue.get(job_id)
+    assert job["status"] == "failed" and job["error"] == "Worker lost"
+
+
+def test_only_queued_jobs_can_be_cancelled(make_queue):
+    queue = make_queue()
+    queued = queue.submit("parse", {})
+    assert queue.cancel(queued)
+    assert queue.get(queued)["status"] == "cancelled"
+    running = queue.submit("parse", {})
+    queue.claim("w1")
+    assert not queue.cancel(running)
+
+
+def test_finished_jobs_are_purged_after_ttl(make_queue):
+    queue = make_queue(result_ttl_seconds=0.05)
+    old = queue.submit("parse", {})
+    queue.claim("w")
+    queue.complete(old, "w", {})
+    time.sleep(0.1)
+    new = queue.submit("parse", {})
+    queue.claim("w")
+    queue.complete(new, "w", {})
+    assert queue.get(old) is None and queue.get(new) is not None
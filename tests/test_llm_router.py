@@ -0,0 +1,91 @@
+import asyncio
+
+from core.rate_limit import UpstreamLimiter
+from services.llm import LimitedProvider, LLMProvider
+from services.llm_router import Backend, RoutedProvider, TransformersProvider
+
+
+class FakeProvider(LLMProvider):
+    def __init__(self, name, delay_s=0.0, answer=None):
+        self.name = name
+        self.model_name = name
+        self.delay_s = delay_s
+        self.answer = answer or name
+        self.calls = 0
+
+    def generate(self, prompt):
+        self.calls += 1
+        return self.answer
+
+    def chat(self, history, message):
+        self.calls += 1
+        return self.answer
+
+    async def generate_async(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        return self.answer
+
+    async def chat_async(self, history, message):
+        return await self.generate_async(message)
+
+
+def make_limiter(max_concurrency):
+    return UpstreamLimiter("test", requests_per_minute=0, burst=1, max_retries=0, backoff_base_s=0.001,
+                           backoff_max_s=0.001, retry_budget_ratio=0.0, min_concurrency=1,
+                           max_concurrency=max_concurrency, latency_target_s=5.0)
+
+
+def make_router(providers, hedge_after_s=0.05, timeout_s=5.0):
+    backends = [Backend(p.name, p, cost) for cost, p in enumerate(providers)]
+    return RoutedProvider(backends, slo_s=5.0, hedge_after_s=hedge_after_s, timeout_s=timeout_s, max_error_rate=0.5)
+
+
+def test_lost_hedges_release_the_shared_limiter():
+    limiter = make_limiter(max_concurrency=4)
+    slow = LimitedProvider(FakeProvider("slow", delay_s=1.0), limiter)
+    fast = LimitedProvider(FakeProvider("fast", delay_s=0.0), limiter)
+    router = make_router([slow, fast], hedge_after_s=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*[router.generate_async("prompt") for _ in range(3)])
+
+    assert asyncio.run(scenario()) == ["fast"] * 3
+    assert router.backends[0].hedged == 3
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_timed_out_attempts_release_the_shared_limiter():
+    limiter = make_limiter(max_concurrency=2)
+    slow = LimitedProvider(FakeProvider("slow", delay_s=1.0), limiter)
+    fallback = LimitedProvider(FakeProvider("fallback"), limiter)
+    # Hedging is effectively off, so the slow call is abandoned at the timeout and fails over
+    router = make_router([slow, fallback], hedge_after_s=10.0, timeout_s=0.05)
+
+    assert asyncio.run(router.chat_async([], "hi")) == "fallback"
+    assert router.failovers == 1
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_generate_skips_chat_only_backends():
+    distilbert = TransformersProvider("distilbert")
+    gemini = FakeProvider("gemini")
+    router = make_router([distilbert, gemini])
+
+    assert [b.name for b in router.order("generate")] == ["gemini"]
+    assert [b.name for b in router.order("chat")] == ["distilbert", "gemini"]
+    assert router.generate("prompt") == "gemini"
+    assert asyncio.run(router.generate_async("prompt")) == "gemini"
+    assert router.backends[0].tracker.calls == 0
+    assert router.failovers == 0
+
+
+def test_failed_backend_fails_over():
+    class Broken(FakeProvider):
+        def generate(self, prompt):
+            raise ConnectionError("down")
+
+    router = make_router([Broken("broken"), FakeProvider("backup")])
+    assert router.generate("prompt") == "backup"
+    assert router.failovers == 1
+    assert router.backends[0].tracker.errors == 1
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.rate_limit import AdaptiveConcurrency, RetryBudget, TokenBucket, UpstreamLimiter
+
+
+def make_limiter(**overrides):
+    options = dict(requests_per_minute=0, burst=1, max_retries=2, backoff_base_s=0.001, backoff_max_s=0.001,
+                   retry_budget_ratio=1.0, min_concurrency=1, max_concurrency=2, latency_target_s=5.0)
+    options.update(overrides)
+    return UpstreamLimiter("test", **options)
+
+
+class RateLimited(Exception):
+    def __str__(self):
+        return "429 quota exceeded"
+
+
+def test_call_async_releases_slot_when_cancelled():
+    limiter = make_limiter()
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(limiter.call_async(slow))
+        await started.wait()
+        assert limiter.concurrency.in_flight == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_call_async_after_cancellations_does_not_block():
+    limiter = make_limiter(max_concurrency=1)
+
+    async def scenario():
+        for _ in range(3):
+            task = asyncio.create_task(limiter.call_async(asyncio.sleep, 10))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        async def ok():
+            return "ok"
+
+        return await asyncio.wait_for(limiter.call_async(ok), timeout=1)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_call_releases_slot_on_base_exception():
+    limiter = make_limiter()
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        limiter.call(interrupted)
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_stream_releases_slot_when_consumer_stops_early():
+    limiter = make_limiter()
+    stream = limiter.stream(lambda: iter(["a", "b", "c"]))
+    assert next(stream) == "a"
+    stream.close()
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_rate_limit_error_is_retried_and_halves_the_limit():
+    limiter = make_limiter(max_concurrency=8)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RateLimited()
+        return "ok"
+
+    assert limiter.call(flaky) == "ok"
+    assert limiter.retries == 1 and limiter.rate_limited == 1
+    assert limiter.concurrency.limit < 8
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_non_retryable_error_is_raised_without_retry():
+    limiter = make_limiter()
+
+    def broken():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        limiter.call(broken)
+    assert limiter.retries == 0 and limiter.failures == 1
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_adaptive_concurrency_blocks_at_the_limit():
+    concurrency = AdaptiveConcurrency(initial=1, minimum=1, maximum=1, latency_target_s=1.0)
+    concurrency.acquire()
+    entered = threading.Event()
+
+    def second():
+        concurrency.acquire()
+        entered.set()
+
+    thread = threading.Thread(target=second, daemon=True)
+    thread.start()
+    assert not entered.wait(0.05)
+    concurrency.release(latency_s=0.01)
+    assert entered.wait(1)
+    concurrency.release()
+    thread.join(1)
+    assert concurrency.in_flight == 0
+
+
+def test_adaptive_concurrency_aimd():
+    concurrency = AdaptiveConcurrency(initial=4, minimum=1, maximum=8, latency_target_s=1.0)
+    concurrency.acquire()
+    concurrency.release(latency_s=0.1)
+    assert concurrency.limit == pytest.approx(4.25)
+    concurrency.acquire()
+    concurrency.release(overloaded=True)
+    assert concurrency.limit == pytest.approx(2.125)
+    for _ in range(5):
+        concurrency.acquire()
+        concurrency.release(latency_s=5.0)
+    assert concurrency.limit == 1
+
+
+def test_token_bucket_waits_once_empty():
+    bucket = TokenBucket(rate_per_s=100, burst=2)
+    assert bucket.acquire() == 0 and bucket.acquire() == 0
+    start = time.monotonic()
+    assert bucket.acquire() > 0
+    assert time.monotonic() - start >= 0.005
+    bucket.drain()
+    assert bucket.tokens <= 1
+
+
+def test_retry_budget_caps_retries():
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    for _ in range(4):
+        budget.record_request()
+    assert [budget.try_spend() for _ in range(4)] == [True, True, True, False]
+    assert budget.exhausted == 1
@@ -0,0 +1,29 @@
+import numpy as np
+
+from utils.role_index import RoleIndex
+
+
+def one_hot_encoder(titles):
+    vectors = np.zeros((len(titles), 8), dtype=np.float32)
+    for row, title in enumerate(titles):
+        vectors[row, sum(map(ord, title)) % 8] = 1.0
+    return vectors
+
+
+def test_persisted_index_reloads(tmp_path):
+    index = RoleIndex(str(tmp_path), one_hot_encoder, model_id="model-a@torch")
+    assert index.add_titles(["Data Scientist", "Cloud Engineer"]) == 2
+
+    reloaded = RoleIndex(str(tmp_path), one_hot_encoder, model_id="model-a@torch")
+    assert reloaded.titles == ["Data Scientist", "Cloud Engineer"]
+    assert reloaded.add_titles(["Data Scientist"]) == 0
+    query = one_hot_encoder(["Cloud Engineer"])[0]
+    assert reloaded.search(query, k=1)[0][0] == "Cloud Engineer"
+
+
+def test_other_model_or_backend_never_loads_stale_vectors(tmp_path):
+    RoleIndex(str(tmp_path), one_hot_encoder, model_id="model-a@torch").add_titles(["Data Scientist"])
+
+    other = RoleIndex(str(tmp_path), one_hot_encoder, model_id="model-a@onnx")
+    assert len(other) == 0
+    assert other.index_dir != RoleIndex(str(tmp_path), one_hot_encoder, model_id="model-a@torch").index_dir
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight("test")
+    gate = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        gate.wait(5)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", work))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flight.executed + flight.shared < 5:
+        threading.Event().wait(0.005)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1 and flight.shared == 4
+    # Nothing is cached once the call completes
+    assert flight.do("key", lambda: "again") == "again"
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight("test")
+    gate = threading.Event()
+    errors = []
+
+    def broken():
+        gate.wait(5)
+        raise ValueError("boom")
+
+    def caller():
+        try:
+            flight.do("key", broken)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while flight.executed + flight.shared < 3:
+        threading.Event().wait(0.005)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 3
+
+
+def test_async_callers_share_and_a_cancelled_waiter_does_not_cancel_the_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do_async("key", work))
+        impatient = asyncio.ensure_future(flight.do_async("key", work))
+        follower = asyncio.ensure_future(flight.do_async("key", work))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await leader, await follower
+
+    assert asyncio.run(scenario()) == ("result", "result")
+    assert len(calls) == 1
+    assert flight.stats()["in_flight"] == 0
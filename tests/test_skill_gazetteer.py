@@ -0,0 +1,32 @@
+import pytest
+
+from utils.skill_gazetteer import SKILLS, SkillGazetteer
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return SkillGazetteer(SKILLS)
+
+
+@pytest.mark.parametrize("text", [
+    "I was at the helm of a 5 person team, said in jest. Guard rails and node graph.",
+    "I excel at planning; a swift turnaround helped spark change across the org.",
+    "We had to go back to the drawing board and bootstrap the team from scratch.",
+    "References: Ruby Chen and Mary Jenkins, available on request.",
+    "Kept the node count low, in ts units; the tf of the signal and dl speed were fine.",
+])
+def test_everyday_prose_has_no_skills(gazetteer, text):
+    assert gazetteer.extract(text) == []
+
+
+def test_contextual_words_count_next_to_other_skills(gazetteer):
+    assert gazetteer.extract("Skills: Python, Helm, Jest, Kubernetes") == ["Helm", "Jest", "Kubernetes", "Python"]
+    assert gazetteer.extract("Ruby, Rails, Node, React") == ["Node.js", "React", "Ruby", "Ruby on Rails"]
+    assert gazetteer.extract("TS, React, Jest") == ["Jest", "React", "TypeScript"]
+    assert gazetteer.extract("TF and PyTorch for DL research") == ["Deep Learning", "PyTorch", "TensorFlow"]
+
+
+def test_unambiguous_aliases_and_phrases_still_match(gazetteer):
+    assert gazetteer.extract("Ruby on Rails developer") == ["Ruby on Rails"]
+    assert gazetteer.extract("k8s and nodejs on ci/cd") == ["CI/CD", "Kubernetes", "Node.js"]
+    assert gazetteer.extract("Advanced Excel and golang") == ["Excel", "Go"]
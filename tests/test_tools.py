@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+import pytest
+
+import services.tools as tools
+from services.llm import LLMProvider
+from services.response_cache import ResponseCache
+from services.tools import ResumeTools
+
+
+class CountingProvider(LLMProvider):
+    def __init__(self, gate=None):
+        self.calls = 0
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def generate(self, prompt):
+        self.calls += 1
+        number = self.calls
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        return f'["answer {number}"]'
+
+    async def generate_async(self, prompt):
+        return self.generate(prompt)
+
+
+@pytest.fixture
+def make_tools(monkeypatch):
+    monkeypatch.setattr(tools, "response_cache", ResponseCache(ttl_seconds=60, max_entries=100))
+
+    def make(provider):
+        instance = ResumeTools.__new__(ResumeTools)
+        instance.provider = provider
+        instance.model_name = "test-model"
+        return instance
+
+    return make
+
+
+def test_cached_calls_reuse_the_answer(make_tools):
+    resume_tools = make_tools(CountingProvider())
+    assert resume_tools.extract_skills("Python") == ["answer 1"]
+    assert resume_tools.extract_skills("Python") == ["answer 1"]
+    assert resume_tools.provider.calls == 1
+
+
+def test_opt_out_neither_reads_nor_writes_the_cache(make_tools):
+    resume_tools = make_tools(CountingProvider())
+    assert resume_tools.extract_skills("Python") == ["answer 1"]
+    assert resume_tools.extract_skills("Python", use_cache=False) == ["answer 2"]
+    assert asyncio.run(resume_tools.extract_skills_async("Python", use_cache=False)) == ["answer 3"]
+    # The opted-out answers were not stored over the cached one
+    assert resume_tools.extract_skills("Python") == ["answer 1"]
+    assert resume_tools.provider.calls == 3
+
+
+def test_opt_out_does_not_join_an_in_flight_call(make_tools):
+    gate = threading.Event()
+    resume_tools = make_tools(CountingProvider(gate))
+    results = {}
+    leader = threading.Thread(target=lambda: results.update(cached=resume_tools.extract_skills("Python")))
+    leader.start()
+    assert resume_tools.provider.entered.wait(5)
+
+    fresh = threading.Thread(target=lambda: results.update(fresh=resume_tools.extract_skills("Python", use_cache=False)))
+    fresh.start()
+    gate.set()
+    leader.join(5)
+    fresh.join(5)
+
+    assert resume_tools.provider.calls == 2
+    assert results["cached"] != results["fresh"]
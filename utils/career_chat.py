@@ -1,8 +1,13 @@
-from transformers import pipeline
+from core.models import registry
 
-chat_pipeline = pipeline("text-generation", model="gpt2")
+def _load_chat_pipeline():
+    from transformers import pipeline
+    return pipeline("text-generation", model="gpt2")
+
+registry.register("career_chat", _load_chat_pipeline)
 
 def career_advisor_bot(query):
+    chat_pipeline = registry.get("career_chat")
     intro = "You're a helpful career coach. Answer the user's question based on job market trends and resume best practices.\n\n"
     full_prompt = intro + query
     output = chat_pipeline(full_prompt, max_length=150, do_sample=True)
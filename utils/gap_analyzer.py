@@ -1,11 +1,13 @@
 from utils.skill_extractor import extract_skills
 
-def analyze_skill_gap(resume_text, job_text):
-    resume_skills = set(extract_skills(resume_text))
+def analyze_skill_gap(resume_text, job_text, resume_skills=None):
+    # Callers that already extracted the resume's skills pass them in
+    resume_skills = set(extract_skills(resume_text) if resume_skills is None else resume_skills)
     job_skills = set(extract_skills(job_text))
     missing_skills = list(job_skills - resume_skills)
     matched_skills = list(resume_skills & job_skills)
     return {
         "missing_skills": sorted(missing_skills),
-        "matched_skills": sorted(matched_skills)
+        "matched_skills": sorted(matched_skills),
+        "score": round(len(matched_skills) / len(job_skills) * 100) if job_skills else 0
     }
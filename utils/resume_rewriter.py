@@ -1,11 +1,19 @@
-from transformers import pipeline
+from core.backends import load_pipeline
+from core.batching import get_batcher
+from core.models import registry
 
-generator = pipeline("text2text-generation", model="google/flan-t5-base")
+def _load_generator():
+    return load_pipeline("rewriter")
+
+registry.register("rewriter", _load_generator)
+
+def _generate_batch(prompts):
+    outputs = registry.get("rewriter")(prompts, max_length=512, do_sample=False, batch_size=len(prompts))
+    return [output[0]["generated_text"] if isinstance(output, list) else output["generated_text"] for output in outputs]
 
 def rewrite_resume_section(section_text, target_keywords):
     prompt = (
         f"Rewrite this resume section to better align with the following job keywords: {', '.join(target_keywords)}. "
         f"Preserve the original meaning and facts:\n\n{section_text}"
     )
-    output = generator(prompt, max_length=512, do_sample=False)
-    return output[0]["generated_text"]
+    return get_batcher("rewriter", _generate_batch).submit(prompt)
@@ -0,0 +1,153 @@
+import json
+import logging
+import math
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+
+from core.config import settings
+from core.vector_search import IVFIndex, top_k
+from services.matcher import EMBEDDING_ID, encode_texts
+
+logger = logging.getLogger(__name__)
+
+
+class RoleIndex:
+    """
+    Precomputed index of normalized job-title embeddings.
+
+    Supports exact top-k search over the whole taxonomy and an optional
+    IVF (clustered) approximate mode for large taxonomies. New titles are
+    encoded and appended incrementally; the index persists to a
+    subdirectory of index_dir named after the embedding model and backend,
+    so switching either builds a fresh index instead of searching stale
+    vectors.
+    """
+
+    def __init__(self, index_dir: str = None, encode_fn=encode_texts, model_id: str = EMBEDDING_ID):
+        self.index_dir = os.path.join(index_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_id)) if index_dir else None
+        self.encode_fn = encode_fn
+        self.model_id = model_id
+        self.titles = []
+        self.embeddings = None
+        self.ivf = None
+        self._positions = {}
+        self._lock = threading.Lock()
+        if index_dir:
+            self._load()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add_titles(self, titles) -> int:
+        """Encodes and appends titles not already indexed. Returns the number added."""
+        with self._lock:
+            new_titles = [t for t in dict.fromkeys(t.strip() for t in titles) if t and t not in self._positions]
+            if not new_titles:
+                return 0
+
+            vectors = np.asarray(self.encode_fn(new_titles), dtype=np.float32)
+            start = len(self.titles)
+            self.titles.extend(new_titles)
+            self._positions.update((t, start + i) for i, t in enumerate(new_titles))
+            self.embeddings = vectors if self.embeddings is None else np.vstack([self.embeddings, vectors])
+            if self.ivf is not None:
+                self.ivf.add(vectors)
+
+            self._save()
+            logger.info(f"Role index: added {len(new_titles)} titles ({len(self.titles)} total)")
+            return len(new_titles)
+
+    def build_ivf(self, n_lists: int = None):
+        """(Re)clusters the index for approximate search."""
+        with self._lock:
+            self._build_ivf(n_lists)
+
+    def _build_ivf(self, n_lists=None):
+        if self.embeddings is None:
+            return
+        n_lists = n_lists or max(1, int(math.sqrt(len(self.titles))))
+        self.ivf = IVFIndex.train(self.embeddings, n_lists)
+        # Embeddings are unchanged (and may be memory-mapped from the file we'd overwrite)
+        self._save(embeddings=False)
+
+    def search(self, query_vector, k: int = 3, approximate: bool = False):
+        """Returns [(title, score), ...] for the k closest titles."""
+        if self.embeddings is None:
+            return []
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+
+        if approximate:
+            if self.ivf is None:
+                with self._lock:
+                    # Concurrent first approximate searches cluster (and save) once
+                    if self.ivf is None:
+                        self._build_ivf()
+            indices, scores = self.ivf.search(self.embeddings, query_vector, k, n_probe=settings.ROLE_INDEX_NPROBE)
+        else:
+            all_scores = self.embeddings @ query_vector
+            indices = top_k(all_scores, k)
+            scores = all_scores[indices]
+
+        return [(self.titles[i], round(float(s), 3)) for i, s in zip(indices, scores)]
+
+    # ----- persistence -----
+
+    def _paths(self):
+        return (
+            os.path.join(self.index_dir, "titles.json"),
+            os.path.join(self.index_dir, "embeddings.npy"),
+            os.path.join(self.index_dir, "ivf.npz"),
+        )
+
+    def _load(self):
+        titles_path, embeddings_path, ivf_path = self._paths()
+        if not (os.path.exists(titles_path) and os.path.exists(embeddings_path)):
+            return
+        with open(titles_path) as f:
+            self.titles = json.load(f)
+        self.embeddings = np.load(embeddings_path, mmap_mode="r")
+        self._positions = {t: i for i, t in enumerate(self.titles)}
+        if os.path.exists(ivf_path):
+            self.ivf = IVFIndex.load(ivf_path)
+        logger.info(f"Role index loaded {len(self.titles)} titles from {self.index_dir}")
+
+    def _save(self, embeddings: bool = True):
+        if not self.index_dir:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        titles_path, embeddings_path, ivf_path = self._paths()
+        if embeddings:
+            # Written beside the live file and swapped in: the loaded array may be a memmap of embeddings.npy
+            tmp_path = os.path.join(self.index_dir, "embeddings.tmp.npy")
+            np.save(tmp_path, np.ascontiguousarray(self.embeddings))
+            os.replace(tmp_path, embeddings_path)
+            tmp_path = os.path.join(self.index_dir, "titles.tmp.json")
+            with open(tmp_path, "w") as f:
+                json.dump(self.titles, f)
+            os.replace(tmp_path, titles_path)
+        if self.ivf is not None:
+            tmp_path = os.path.join(self.index_dir, "ivf.tmp.npz")
+            self.ivf.save(tmp_path)
+            os.replace(tmp_path, ivf_path)
+
+
+def load_taxonomy(path: str):
+    """Reads one job title per line, skipping blanks and # comments."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.role_index taxonomy.txt [--ivf]
+    if len(sys.argv) < 2:
+        print("Usage: python -m utils.role_index <taxonomy.txt> [--ivf]")
+        sys.exit(1)
+    index = RoleIndex(settings.ROLE_INDEX_DIR or None)
+    added = index.add_titles(load_taxonomy(sys.argv[1]))
+    if "--ivf" in sys.argv:
+        index.build_ivf()
+    print(f"Indexed {added} new titles ({len(index)} total)")
@@ -1,15 +1,28 @@
-from sentence_transformers import SentenceTransformer, util
+import threading
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from core.config import settings
+from services.matcher import encode_texts
+from utils.role_index import RoleIndex, load_taxonomy
 
 role_database = [
     "Data Scientist", "ML Engineer", "Cloud Engineer",
     "DevOps Engineer", "Business Analyst", "Software Engineer"
 ]
 
-def suggest_roles_from_resume(resume_text, top_k=3):
-    resume_embed = model.encode(resume_text, convert_to_tensor=True)
-    role_embeds = model.encode(role_database, convert_to_tensor=True)
-    similarities = util.cos_sim(resume_embed, role_embeds)[0]
-    top_indices = similarities.argsort(descending=True)[:top_k]
-    return [(role_database[i], round(similarities[i].item(), 3)) for i in top_indices]
+_role_index = None
+_role_index_lock = threading.Lock()
+
+def get_role_index():
+    """Loads the persisted role index, indexing any taxonomy titles it is missing."""
+    global _role_index
+    with _role_index_lock:
+        if _role_index is None:
+            index = RoleIndex(settings.ROLE_INDEX_DIR or None)
+            titles = load_taxonomy(settings.ROLE_TAXONOMY_PATH) if settings.ROLE_TAXONOMY_PATH else role_database
+            index.add_titles(titles)
+            _role_index = index
+    return _role_index
+
+def suggest_roles_from_resume(resume_text, top_k=3, approximate=False):
+    resume_embed = encode_texts([resume_text])[0]
+    return get_role_index().search(resume_embed, k=top_k, approximate=approximate)
@@ -1,8 +1,21 @@
-import spacy
+from core.config import settings
+from core.models import registry
+from utils.skill_gazetteer import get_gazetteer
 
-nlp = spacy.load("en_core_web_trf")
+def _load_nlp():
+    import spacy
+    return spacy.load("en_core_web_trf")
 
-def extract_skills(text):
+registry.register("skill_ner", _load_nlp)
+
+def extract_skills(text, method=None):
+    """Extracts skills with the gazetteer (default) or the spaCy NER model."""
+    if (method or settings.SKILL_EXTRACTOR) == "gazetteer":
+        return get_gazetteer().extract(text)
+    return extract_skills_ner(text)
+
+def extract_skills_ner(text):
+    nlp = registry.get("skill_ner")
     doc = nlp(text)
     skills = set()
     for ent in doc.ents:
@@ -0,0 +1,328 @@
+import re
+import threading
+
+from core.config import settings
+
+# Canonical skill name -> aliases (the canonical name itself always matches).
+# Extend at deploy time with SKILLS_GAZETTEER_PATH: one "Canonical: alias, alias" per line.
+SKILLS = {
+    # Programming languages
+    "Python": ["python3"],
+    "Java": ["java8", "java 8", "java 11", "java 17"],
+    "JavaScript": ["js", "ecmascript", "es6"],
+    "TypeScript": [],
+    "C": ["ansi c", "c programming", "c language"],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["c sharp", "csharp"],
+    "Go": ["golang", "go programming", "go lang"],
+    "Rust": [],
+    "Ruby": [],
+    "PHP": [],
+    "Swift": ["swiftui", "swift programming", "swift 5"],
+    "Kotlin": [],
+    "Scala": [],
+    "R": ["r programming", "rstudio", "r language"],
+    "MATLAB": [],
+    "Perl": [],
+    "Dart": [],
+    "Haskell": [],
+    "Elixir": [],
+    "Julia": ["julia programming", "julia language", "julialang"],
+    "Bash": ["shell scripting", "shell script", "bash scripting"],
+    "PowerShell": [],
+    "SQL": ["structured query language"],
+    "PL/SQL": ["plsql"],
+    "T-SQL": ["tsql", "transact-sql"],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+    "Sass": ["scss"],
+    # Web frameworks and runtimes
+    "React": ["react.js", "reactjs", "react js"],
+    "Angular": ["angularjs", "angular.js"],
+    "Vue.js": ["vue", "vuejs"],
+    "Next.js": ["nextjs"],
+    "Svelte": [],
+    "Node.js": ["nodejs", "node js"],
+    "Express.js": ["expressjs", "express js"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": ["fast api"],
+    "Spring Boot": ["springboot", "spring framework", "spring mvc"],
+    "ASP.NET": ["asp.net core", "dotnet", "dot net", ".net core"],
+    "Ruby on Rails": ["ror"],
+    "Laravel": [],
+    "jQuery": [],
+    "Redux": [],
+    "GraphQL": [],
+    "REST APIs": ["restful", "rest api", "restful apis", "restful services"],
+    "gRPC": [],
+    "Tailwind CSS": ["tailwind"],
+    "Bootstrap": [],
+    # Data and ML
+    "Machine Learning": ["ml"],
+    "Deep Learning": [],
+    "Natural Language Processing": ["nlp"],
+    "Computer Vision": ["image processing"],
+    "Data Analysis": ["data analytics"],
+    "Data Visualization": ["data viz"],
+    "Statistics": ["statistical analysis", "statistical modeling"],
+    "TensorFlow": ["tensorflow 2"],
+    "PyTorch": [],
+    "Keras": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "pandas": [],
+    "NumPy": [],
+    "SciPy": [],
+    "Matplotlib": [],
+    "Seaborn": [],
+    "Plotly": [],
+    "Hugging Face Transformers": ["hugging face", "huggingface"],
+    "spaCy": [],
+    "NLTK": [],
+    "OpenCV": [],
+    "XGBoost": [],
+    "LightGBM": [],
+    "Large Language Models": ["llm", "llms"],
+    "Generative AI": ["genai", "gen ai"],
+    "Prompt Engineering": [],
+    "LangChain": [],
+    "MLOps": [],
+    "MLflow": [],
+    "Kubeflow": [],
+    "Jupyter": ["jupyter notebook", "jupyter notebooks"],
+    "Apache Spark": ["pyspark", "spark sql", "spark streaming"],
+    "Hadoop": ["apache hadoop", "hdfs"],
+    "Apache Kafka": ["kafka"],
+    "Apache Airflow": ["airflow"],
+    "dbt": [],
+    "ETL": ["elt", "etl pipelines", "data pipelines"],
+    "Data Warehousing": ["data warehouse"],
+    "Snowflake": [],
+    "Databricks": [],
+    "BigQuery": ["google bigquery"],
+    "Redshift": ["amazon redshift"],
+    "Tableau": [],
+    "Power BI": ["powerbi"],
+    "Looker": [],
+    "Excel": ["microsoft excel", "ms excel", "advanced excel"],
+    "A/B Testing": ["ab testing", "split testing"],
+    # Databases
+    "PostgreSQL": ["postgres", "psql"],
+    "MySQL": [],
+    "SQLite": [],
+    "Oracle Database": ["oracle db", "oracle sql", "oracle 19c"],
+    "Microsoft SQL Server": ["sql server", "mssql", "ms sql"],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "Cassandra": ["apache cassandra"],
+    "Elasticsearch": ["elastic search", "elk"],
+    "DynamoDB": ["amazon dynamodb"],
+    "Neo4j": [],
+    "Firebase": [],
+    # Cloud and DevOps
+    "AWS": ["amazon web services"],
+    "Azure": ["microsoft azure"],
+    "Google Cloud": ["gcp", "google cloud platform"],
+    "Docker": ["containerization", "docker compose"],
+    "Kubernetes": ["k8s"],
+    "Helm": [],
+    "Terraform": [],
+    "Ansible": [],
+    "Chef": ["chef infra"],
+    "Puppet": ["puppet enterprise"],
+    "Jenkins": [],
+    "GitHub Actions": [],
+    "GitLab CI": ["gitlab ci/cd"],
+    "CI/CD": ["cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Linux": ["unix", "ubuntu", "centos", "red hat", "rhel"],
+    "Nginx": [],
+    "Apache HTTP Server": ["apache httpd"],
+    "Prometheus": [],
+    "Grafana": [],
+    "Datadog": [],
+    "Serverless": ["aws lambda", "azure functions", "cloud functions"],
+    "Microservices": ["microservice", "micro services"],
+    "Infrastructure as Code": ["iac"],
+    "Site Reliability Engineering": ["sre"],
+    "Networking": ["tcp/ip", "dns", "computer networks"],
+    "Cybersecurity": ["information security", "infosec", "cyber security"],
+    "Penetration Testing": ["pen testing", "pentesting"],
+    "OAuth": ["oauth2", "oauth 2.0"],
+    # Tools and practices
+    "Git": ["github", "gitlab", "bitbucket", "version control"],
+    "Jira": [],
+    "Confluence": [],
+    "Agile": ["agile methodology", "agile methodologies"],
+    "Scrum": [],
+    "Kanban": [],
+    "Test-Driven Development": ["tdd"],
+    "Unit Testing": ["unit tests"],
+    "pytest": [],
+    "JUnit": [],
+    "Selenium": [],
+    "Cypress": [],
+    "Jest": [],
+    "Object-Oriented Programming": ["oop", "object oriented programming"],
+    "Data Structures": ["data structures and algorithms", "dsa"],
+    "Algorithms": [],
+    "System Design": [],
+    "Design Patterns": [],
+    "Android": ["android development"],
+    "iOS": ["ios development"],
+    "React Native": [],
+    "Flutter": [],
+    "Figma": [],
+    "Adobe Photoshop": ["photoshop"],
+    "UI/UX Design": ["ui design", "ux design", "ui/ux", "user experience"],
+    "SEO": ["search engine optimization"],
+    "Salesforce": [],
+    "SAP": [],
+    "Blockchain": [],
+    "Embedded Systems": ["embedded software", "firmware"],
+    # Business and soft skills
+    "Project Management": ["pmp"],
+    "Product Management": [],
+    "Stakeholder Management": [],
+    "Business Analysis": ["requirements gathering"],
+    "Leadership": ["team leadership", "team lead"],
+    "Communication": ["communication skills", "written communication", "verbal communication"],
+    "Teamwork": ["collaboration", "team player"],
+    "Problem Solving": ["problem-solving"],
+    "Critical Thinking": [],
+    "Time Management": [],
+    "Mentoring": ["coaching"],
+    "Public Speaking": ["presentation skills"],
+    "Negotiation": [],
+    "Customer Service": ["customer support"],
+}
+
+# Canonical names that are also everyday words (or first names); only their aliases match
+AMBIGUOUS = {
+    "C", "Go", "R", "Chef", "Puppet", "Excel", "Swift", "Julia",
+    "Helm", "Jest", "Ruby", "Jenkins", "Bootstrap",
+}
+
+# Everyday words and short abbreviations that still name a skill when written
+# exactly like this and listed near another skill ("Python, Spark, Excel" but
+# not "I excel at", "at the helm of", "guard rails" or "Swift delivery of ...").
+CONTEXTUAL = {
+    "Excel": "Excel",
+    "Swift": "Swift",
+    "Helm": "Helm",
+    "Jest": "Jest",
+    "Ruby": "Ruby",
+    "Jenkins": "Jenkins",
+    "Bootstrap": "Bootstrap",
+    "Spark": "Apache Spark",
+    "Oracle": "Oracle Database",
+    "Transformers": "Hugging Face Transformers",
+    "Torch": "PyTorch",
+    "Rails": "Ruby on Rails",
+    "Node": "Node.js",
+    "Kube": "Kubernetes",
+    "Py": "Python",
+    "TS": "TypeScript",
+    "TF": "TensorFlow",
+    "DL": "Deep Learning",
+}
+CONTEXT_WINDOW = 3  # tokens between a contextual word and the nearest other skill
+
+# "." stays inside tokens (node.js, asp.net); "/" and "-" split them, so
+# "CI/CD" matches as the phrase "ci cd" ("C/C++" yields only C++: bare "C" is ambiguous).
+_TOKEN_RE = re.compile(r"[a-z0-9#+]+(?:\.[a-z0-9#+]+)*", re.IGNORECASE)
+
+
+def tokenize(text: str):
+    return [token.lower() for token in _TOKEN_RE.findall(text)]
+
+
+class SkillGazetteer:
+    """
+    Compiled multi-pattern skill matcher.
+
+    Every alias is tokenized into a token trie; extraction is a single
+    left-to-right scan taking the longest alias that starts at each token,
+    so cost grows with text length rather than with gazetteer size.
+    CONTEXTUAL words are checked afterwards against the original casing and
+    the positions of the skills already found.
+    """
+
+    _END = object()
+
+    def __init__(self, skills: dict = None):
+        self._trie = {}
+        self.size = 0
+        for canonical, aliases in (skills or {}).items():
+            self.add(canonical, aliases, match_canonical=canonical not in AMBIGUOUS)
+
+    def add(self, canonical: str, aliases=(), match_canonical: bool = True):
+        for phrase in ([canonical] if match_canonical else []) + list(aliases):
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            if self._END not in node:
+                self.size += 1
+            node[self._END] = canonical
+
+    def extract(self, text: str):
+        """Returns the sorted canonical names of all skills mentioned in text."""
+        originals = _TOKEN_RE.findall(text)
+        tokens = [token.lower() for token in originals]
+        found = set()
+        starts = []  # token positions where a skill match begins
+        i = 0
+        while i < len(tokens):
+            node = self._trie
+            match, match_end = None, i
+            j = i
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if self._END in node:
+                    match, match_end = node[self._END], j
+            if match is not None:
+                found.add(match)
+                starts.append(i)
+                i = match_end
+            else:
+                i += 1
+
+        for position, original in enumerate(originals):
+            canonical = CONTEXTUAL.get(original)
+            if canonical is not None and any(
+                0 < abs(start - position) <= CONTEXT_WINDOW for start in starts
+            ):
+                found.add(canonical)
+        return sorted(found)
+
+
+def load_gazetteer_file(path: str) -> dict:
+    """Parses "Canonical: alias, alias" lines (aliases optional, # comments)."""
+    skills = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            canonical, _, aliases = line.partition(":")
+            skills.setdefault(canonical.strip(), []).extend(a.strip() for a in aliases.split(",") if a.strip())
+    return skills
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> SkillGazetteer:
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            gazetteer = SkillGazetteer(SKILLS)
+            if settings.SKILLS_GAZETTEER_PATH:
+                for canonical, aliases in load_gazetteer_file(settings.SKILLS_GAZETTEER_PATH).items():
+                    gazetteer.add(canonical, aliases)
+            _gazetteer = gazetteer
+    return _gazetteer